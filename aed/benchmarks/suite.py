@@ -0,0 +1,329 @@
+"""Benchmark suite running aed against synthetic theme libraries.
+
+    python -m aed.benchmarks.suite [--sizes 10,1000,10000] [--output FILE]
+    python -m aed.benchmarks.suite --compare BASELINE.json [RESULTS.json]
+
+For every library size, a temporary configuration and as many color and font files
+are generated, and the construction of `AlacrittyContainer`, the indexing of the
+theme directories, the latency and the bytes written of `set_colors`, `set_font`
+and `set_opacity`, and the construction of the TUI (with its main loop mocked out)
+are measured. Results are printed (or written to FILE) as JSON, so that runs of
+different commits can be compared with --compare.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+from unittest import mock
+from typing import Union, List, Callable
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History
+from aed.container.similar import PaletteIndex
+
+DEFAULT_SIZES = [10, 1000, 10000]
+
+_ansi_names = ["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
+_families = ["DejaVu Sans Mono", "Fira Code", "Hack", "Iosevka", "Source Code Pro"]
+
+
+def _hex(rng: random.Random) -> str:
+    return "'#{:06x}'".format(rng.randrange(2**24))
+
+
+def make_library(root: str, size: int, seed: int = 0) -> dict:
+    """Generates an Alacritty configuration and `size` color and font files in `root`
+
+    Returns
+    -------
+    paths:
+        Dictionary with the paths of the "config" file and of the "colors" and
+        "fonts" directories
+    """
+    rng = random.Random(seed)
+    paths = {
+        "config": os.path.join(root, "alacritty.yml"),
+        "colors": os.path.join(root, "colors"),
+        "fonts": os.path.join(root, "fonts"),
+    }
+    os.makedirs(paths["colors"], exist_ok=True)
+    os.makedirs(paths["fonts"], exist_ok=True)
+    with open(paths["config"], "w") as stream:
+        stream.write(
+            "# synthetic configuration\n"
+            "window:\n  opacity: 0.9\n  padding:\n    x: 2\n    y: 2\n"
+            "scrolling:\n  history: 10000\n"
+            "colors:\n  primary:\n    background: '#000000'\n"
+            "font:\n  size: 11.0\n"
+        )
+    for i in range(size):
+        lines = ["colors:", "  primary:"]
+        lines += ["    background: {}".format(_hex(rng))]
+        lines += ["    foreground: {}".format(_hex(rng))]
+        for group in ("normal", "bright"):
+            lines.append("  {}:".format(group))
+            lines += ["    {}: {}".format(name, _hex(rng)) for name in _ansi_names]
+        with open(
+            os.path.join(paths["colors"], "theme-{:05d}.yml".format(i)), "w"
+        ) as f:
+            f.write("\n".join(lines) + "\n")
+        family = rng.choice(_families)
+        lines = ["font:"]
+        for style in ("normal", "bold", "italic"):
+            lines += ["  {}:".format(style), "    family: {}".format(family)]
+        lines.append("  size: {}".format(rng.choice([9.0, 10.0, 11.0, 12.0])))
+        with open(os.path.join(paths["fonts"], "font-{:05d}.yml".format(i)), "w") as f:
+            f.write("\n".join(lines) + "\n")
+    return paths
+
+
+def _time(fn: Callable, repeat: int) -> dict:
+    """Times `repeat` calls of `fn`, returning the median and minimum in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {"median": timings[len(timings) // 2], "min": timings[0]}
+
+
+def bench_size(size: int, repeat: int = 5, tui: bool = True) -> dict:
+    """Runs all benchmarks against a synthetic library of `size` color and font files
+
+    Returns
+    -------
+    results:
+        Dictionary mapping benchmark names to timings (see `_time`) or, for the
+        "bytes_*" entries, to the mean number of bytes written per operation
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="aed-bench-") as root:
+        paths = make_library(root, size)
+        cache_dir = os.path.join(root, "themes")
+
+        def container() -> AlacrittyContainer:
+            return AlacrittyContainer(
+                paths["config"],
+                paths["colors"],
+                paths["fonts"],
+                theme_cache=ThemeCache(cache_dir),
+                history=History(paths["config"], os.path.join(root, "history.json")),
+                palette_index=PaletteIndex(os.path.join(root, "palettes.json")),
+            )
+
+        results["construct"] = _time(container, repeat)
+        results["get_colors"] = _time(
+            lambda: AlacrittyContainer.get_colors(paths["colors"]), repeat
+        )
+        results["get_fonts"] = _time(
+            lambda: AlacrittyContainer.get_fonts(paths["fonts"]), repeat
+        )
+
+        ac = container()
+        colors = list(ac.colors.values())
+        fonts = list(ac.fonts.values())
+        # distinct themes are applied, so that no write is skipped. The first pass
+        # parses the themes, the second one reads them from the theme cache.
+        for label in ("cold", "warm"):
+            for name, fns, setter in (
+                ("colors", colors, ac.set_colors),
+                ("font", fonts, ac.set_font),
+            ):
+                count = min(repeat, len(fns))
+                cycle = iter(fns[:count])
+                written = ac.config_writer.bytes_written
+                results["set_{}_{}".format(name, label)] = _time(
+                    lambda: setter(next(cycle)), count
+                )
+                if label == "cold":
+                    results["bytes_set_{}".format(name)] = (
+                        ac.config_writer.bytes_written - written
+                    ) / count
+        opacities = iter([0.5 + i / 100 for i in range(repeat)])
+        written = ac.config_writer.bytes_written
+        results["set_opacity"] = _time(lambda: ac.set_opacity(next(opacities)), repeat)
+        results["bytes_set_opacity"] = (
+            ac.config_writer.bytes_written - written
+        ) / repeat
+
+        # the first query indexes the palettes of the library, later ones only rank
+        results["similar_colors_cold"] = _time(lambda: ac.similar_colors(10), 1)
+        results["similar_colors"] = _time(lambda: ac.similar_colors(10), repeat)
+
+        if tui:
+            results["tui_construct"] = _time(lambda: bench_tui(container()), repeat)
+            results["fuzzy_filter"] = _time(
+                lambda: bench_fuzzy(list(ac.colors)), repeat
+            )
+    return results
+
+
+def bench_fuzzy(names: List[str]):
+    """Filters a theme menu as six incremental keystrokes would"""
+    from aed.tui.fuzzy import FuzzyIndex
+
+    index = FuzzyIndex(names)
+    for query in ["t", "th", "the", "them", "theme-", "theme-1"]:
+        index.filter(query)
+
+
+def bench_tui(container: AlacrittyContainer):
+    """Constructs the TUI without running its main loop or touching the terminal"""
+    from aed.tui.alacritty_tui import Tui
+    import urwid
+
+    with mock.patch.object(urwid.MainLoop, "run"):
+        Tui(container)
+
+
+def _commit() -> Union[None, str]:
+    try:
+        return (
+            subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True,
+                text=True,
+            ).stdout.strip()
+            or None
+        )
+    except OSError:
+        return None
+
+
+def run(sizes: List[int], repeat: int = 5, tui: bool = True) -> dict:
+    """Runs the suite for every library size
+
+    Returns
+    -------
+    report:
+        Dictionary with the "meta" data of the run (commit, Python version, ...)
+        and the "results" of `bench_size` keyed by library size
+    """
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        report["results"][str(size)] = bench_size(size, repeat, tui)
+    return report
+
+
+def compare(baseline: dict, report: dict, threshold: float = 0.1) -> List[tuple]:
+    """Compares two reports of `run`
+
+    Parameters
+    ----------
+    baseline, report:
+        Reports of the baseline and of the compared run
+    threshold:
+        Relative increase above which a benchmark is reported as a regression
+
+    Returns
+    -------
+    rows:
+        Tuples of (size, benchmark, baseline value, value, ratio, regression) for
+        every benchmark present in both reports
+    """
+    rows = []
+    for size, results in report["results"].items():
+        base_results = baseline["results"].get(size, {})
+        for name, value in results.items():
+            if name not in base_results:
+                continue
+            base = base_results[name]
+            if isinstance(value, dict):
+                value, base = value["median"], base["median"]
+            ratio = value / base if base > 0 else float("inf") if value > 0 else 1.0
+            rows.append((size, name, base, value, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format(name: str, value: float) -> str:
+    if name.startswith("bytes_"):
+        return "{:.0f} B".format(value)
+    return "{:.3f} ms".format(1e3 * value)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma-separated library sizes (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions")
+    parser.add_argument("--no-tui", action="store_true", help="skip the TUI benchmark")
+    parser.add_argument("--output", type=str, help="write the JSON report to a file")
+    parser.add_argument(
+        "--compare",
+        type=str,
+        nargs="+",
+        metavar="REPORT",
+        help="compare a baseline report with a second report (or a new run)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression (default: %(default)s)",
+    )
+    opts = parser.parse_args()
+    sizes = [int(size) for size in opts.sizes.split(",") if size]
+
+    if opts.compare != None:
+        with open(opts.compare[0], "r") as stream:
+            baseline = json.load(stream)
+        if len(opts.compare) > 1:
+            with open(opts.compare[1], "r") as stream:
+                report = json.load(stream)
+        else:
+            report = run(sizes, opts.repeat, not opts.no_tui)
+        rows = compare(baseline, report, opts.threshold)
+        print(
+            "{:>7} {:<18}{:>14}{:>14}{:>8}".format(
+                "size", "benchmark", "base", "new", "ratio"
+            )
+        )
+        for size, name, base, value, ratio, regression in rows:
+            print(
+                "{:>7} {:<18}{:>14}{:>14}{:>8.2f}{}".format(
+                    size,
+                    name,
+                    _format(name, base),
+                    _format(name, value),
+                    ratio,
+                    " !" if regression else "",
+                )
+            )
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+    report = run(sizes, opts.repeat, not opts.no_tui)
+    data = json.dumps(report, indent=2)
+    if opts.output != None:
+        with open(opts.output, "w") as stream:
+            stream.write(data + "\n")
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main()
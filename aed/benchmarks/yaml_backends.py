@@ -0,0 +1,83 @@
+"""Micro-benchmark comparing the available YAML backends on Alacritty configuration
+and theme files.
+
+    python -m aed.benchmarks.yaml_backends [FILE ...]
+
+If no files are given, the current Alacritty configuration and all color and font
+files are used. The libyaml backend is only benchmarked if ruamel.yaml.clib is
+installed.
+"""
+
+import io
+import os
+import sys
+import timeit
+import argparse
+from glob import glob
+from aed.container.alacritty_container import (
+    ALACRITTY_CONFIG,
+    ALACRITTY_COLOR_DIR,
+    ALACRITTY_FONT_DIR,
+)
+from aed.container.yaml_backend import available_backends, get_backend
+
+
+def default_files() -> list:
+    files = [ALACRITTY_CONFIG] if os.path.isfile(ALACRITTY_CONFIG) else []
+    files += sorted(glob("{}/*.yml".format(ALACRITTY_COLOR_DIR)))
+    files += sorted(glob("{}/*.yml".format(ALACRITTY_FONT_DIR)))
+    return files
+
+
+def bench(files: list, number: int = 20) -> dict:
+    """Times loading and dumping every file with every available backend
+
+    Returns
+    -------
+    results:
+        Dictionary mapping backend names to dictionaries with the mean time (in
+        seconds) to load and to dump all `files` once
+    """
+
+    texts = []
+    for fn in files:
+        with open(fn, "r") as stream:
+            texts.append(stream.read())
+    results = {}
+    for name in available_backends():
+        backend = get_backend(name)
+        data = [backend.load(text) for text in texts]
+        load = timeit.timeit(
+            lambda: [backend.load(text) for text in texts], number=number
+        )
+        dump = timeit.timeit(
+            lambda: [backend.dump(d, io.StringIO()) for d in data], number=number
+        )
+        results[name] = {"load": load / number, "dump": dump / number}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="YAML files to benchmark")
+    parser.add_argument("--number", type=int, default=20, help="repetitions")
+    opts = parser.parse_args()
+
+    files = opts.files or default_files()
+    if len(files) == 0:
+        sys.exit("No YAML files found.")
+    results = bench(files, opts.number)
+    print("{} file(s), {} repetition(s)".format(len(files), opts.number))
+    if "libyaml" not in results:
+        print("libyaml: skipped, ruamel.yaml.clib is not installed")
+    print("{:<10}{:>14}{:>14}".format("backend", "load (ms)", "dump (ms)"))
+    for name, timings in results.items():
+        print(
+            "{:<10}{:>14.3f}{:>14.3f}".format(
+                name, 1e3 * timings["load"], 1e3 * timings["dump"]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
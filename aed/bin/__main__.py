@@ -1,14 +1,27 @@
 #! /user/bin/env python3
 
+import os
+import sys
+import time
+import atexit
 import argparse
-from aed.tui.alacritty_tui import Tui
-from aed.container.alacritty_container import (
-    AlacrittyContainer,
-    ALACRITTY_CONFIG,
-    ALACRITTY_COLOR_DIR,
-    ALACRITTY_FONT_DIR,
-    yaml,
-)
+from typing import Union
+from aed.container.yaml_backend import backend_names, set_backend
+from aed.container import timing
+from aed.daemon import request, response_error
+
+# The container and its dependencies are only imported when the configuration is
+# edited in this process, so that requests to a running daemon stay cheap.
+
+# options that edit the configuration. If none of them is given, the TUI is launched.
+_edit_options = ["colors", "font", "opacity", "load_profile", "save_profile"]
+
+
+def error_message(exception: BaseException) -> str:
+    """Message of an exception, without the quotes that str() adds to KeyErrors"""
+    if isinstance(exception, KeyError) and len(exception.args) > 0:
+        return str(exception.args[0])
+    return str(exception)
 
 
 def parse_input():
@@ -30,31 +43,572 @@ def parse_input():
         type=float,
         help="number from 0.0 to 1.0 inclusive to define a new window opacity. All valid input is rounded to the nearest hundredth.",
     )
+    parser.add_argument(
+        "--load-profile",
+        type=str,
+        help="name of a saved profile in ~/.config/alacritty/aed-profiles.yml whose colors, font and opacity are applied together",
+    )
+    parser.add_argument(
+        "--save-profile",
+        type=str,
+        help="save the given --colors, --font and --opacity options as a named profile",
+    )
+    parser.add_argument(
+        "--live",
+        type=str,
+        choices=["window", "global"],
+        help="apply the changes to the current window or to all running Alacritty windows over IPC, without writing the configuration file. Without other changes, the TUI is launched in this mode.",
+    )
+    parser.add_argument(
+        "--yaml-backend",
+        type=str,
+        choices=["auto"] + backend_names(),
+        help="YAML parser/emitter to use. Defaults to $AED_YAML_BACKEND, or 'auto', which prefers the C-accelerated libyaml backend of ruamel.yaml when it is installed. 'pyyaml' follows YAML 1.1 and is only used on request.",
+    )
+    parser.add_argument(
+        "--targets",
+        type=str,
+        nargs="+",
+        metavar="CONFIG",
+        help="apply --colors, --font and --opacity to these configuration files (or glob patterns) concurrently, instead of to ~/.config/alacritty/alacritty.yml",
+    )
+    parser.add_argument(
+        "--bundle",
+        type=str,
+        metavar="FILE",
+        help="read color and font themes from a bundle written by 'aed pack' instead of the color and font directories",
+    )
+    parser.add_argument(
+        "--fade",
+        type=float,
+        metavar="SECONDS",
+        help="cross-fade from the current colors to --colors over SECONDS, at 30 frames per second",
+    )
+    parser.add_argument(
+        "--imports",
+        action="store_true",
+        help="apply colors and fonts by pointing aed-colors.yml and aed-font.yml, which alacritty.yml is made to import, at the theme files instead of editing alacritty.yml",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="edit the configuration in this process even if an aed daemon is running",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time parsing, validation, directory scans, writes and the TUI, and print a summary table on exit",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        metavar="FILE",
+        help="like --profile, but write the timings to FILE in the Chrome trace format (see chrome://tracing or ui.perfetto.dev)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    validate_parser = subparsers.add_parser(
+        "validate",
+        help="parse and validate every color and font file, reporting all failures",
+    )
+    validate_parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes. Defaults to the number of CPUs.",
+    )
+    validate_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-validate all files instead of only the new or modified ones",
+    )
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="keep the configuration and themes in memory and apply the changes requested by other aed calls",
+    )
+    daemon_parser.add_argument(
+        "--socket",
+        type=str,
+        help="path of the Unix socket to listen on. Defaults to $AED_SOCKET, or aed.sock in $XDG_RUNTIME_DIR.",
+    )
+    daemon_parser.add_argument(
+        "--stop", action="store_true", help="stop the running daemon"
+    )
+    pack_parser = subparsers.add_parser(
+        "pack",
+        help="compile the color and font directories into a single theme bundle (see --bundle)",
+    )
+    pack_parser.add_argument(
+        "--output",
+        type=str,
+        metavar="FILE",
+        help="path of the bundle. Defaults to $XDG_CACHE_HOME/aed/themes.aedpack.",
+    )
+    similar_parser = subparsers.add_parser(
+        "similar",
+        help="list the color themes closest to the current colors (or to --to)",
+    )
+    similar_parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of themes to list (default: 10)",
+    )
+    similar_parser.add_argument(
+        "--to",
+        type=str,
+        metavar="NAME",
+        help="name of the color theme to compare to instead of the current colors",
+    )
+    contrast_parser = subparsers.add_parser(
+        "contrast",
+        help="list the WCAG contrast ratios of the color themes against their background",
+    )
+    contrast_parser.add_argument(
+        "--min",
+        type=float,
+        default=None,
+        metavar="RATIO",
+        help="only list themes whose foreground has at least this contrast ratio (e.g. 4.5 for WCAG AA)",
+    )
+    contrast_parser.add_argument(
+        "--min-ansi",
+        type=float,
+        default=None,
+        metavar="RATIO",
+        help="only list themes whose least readable ANSI color has at least this contrast ratio",
+    )
+    contrast_parser.add_argument(
+        "--sort",
+        choices=["primary", "ansi", "name"],
+        default="primary",
+        help="sort by foreground ratio, by least readable ANSI color ratio (both highest first) or by name",
+    )
+    for command in ("undo", "redo"):
+        history_parser = subparsers.add_parser(
+            command,
+            help="{} the last {} change(s) made with aed".format(
+                command, "N" if command == "undo" else "N undone"
+            ),
+        )
+        history_parser.add_argument(
+            "-n",
+            "--steps",
+            type=int,
+            default=1,
+            metavar="N",
+            help="number of changes to {} (default: 1)".format(command),
+        )
     return parser
 
 
-def main():
-    parser = parse_input()
-    opts = parser.parse_args()
+def step_history(ac, opts: argparse.Namespace) -> int:
+    """Undoes or redoes `opts.steps` changes
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if fewer changes could be undone/redone than requested
+    """
+    for _ in range(opts.steps):
+        exception = ac.undo() if opts.command == "undo" else ac.redo()
+        if exception != None:
+            print(error_message(exception), file=sys.stderr)
+            return 1
+    return 0
+
+
+def report_profile(profiler: timing.Profiler, trace_fn: str = None):
+    """Prints the timing summary of `profiler`, or writes it to `trace_fn` in the
+    Chrome trace format
+    """
+    if trace_fn != None:
+        profiler.write_chrome_trace(trace_fn)
+    else:
+        print(profiler.format_summary(), file=sys.stderr)
+
 
-    ac = AlacrittyContainer(ALACRITTY_CONFIG, ALACRITTY_COLOR_DIR, ALACRITTY_FONT_DIR)
+def save_requested_profile(opts: argparse.Namespace):
+    """Saves the --colors, --font and --opacity options as the --save-profile profile"""
+    from aed.container.profiles import save_profile
+
+    profile = {"colors": opts.colors, "font": opts.font, "opacity": opts.opacity}
     if opts.colors:
-        exception = ac.set_colors(opts.colors)
+        profile["colors"] = os.path.abspath(opts.colors)
+    if opts.font:
+        profile["font"] = os.path.abspath(opts.font)
+    exception = save_profile(opts.save_profile, profile)
+    if exception != None:
+        raise exception
+
+
+def run_daemon(opts: argparse.Namespace) -> int:
+    """Runs (or, with --stop, stops) the aed daemon
+
+    Returns
+    -------
+    int:
+        Exit code
+    """
+    if opts.stop:
+        if request({"op": "shutdown"}, opts.socket) == None:
+            print("No aed daemon is running.", file=sys.stderr)
+            return 1
+        return 0
+
+    from aed.daemon.server import AedDaemon
+
+    ac = make_container(opts)
+    ac.enable_prefetch()
+    try:
+        AedDaemon(ac, opts.socket).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ac.disable_prefetch()
+    return 0
+
+
+def daemon_message(opts: argparse.Namespace) -> dict:
+    """Translates the options of a call into a daemon request, or returns None if the
+    call cannot be handled by a daemon (e.g., it launches the TUI or uses --live)
+    """
+    if opts.no_daemon or opts.live != None or opts.yaml_backend != None:
+        return None
+    if opts.bundle != None or opts.imports or opts.fade != None:
+        return None
+    if opts.targets != None:
+        return None
+    if opts.profile or opts.trace != None:
+        return None
+    if opts.command in ("undo", "redo"):
+        return {"op": opts.command}
+    message = {"op": "apply"}
+    if opts.load_profile:
+        message["profile"] = opts.load_profile
+    for option in ("colors", "font"):
+        if vars(opts)[option]:
+            # the daemon does not share the working directory of the client
+            message[option] = os.path.abspath(os.path.expanduser(vars(opts)[option]))
+    if opts.opacity != None:
+        message["opacity"] = round(opts.opacity, 2)
+    return message if len(message) > 1 else None
+
+
+def send_to_daemon(opts: argparse.Namespace) -> Union[None, int]:
+    """Sends the changes of a call to a running daemon
+
+    Returns
+    -------
+    None, int:
+        None if no daemon handled the call, else the exit code
+    """
+    message = daemon_message(opts)
+    if message == None:
+        return None
+    steps = opts.steps if opts.command in ("undo", "redo") else 1
+    for step in range(steps):
+        try:
+            response = request(message)
+        except (OSError, ValueError):
+            response = None
+        if response == None:
+            # no (working) daemon: the first request falls back to direct mode
+            return None if step == 0 else 1
+        exception = response_error(response)
         if exception != None:
+            if opts.command in ("undo", "redo"):
+                print(error_message(exception), file=sys.stderr)
+                return 1
             raise exception
+    return 0
 
-    if opts.font:
-        exception = ac.set_font(opts.font)
+
+def fan_out(opts: argparse.Namespace) -> int:
+    """Applies --colors, --font and --opacity to all --targets and reports the result
+    and timing of each target
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if any target failed and 0 otherwise
+    """
+    from aed.container.fanout import apply_to_targets, expand_targets
+    from aed.container.history import HISTORY_JOURNAL
+    from aed.container.theme_cache import ThemeCache, THEME_CACHE
+
+    targets = expand_targets(opts.targets)
+    opacity = round(opts.opacity, 2) if opts.opacity != None else None
+    start = time.perf_counter()
+    results = apply_to_targets(
+        targets,
+        opts.colors,
+        opts.font,
+        opacity,
+        theme_cache=ThemeCache(THEME_CACHE),
+        journal_fn=HISTORY_JOURNAL,
+    )
+    if isinstance(results, BaseException):
+        raise results
+    for result in results:
+        if result.error != None:
+            status = "failed: {}".format(error_message(result.error))
+        else:
+            status = "written" if result.written else "unchanged"
+        print(
+            "{:>9.1f} ms  {}  {}".format(1e3 * result.seconds, result.fn, status),
+            file=sys.stderr,
+        )
+    failures = [result for result in results if result.error != None]
+    print(
+        "{} target(s) in {:.1f} ms, {} failed.".format(
+            len(results), 1e3 * (time.perf_counter() - start), len(failures)
+        ),
+        file=sys.stderr,
+    )
+    return 1 if len(failures) > 0 else 0
+
+
+def pack(opts: argparse.Namespace) -> int:
+    """Compiles the color and font directories into a theme bundle
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if any file could not be parsed and 0 otherwise
+    """
+    from aed.container.alacritty_container import (
+        ALACRITTY_COLOR_DIR,
+        ALACRITTY_FONT_DIR,
+    )
+    from aed.container.bundle import THEME_BUNDLE, pack_library
+
+    bundle_fn = opts.output or THEME_BUNDLE
+    skipped = pack_library(ALACRITTY_COLOR_DIR, ALACRITTY_FONT_DIR, bundle_fn)
+    for fn, error in skipped:
+        print("{}: {}".format(fn, error), file=sys.stderr)
+    print(
+        "Wrote {} ({} file(s) skipped).".format(bundle_fn, len(skipped)),
+        file=sys.stderr,
+    )
+    return 1 if len(skipped) > 0 else 0
+
+
+def make_container(opts: argparse.Namespace):
+    """Creates the container of the current Alacritty configuration"""
+    from aed.container.alacritty_container import (
+        AlacrittyContainer,
+        ALACRITTY_CONFIG,
+        ALACRITTY_COLOR_DIR,
+        ALACRITTY_FONT_DIR,
+    )
+
+    from aed.container.history import History, HISTORY_JOURNAL
+    from aed.container.theme_cache import ThemeCache, THEME_CACHE
+    from aed.container.similar import PaletteIndex, PALETTE_CACHE
+
+    bundle = None
+    if opts.bundle != None:
+        from aed.container.bundle import ThemeBundle
+
+        bundle = ThemeBundle(os.path.expanduser(opts.bundle))
+    ac = AlacrittyContainer(
+        ALACRITTY_CONFIG,
+        ALACRITTY_COLOR_DIR,
+        ALACRITTY_FONT_DIR,
+        theme_cache=ThemeCache(THEME_CACHE),
+        history=History(ALACRITTY_CONFIG, HISTORY_JOURNAL),
+        bundle=bundle,
+        imports=opts.imports,
+        palette_index=PaletteIndex(PALETTE_CACHE),
+    )
+    if opts.imports:
+        exception = ac.enable_imports()
         if exception != None:
             raise exception
+    return ac
 
-    if opts.opacity != None:
-        opacity = round(opts.opacity, 2)
-        exception = ac.set_opacity(opacity)
+
+def similar(opts: argparse.Namespace) -> int:
+    """Lists the color themes closest to the current colors or to `opts.to`
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if `opts.to` is not a color theme and 0 otherwise
+    """
+    ac = make_container(opts)
+    colors = None
+    if opts.to != None:
+        if opts.to not in ac.colors:
+            print("No color theme named {}.".format(opts.to), file=sys.stderr)
+            return 1
+        theme_map, _ = ac._read_theme(ac.colors[opts.to], "colors")
+        colors = theme_map.get("colors") or {}
+    # the compared theme itself is ranked first
+    count = opts.count + 1 if opts.to != None else opts.count
+    for name, distance in ac.similar_colors(count, colors):
+        if name != opts.to:
+            print("{:8.2f}  {}".format(distance, name))
+    return 0
+
+
+def contrast(opts: argparse.Namespace) -> int:
+    """Lists the contrast scores of the color themes, filtered and sorted as
+    requested. Scores that cannot be computed are shown as '-' and fail any minimum.
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if no theme passes the filters and 0 otherwise
+    """
+    ac = make_container(opts)
+    rows = []
+    for name, score in ac.contrast_scores().items():
+        if opts.min != None and (score.primary == None or score.primary < opts.min):
+            continue
+        if opts.min_ansi != None and (score.ansi == None or score.ansi < opts.min_ansi):
+            continue
+        rows.append((name, score))
+    if opts.sort != "name":
+        rows.sort(key=lambda row: -(getattr(row[1], opts.sort) or 0.0))
+    for name, score in rows:
+        print(
+            "{:>7}  {:>7}  {}".format(
+                *["-" if ratio == None else "{:.2f}".format(ratio) for ratio in score],
+                name
+            )
+        )
+    return 0 if len(rows) > 0 else 1
+
+
+def validate(opts: argparse.Namespace) -> int:
+    """Validates the color and font libraries and reports all failures
+
+    Returns
+    -------
+    int:
+        Exit code, 1 if any file is invalid and 0 otherwise
+    """
+    from aed.container.alacritty_container import (
+        ALACRITTY_COLOR_DIR,
+        ALACRITTY_FONT_DIR,
+    )
+    from aed.container.validate import validate_library
+
+    kwargs = {"cache_fn": None} if opts.no_cache else {}
+    results = validate_library(
+        ALACRITTY_COLOR_DIR, ALACRITTY_FONT_DIR, workers=opts.workers, **kwargs
+    )
+    failures = [result for result in results if len(result.errors) > 0]
+    for result in failures:
+        for error in result.errors:
+            print("{}: {}".format(result.fn, error), file=sys.stderr)
+    print(
+        "{} file(s) checked, {} invalid.".format(len(results), len(failures)),
+        file=sys.stderr,
+    )
+    return 1 if len(failures) > 0 else 0
+
+
+def main():
+    parser = parse_input()
+    opts = parser.parse_args()
+    if opts.profile or opts.trace != None:
+        # reported on exit, so that early exits (e.g., subcommands) are covered too
+        atexit.register(report_profile, timing.enable(), opts.trace)
+    if opts.yaml_backend != None:
+        set_backend(opts.yaml_backend)
+
+    if opts.command == "validate":
+        sys.exit(validate(opts))
+    if opts.command == "daemon":
+        sys.exit(run_daemon(opts))
+    if opts.command == "pack":
+        sys.exit(pack(opts))
+    if opts.command == "similar":
+        sys.exit(similar(opts))
+    if opts.command == "contrast":
+        sys.exit(contrast(opts))
+    if opts.imports and (opts.live != None or opts.load_profile):
+        parser.error("--imports does not support --live and --load-profile")
+    if opts.fade != None and (opts.imports or opts.fade <= 0):
+        parser.error("--fade needs a positive duration and does not support --imports")
+    if opts.fade != None and not (opts.colors or opts.load_profile):
+        # otherwise there is nothing to fade to, and the TUI would be launched
+        parser.error("--fade needs --colors or --load-profile")
+    if opts.targets != None:
+        if (
+            opts.fade != None
+            or opts.imports
+            or opts.live != None
+            or opts.load_profile
+            or opts.command != None
+        ):
+            parser.error(
+                "--targets only supports --colors, --font, --opacity and --save-profile"
+            )
+        exit_code = fan_out(opts)
+        if opts.save_profile and exit_code == 0:
+            save_requested_profile(opts)
+        sys.exit(exit_code)
+
+    exit_code = send_to_daemon(opts)
+    if exit_code != None:
+        if opts.save_profile and exit_code == 0:
+            save_requested_profile(opts)
+        sys.exit(exit_code)
+
+    from aed.container.appliers import IpcApplier
+    from aed.container.profiles import load_profiles
+    from aed.container.fade import FADE_FPS
+
+    ac = make_container(opts)
+    if opts.command in ("undo", "redo"):
+        sys.exit(step_history(ac, opts))
+    if opts.live != None:
+        ac.runtime_applier = IpcApplier(opts.live)
+        ac.begin_preview()
+
+    # all changes are validated up front and written at once
+    with ac.transaction() as tx:
+        if opts.load_profile:
+            profiles = load_profiles()
+            if opts.load_profile not in profiles:
+                raise KeyError("No profile named {}.".format(opts.load_profile))
+            tx.set_profile(profiles[opts.load_profile])
+
+        if opts.colors and not opts.imports:
+            tx.set_colors(opts.colors)
+
+        if opts.font and not opts.imports:
+            tx.set_font(opts.font)
+
+        if opts.opacity != None:
+            opacity = round(opts.opacity, 2)
+            tx.set_opacity(opacity)
+
+        if opts.fade != None:
+            tx.fade(round(opts.fade * FADE_FPS))
+
+    if opts.imports:
+        # colors and fonts are applied by swapping the imported files
+        exception = ac.set_imported(opts.colors, opts.font)
         if exception != None:
             raise exception
 
-    if len([opt for opt, val in vars(opts).items() if val != None]) == 0:
+    if opts.save_profile:
+        save_requested_profile(opts)
+
+    if ac.runtime_error != None:
+        ac.revert_preview()
+        raise ac.runtime_error
+
+    if len([opt for opt in _edit_options if vars(opts)[opt] != None]) == 0:
+        # urwid is only imported when the TUI is actually launched
+        from aed.tui.alacritty_tui import Tui
+
         tui = Tui(ac)
 
 
@@ -1,6 +1,45 @@
-from .alacritty_container import (
-    ALACRITTY_CONFIG,
-    ALACRITTY_FONT_DIR,
-    ALACRITTY_COLOR_DIR,
-    AlacrittyContainer,
-)
+import importlib
+
+# Public names and the submodules defining them. Submodules are only imported when
+# one of their names is first accessed, so that light-weight users of the package
+# (e.g., the daemon client) do not pay for importing all of it.
+_exports = {
+    "ALACRITTY_CONFIG": "alacritty_container",
+    "ALACRITTY_FONT_DIR": "alacritty_container",
+    "ALACRITTY_COLOR_DIR": "alacritty_container",
+    "AlacrittyContainer": "alacritty_container",
+    "ThemeCache": "theme_cache",
+    "THEME_CACHE": "theme_cache",
+    "Applier": "appliers",
+    "FileApplier": "appliers",
+    "IpcApplier": "appliers",
+    "Transaction": "transaction",
+    "ALACRITTY_PROFILES": "profiles",
+    "load_profiles": "profiles",
+    "save_profile": "profiles",
+    "ValidationResult": "validate",
+    "validate_library": "validate",
+    "ThemePrefetcher": "prefetch",
+    "Profiler": "timing",
+    "TargetResult": "fanout",
+    "apply_to_targets": "fanout",
+    "THEME_BUNDLE": "bundle",
+    "ThemeBundle": "bundle",
+    "pack_library": "bundle",
+    "PALETTE_CACHE": "similar",
+    "PaletteIndex": "similar",
+    "ContrastScore": "contrast",
+}
+
+__all__ = list(_exports.keys())
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError("module {} has no attribute {}".format(__name__, name))
+    module = importlib.import_module("." + _exports[name], __name__)
+    return getattr(module, name)
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
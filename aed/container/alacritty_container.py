@@ -1,15 +1,34 @@
 import os
-from ruamel.yaml import YAML
+import io
+import copy
+import time
+import functools
 from glob import glob
-from typing import Union, List, Callable
+from typing import Union, List, Tuple, Callable
+from .write_behind import WriteBehind
+from .atomic_writer import AtomicWriter, atomic_write, atomic_symlink
+from .theme_cache import ThemeCache
+from .yaml_backend import get_backend
+from .yaml_patch import patch_block, patch_scalar, remove_block
+from .appliers import Applier, FileApplier
+from .transaction import Transaction
+from .fade import FADE_FPS
+from .profiles import ALACRITTY_PROFILES, load_profiles
+from .prefetch import ThemePrefetcher
+from .watch import make_watcher
+from .history import History, diff
+from .timing import timed, span
+from .bundle import ThemeBundle
+from .similar import PaletteIndex
+
+_missing = object()
 
 HOME = os.path.expanduser("~")
 ALACRITTY_CONFIG = os.path.join(HOME, ".config/alacritty/alacritty.yml")
 ALACRITTY_COLOR_DIR = os.path.join(HOME, ".config/alacritty/colors")
 ALACRITTY_FONT_DIR = os.path.join(HOME, ".config/alacritty/fonts")
-
-yaml = YAML(typ="safe")
-yaml.default_flow_style = False
+# managed files imported by the configuration in import mode, next to it
+AED_IMPORTS = {"colors": "aed-colors.yml", "font": "aed-font.yml"}
 
 
 class AlacrittyContainer(object):
@@ -114,6 +133,23 @@ class AlacrittyContainer(object):
                 y: 0
               builtin_box_drawing: true
             draw_bold_text_with_bright_colors: false
+
+    write_interval:
+        Minimum number of seconds between two consecutive writes of deferred
+        changes (see `set_opacity`) to `config_fn`. Deferred changes made within
+        this interval are coalesced into a single write.
+    history:
+        Undo/redo `History` of `config_fn`. Defaults to one kept in memory only;
+        pass `History(config_fn, HISTORY_JOURNAL)` to undo across runs.
+    bundle:
+        `ThemeBundle` (see `aed pack`) used as the theme source instead of
+        `color_dir` and `font_dir`
+    imports:
+        If True, named colors and fonts are applied in import mode, see
+        `set_imported`
+    palette_index:
+        `PaletteIndex` used to compare color themes and score their contrast.
+        Defaults to one kept in memory, created on first use.
     """
 
     _color_options = set(
@@ -152,16 +188,88 @@ class AlacrittyContainer(object):
         config_fn: str,
         color_dir: str = ALACRITTY_COLOR_DIR,
         font_dir: str = ALACRITTY_FONT_DIR,
+        write_interval: float = 0.25,
+        fsync: bool = False,
+        theme_cache: ThemeCache = None,
+        patch: bool = True,
+        runtime_applier: Applier = None,
+        history: History = None,
+        bundle: ThemeBundle = None,
+        imports: bool = False,
+        palette_index: PaletteIndex = None,
     ):
         self.config_fn = config_fn
+        self.history = history if history != None else History(config_fn)
+        self.bundle = bundle
+        self.imports = imports
+        config_dir = os.path.dirname(os.path.abspath(config_fn))
+        self.import_fns = {
+            kind: os.path.join(config_dir, fn) for kind, fn in AED_IMPORTS.items()
+        }
+        self._imports_ready = False
+        self._preview_imports = {}
+        self.theme_cache = theme_cache if theme_cache != None else ThemeCache()
+        self.config_writer = AtomicWriter(config_fn, fsync=fsync)
+        self.writer = WriteBehind(self.dump_current_alacritty_config, write_interval)
+        self.patch = patch
+        self._config_text = None
+        self._dirty_paths = set()
+        self.persistent_applier = FileApplier(self)
+        self.runtime_applier = runtime_applier
+        self._preview_snapshot = None
+        self._preview_text = None
+        self._preview_paths = set()
+        self._preview_written = False
+        self.runtime_error = None
+        self.prefetcher = None
+        self.palette_index = palette_index
+        self.watcher = None
+        self._watched = {}
         try:
-            self.alacritty_config = AlacrittyContainer.load_yaml(self.config_fn)
+            with span("load_config"):
+                with open(self.config_fn, "r") as stream:
+                    self._config_text = stream.read()
+                self.alacritty_config = get_backend().load(self._config_text)
+            self.config_writer.remember(self._config_text)
         except RuntimeError:
             print("Unable to load {}. Check file YAML validity.".format(self.config_fn))
-        self.colors = AlacrittyContainer.get_colors(color_dir)
-        self.fonts = AlacrittyContainer.get_fonts(font_dir)
+        self.color_dir = color_dir
+        self.font_dir = font_dir
+        self._colors = None
+        self._fonts = None
+
+    @property
+    def colors(self) -> dict[str, str]:
+        """Index of available color files, built from `color_dir` (or read from the
+        bundle) on first access
+        """
+        if self._colors == None and self.bundle != None:
+            self._colors = self.bundle.index("colors")
+        elif self._colors == None:
+            self._colors = AlacrittyContainer.get_colors(self.color_dir)
+        return self._colors
+
+    @colors.setter
+    def colors(self, colors: dict[str, str]):
+        self._colors = colors
+
+    @property
+    def fonts(self) -> dict[str, str]:
+        """Index of available font files, built from `font_dir` (or read from the
+        bundle) on first access
+        """
+        if self._fonts == None and self.bundle != None:
+            self._fonts = self.bundle.index("font")
+        elif self._fonts == None:
+            self._fonts = AlacrittyContainer.get_fonts(self.font_dir)
+        return self._fonts
+
+    @fonts.setter
+    def fonts(self, fonts: dict[str, str]):
+        self._fonts = fonts
 
     @staticmethod
+    @timed("get_colors")
     def get_colors(color_dir: str) -> dict[str, str]:
         """Grabs all color YAML filenames from the supplied `color_dir`
 
@@ -187,6 +295,7 @@ class AlacrittyContainer(object):
         return colors
 
     @staticmethod
+    @timed("get_fonts")
     def get_fonts(font_dir: str) -> dict[str, str]:
         """Grabs all color YAML filenames from the supplied `font_dir`
 
@@ -212,6 +321,7 @@ class AlacrittyContainer(object):
         return fonts
 
     @staticmethod
+    @timed("validate_colors")
     def _validate_colors(data: dict) -> Union[None, KeyError]:
         """Checks basic keys of proposed color options"""
         for key in data["colors"].keys():
@@ -222,6 +332,7 @@ class AlacrittyContainer(object):
         return None
 
     @staticmethod
+    @timed("validate_fonts")
     def _validate_fonts(data: dict) -> Union[None, KeyError]:
         """Checks basic keys of proposed font options"""
         for key in data["font"].keys():
@@ -232,27 +343,628 @@ class AlacrittyContainer(object):
         return None
 
     @staticmethod
+    @timed("load_yaml")
     def load_yaml(config_fn: str = ALACRITTY_CONFIG) -> dict:
+        """Parses a YAML file with the current YAML backend (see `get_backend`)"""
         with open(config_fn, "r") as stream:
-            config = yaml.load(stream)
+            config = get_backend().load(stream)
         return config
 
     @staticmethod
-    def dump_yaml(data: dict, config_fn: str = ALACRITTY_CONFIG):
-        with open(config_fn, "w") as stream:
-            yaml.dump(data, stream)
+    @timed("render_yaml")
+    def render_yaml(data: dict) -> str:
+        """Renders `data` as a YAML string"""
+        stream = io.StringIO()
+        get_backend().dump(data, stream)
+        return stream.getvalue()
+
+    @staticmethod
+    @timed("dump_yaml")
+    def dump_yaml(data: dict, config_fn: str = ALACRITTY_CONFIG, fsync: bool = False):
+        """Renders `data` in memory and atomically replaces `config_fn` with it"""
+        atomic_write(config_fn, AlacrittyContainer.render_yaml(data), fsync=fsync)
+
+    def _patched_config_text(self) -> Union[None, str]:
+        """Splices the changed parts of the configuration into its current text.
+        Returns None if any of them cannot be patched.
+        """
+        text = self._config_text
+        for path in sorted(self._dirty_paths):
+            if text == None:
+                return None
+            if path[0] not in self.alacritty_config:
+                if len(path) == 2:
+                    return None
+                text = remove_block(text, path[0])
+            elif len(path) == 2:
+                text = patch_scalar(
+                    text,
+                    path[0],
+                    path[1],
+                    self.alacritty_config[path[0]][path[1]],
+                    AlacrittyContainer.render_yaml,
+                )
+            else:
+                text = patch_block(
+                    text,
+                    path[0],
+                    self.alacritty_config[path[0]],
+                    AlacrittyContainer.render_yaml,
+                )
+        return text
+
+    @timed("dump_current_alacritty_config")
+    def dump_current_alacritty_config(self) -> bool:
+        """Dumps current Alacritty configuration to file. In patch mode, only the
+        changed blocks are rewritten. The write is skipped if the resulting text is
+        identical to the last written one.
+
+        Returns
+        -------
+        bool:
+            True if the file was written, False if the write was skipped
+        """
+        with self.writer.lock:
+            if self.config_writer.changed_externally():
+                # never clobber edits made outside of aed since the last write
+                self.reload_config()
+            text = None
+            if self.patch:
+                text = self._patched_config_text()
+            if text == None:
+                text = AlacrittyContainer.render_yaml(self.alacritty_config)
+            with span("write_config"):
+                written = self.config_writer.write(text)
+            self._config_text = text
+            self._dirty_paths.clear()
+        self.history.save()
+        return written
+
+    def flush(self):
+        """Immediately writes any deferred changes to file"""
+        self.writer.flush()
+
+    def reload_config(self) -> Union[None, BaseException]:
+        """Reloads the configuration file after it was edited outside of aed. Changes
+        that were not written yet (deferred or previewed) are merged on top of the
+        reloaded configuration, so that neither side is lost.
+
+        Returns
+        -------
+        None, BaseException
+            None if the file was reloaded, else the parsing exception, in which case
+            the loaded configuration is kept
+        """
+        with self.writer.lock:
+            try:
+                with open(self.config_fn, "r") as stream:
+                    text = stream.read()
+                config = get_backend().load(text)
+            except Exception as exception:
+                return exception
+            if not isinstance(config, dict):
+                config = {}
+            if self.previewing:
+                self._preview_snapshot = copy.deepcopy(config)
+                self._preview_text = text
+            for path in self._dirty_paths | self._preview_paths:
+                if len(path) == 2:
+                    if not isinstance(config.get(path[0]), dict):
+                        config[path[0]] = {}
+                    config[path[0]][path[1]] = self.alacritty_config[path[0]][path[1]]
+                else:
+                    config[path[0]] = self.alacritty_config[path[0]]
+            self.alacritty_config = config
+            self._config_text = text
+            self.config_writer.remember(text)
+            # the edit may have dropped the imports of import mode
+            self._imports_ready = False
+        return None
+
+    def watch(self, polling: bool = False):
+        """Starts watching the color and font directories and the configuration file
+        for changes, see `process_watch_events`
+
+        Parameters
+        ----------
+        polling:
+            If True, the portable polling watcher is used instead of inotify
+        """
+        if self.watcher != None:
+            return
+        self._watched = {
+            os.path.abspath(self.color_dir): "colors",
+            os.path.abspath(self.font_dir): "font",
+        }
+        config_dir = os.path.dirname(os.path.realpath(self.config_fn))
+        self.watcher = make_watcher(list(self._watched.keys()) + [config_dir], polling)
+
+    def unwatch(self):
+        """Stops watching, see `watch`"""
+        if self.watcher != None:
+            self.watcher.close()
+            self.watcher = None
+
+    def process_watch_events(self) -> set:
+        """Applies the changes reported by the watcher (see `watch`): the color and
+        font indexes are updated entry by entry, prefetched copies of modified themes
+        are dropped, and the configuration is reloaded if it was edited outside of aed
+
+        Returns
+        -------
+        changed:
+            Set of what changed among "colors", "font" and "config"
+        """
+        changed = set()
+        if self.watcher == None:
+            return changed
+        config_fn = os.path.realpath(self.config_fn)
+        for event in self.watcher.read_events():
+            if event.path == config_fn:
+                if self.config_writer.changed_externally():
+                    if self.reload_config() == None:
+                        changed.add("config")
+                continue
+            kind = self._watched.get(os.path.dirname(event.path))
+            if kind == None or not event.path.endswith(".yml"):
+                continue
+            name = os.path.splitext(os.path.basename(event.path))[0]
+            directory = self.color_dir if kind == "colors" else self.font_dir
+            theme_fn = os.path.join(directory, os.path.basename(event.path))
+            if self.prefetcher != None:
+                self.prefetcher.invalidate(theme_fn)
+            if self.palette_index != None:
+                self.palette_index.invalidate(theme_fn)
+            index = self._colors if kind == "colors" else self._fonts
+            if index == None or event.kind == "modified":
+                # unbuilt indexes are built from scratch on first access
+                changed.add(kind)
+                continue
+            if event.kind == "deleted":
+                index.pop(name, None)
+            elif name not in index:
+                index[name] = theme_fn
+                sorted_index = sorted(index.items(), key=lambda item: item[1])
+                index.clear()
+                index.update(sorted_index)
+            changed.add(kind)
+        return changed
+
+    def _write(self, paths: List[tuple], deferred: bool = False):
+        """Applies the changed `paths` (tuples of keys, e.g. `("window", "opacity")`)
+        of the configuration. Outside of a preview, they are handed to the persistent
+        applier, which writes immediately unless `deferred`. During a preview, they
+        are pushed to the runtime applier, falling back to a deferred file write if
+        there is none or if it fails.
+        """
+        if self.previewing:
+            self._preview_paths.update(paths)
+            if self.runtime_applier != None:
+                exception = self.runtime_applier.apply(self.alacritty_config, paths)
+                self.runtime_error = exception
+                if exception == None:
+                    return
+            deferred = True
+            self._preview_written = True
+        self.persistent_applier.apply(self.alacritty_config, paths, deferred)
+
+    @property
+    def previewing(self) -> bool:
+        """True between `begin_preview` and `commit_preview`/`revert_preview`"""
+        return self._preview_snapshot != None
+
+    def begin_preview(self):
+        """Starts a preview. Subsequent changes are applied through the runtime
+        applier only, until they are persisted with `commit_preview` or undone with
+        `revert_preview`.
+        """
+        if self.previewing:
+            return
+        self.flush()
+        self.runtime_error = None
+        with self.writer.lock:
+            self._preview_snapshot = copy.deepcopy(self.alacritty_config)
+            self._preview_text = self._config_text
+        self._preview_paths = set()
+        self._preview_written = False
+        self._preview_imports = {}
+
+    def commit_preview(self) -> Union[None, BaseException]:
+        """Persists all changes made since `begin_preview` and ends the preview"""
+        if not self.previewing:
+            return None
+        paths = self._preview_paths
+        ops = []
+        for path in sorted(paths):
+            old = self._preview_snapshot
+            new = self.alacritty_config
+            for key in path:
+                old = old.get(key, _missing) if isinstance(old, dict) else _missing
+                new = new.get(key, _missing) if isinstance(new, dict) else _missing
+            if old is _missing and new is not _missing:
+                ops.append({"p": list(path), "n": copy.deepcopy(new)})
+            elif new is _missing and old is not _missing:
+                ops.append({"p": list(path), "o": copy.deepcopy(old)})
+            elif old is not _missing:
+                ops += diff(old, new, path)
+        self.history.record(ops)
+        self._preview_snapshot = None
+        self._preview_paths = set()
+        self._preview_imports = {}
+        self.persistent_applier.apply(self.alacritty_config, paths)
+        if self.runtime_applier != None:
+            # the persisted file now holds the previewed state
+            return self.runtime_applier.reset()
+        return None
+
+    def revert_preview(self) -> Union[None, BaseException]:
+        """Restores the configuration from before `begin_preview` and ends the
+        preview
+        """
+        if not self.previewing:
+            return None
+        with self.writer.lock:
+            self.alacritty_config = self._preview_snapshot
+            self._preview_snapshot = None
+            self._preview_paths = set()
+            if self._preview_written:
+                # previews without a working runtime applier reached the file, which
+                # is restored to its original text
+                self._dirty_paths.clear()
+                self._config_text = self._preview_text
+                self.persistent_applier.apply(self.alacritty_config, [])
+        for kind, previous in self._preview_imports.items():
+            self._restore_import(kind, previous)
+        self._preview_imports = {}
+        if self.runtime_applier != None:
+            return self.runtime_applier.reset()
+        return None
+
+    def undo(self) -> Union[None, BaseException]:
+        """Reverts the last change (see `History`) and writes the configuration
+
+        Returns
+        -------
+        None, BaseException
+            None if a change was reverted, else an exception if there is nothing to
+            undo, if previewed changes are pending, or if the file was changed in the
+            meantime
+        """
+        return self._step_history(True)
+
+    def redo(self) -> Union[None, BaseException]:
+        """Re-applies the last undone change, see `undo`"""
+        return self._step_history(False)
+
+    def _step_history(self, undo: bool) -> Union[None, BaseException]:
+        with self.writer.lock:
+            if len(self._preview_paths) > 0:
+                return RuntimeError("Keep or revert the previewed changes first.")
+            keys = (self.history.undo if undo else self.history.redo)(
+                self.alacritty_config
+            )
+            if isinstance(keys, BaseException):
+                return keys
+            paths = set()
+            config = self.alacritty_config
+            for key in keys:
+                value = config.get(key[0])
+                if len(key) == 2 and isinstance(value, dict) and key[1] in value:
+                    if not isinstance(value[key[1]], (dict, list)):
+                        paths.add(tuple(key))
+                        continue
+                paths.add((key[0],))
+        # undone changes are persisted even while previewing
+        self.persistent_applier.apply(self.alacritty_config, sorted(paths))
+        if self.previewing:
+            with self.writer.lock:
+                self._preview_snapshot = copy.deepcopy(self.alacritty_config)
+                self._preview_text = self._config_text
+        return None
+
+    def _read_theme(
+        self, theme_fn: str, kind: str, save: bool = True
+    ) -> Tuple[dict, Union[None, BaseException]]:
+        """Loads and validates a color ("colors") or font ("font") file through the
+        theme cache, so that unchanged files are never re-parsed. Themes of the
+        bundle, if any, are decoded from it instead. If `save` is False, the theme
+        cache is not written, e.g. when many themes are read in a row.
+        """
+        if self.bundle != None and self.bundle.owns(theme_fn):
+            return self.bundle.load_fn(theme_fn)
+        validator = {
+            "colors": AlacrittyContainer._validate_colors,
+            "font": AlacrittyContainer._validate_fonts,
+        }[kind]
+        theme_map, exception = self.theme_cache.get(
+            theme_fn, kind, AlacrittyContainer.load_yaml, validator
+        )
+        if save:
+            self.theme_cache.save()
+        return theme_map, exception
+
+    def current_colors(self) -> dict:
+        """Color options in effect: those of the configuration or, if it imports the
+        managed color file of import mode (see `enable_imports`), those of that file
+        """
+        colors = self.alacritty_config.get("colors")
+        import_fn = self.import_fns["colors"]
+        imports = self.alacritty_config.get("import")
+        if colors == None and isinstance(imports, list) and import_fn in imports:
+            try:
+                colors = (AlacrittyContainer.load_yaml(import_fn) or {}).get("colors")
+            except Exception:
+                colors = None
+        return colors if isinstance(colors, dict) else {}
+
+    @timed("similar_colors")
+    def similar_colors(
+        self, k: int = None, colors: dict = None
+    ) -> List[Tuple[str, float]]:
+        """Ranks the color themes by perceptual distance to a palette, see
+        `PaletteIndex`. The palettes of new and modified themes are indexed first.
 
-    def dump_current_alacritty_config(self):
-        """Dumps current Alacritty configuration to file"""
-        AlacrittyContainer.dump_yaml(self.alacritty_config, self.config_fn)
+        Parameters
+        ----------
+        k:
+            Number of themes to return. Defaults to all comparable themes.
+        colors:
+            Alacritty color map to compare to. Defaults to `current_colors()`.
+
+        Returns
+        -------
+        ranking:
+            (name, distance) of the closest color themes, closest first
+        """
+        self._update_palettes()
+        if colors == None:
+            colors = self.current_colors()
+        return self.palette_index.nearest(colors, k)
+
+    @timed("contrast_scores")
+    def contrast_scores(self) -> dict:
+        """WCAG contrast scores of all color themes (see `ContrastScore`), by name.
+        Only new and modified themes are scored, in a single batch; the scores of
+        the other ones are read from the palette cache (see `PaletteIndex`).
+        """
+        self._update_palettes()
+        return self.palette_index.contrasts()
+
+    def contrast_score(self, color_key: str):
+        """WCAG contrast scores of a single color theme (see `ContrastScore`), or
+        None if it cannot be loaded. The caches are not written, see `save_caches`.
+        """
+        if self.palette_index == None:
+            self.palette_index = PaletteIndex()
+        return self.palette_index.contrast(
+            self.colors[color_key],
+            lambda theme_fn: self._read_theme(theme_fn, "colors", False),
+        )
+
+    def save_caches(self):
+        """Writes the theme and palette caches, if they changed"""
+        self.theme_cache.save()
+        if self.palette_index != None:
+            self.palette_index.save()
+
+    def _update_palettes(self):
+        """Indexes the palettes of new and modified color themes"""
+        if self.palette_index == None:
+            self.palette_index = PaletteIndex()
+        # while watching, modified themes are reported by the watcher and the
+        # other ones need not be checked again
+        self.palette_index.update(
+            self.colors,
+            lambda theme_fn: self._read_theme(theme_fn, "colors", False),
+            verify=self.watcher == None,
+        )
+        self.save_caches()
+
+    def _load_theme(
+        self, theme_fn: str, kind: str
+    ) -> Tuple[dict, Union[None, BaseException]]:
+        """Loads and validates a color ("colors") or font ("font") file, from the
+        prefetcher if it is enabled and else through the theme cache
+        """
+        if self.prefetcher != None:
+            return self.prefetcher.get(theme_fn, kind)
+        return self._read_theme(theme_fn, kind)
+
+    def enable_prefetch(self, max_workers: int = 2, capacity: int = 64):
+        """Enables a background `ThemePrefetcher`, see `prefetch_named`. The theme
+        cache is not written by the prefetched loads, but by `disable_prefetch`.
+        """
+        if self.prefetcher == None:
+            self.prefetcher = ThemePrefetcher(
+                functools.partial(self._read_theme, save=False), max_workers, capacity
+            )
+
+    def disable_prefetch(self):
+        """Stops the background `ThemePrefetcher`, if any, and writes the theme
+        cache
+        """
+        if self.prefetcher != None:
+            self.prefetcher.shutdown()
+            self.prefetcher = None
+            self.theme_cache.save()
+
+    def prefetch_named(self, kind: str, names: List[str]):
+        """Loads and validates the named color ("colors") or font ("font") files in
+        the background, if prefetching is enabled (see `enable_prefetch`)
+        """
+        if self.prefetcher == None:
+            return
+        index = self.colors if kind == "colors" else self.fonts
+        self.prefetcher.prefetch([index[name] for name in names if name in index], kind)
+
+    def transaction(self, deferred: bool = False) -> Transaction:
+        """Returns a `Transaction` that stages any number of changes, validates them
+        all up front and commits them with a single write
+
+        Parameters
+        ----------
+        deferred:
+            If True, the committed changes are written through the write-behind
+            scheduler (see `set_opacity`)
+        """
+        return Transaction(self, deferred)
+
+    def apply_profile(
+        self, name: str, profile_fn: str = None
+    ) -> Union[None, BaseException]:
+        """Applies the colors, font and opacity of a saved profile in a single
+        transaction
+
+        Parameters
+        ----------
+        name:
+            Name of the profile
+        profile_fn:
+            Path to the profiles YAML file. Defaults to `ALACRITTY_PROFILES`.
+
+        Returns
+        -------
+        None, BaseException
+            None if the whole profile was applied, else the exception of the
+            first invalid change, in which case nothing is applied
+        """
+        profiles = load_profiles(profile_fn or ALACRITTY_PROFILES)
+        if name not in profiles:
+            return KeyError("No profile named {}.".format(name))
+        return self.transaction().set_profile(profiles[name]).commit()
 
     def set_named_colors(self, color_key: str, *args):
         color_fn = self.colors[color_key]
-        self.set_colors(color_fn)
+        if self.imports:
+            return self.set_imported(colors=color_fn)
+        return self.set_colors(color_fn)
 
     def set_named_font(self, font_key: str, *args):
         font_fn = self.fonts[font_key]
-        self.set_font(font_fn)
+        if self.imports:
+            return self.set_imported(font=font_fn)
+        return self.set_font(font_fn)
+
+    def enable_imports(self) -> Union[None, BaseException]:
+        """Sets up import mode: makes the configuration import the managed color and
+        font files (see `import_fns`). Since options of the configuration itself
+        take precedence over imported ones, its `colors` and `font` blocks are moved
+        into the managed files, so that the look of Alacritty does not change. This
+        is done once: afterwards, the configuration already imports the managed
+        files and is left untouched.
+
+        Returns
+        -------
+        None, BaseException
+            None if import mode is set up, else an exception if previewed changes
+            are pending or if the `import` option of the configuration is not a list
+        """
+        if self.previewing:
+            return RuntimeError("Keep or revert the previewed changes first.")
+        paths = []
+        with self.writer.lock:
+            config = self.alacritty_config
+            imports = config.get("import")
+            if imports == None:
+                imports = []
+            if not isinstance(imports, list):
+                return TypeError(
+                    "The import option of {} is not a list.".format(self.config_fn)
+                )
+            listed = set(
+                os.path.abspath(os.path.expanduser(fn))
+                for fn in imports
+                if isinstance(fn, str)
+            )
+            for kind, import_fn in self.import_fns.items():
+                if kind in config or not os.path.lexists(import_fn):
+                    data = AlacrittyContainer.render_yaml({kind: config.get(kind, {})})
+                    atomic_write(import_fn, data, follow_symlinks=False)
+                if kind in config:
+                    del config[kind]
+                    paths.append((kind,))
+                if import_fn not in listed:
+                    imports.append(import_fn)
+                    paths.append(("import",))
+            config["import"] = imports
+        if len(paths) > 0:
+            self.persistent_applier.apply(self.alacritty_config, sorted(set(paths)))
+        self._imports_ready = True
+        return None
+
+    def set_imported(
+        self, colors: str = None, font: str = None
+    ) -> Union[None, BaseException]:
+        """Applies a color and/or font file in import mode: the managed file imported
+        by the configuration (see `enable_imports`, which is called first if needed)
+        is atomically replaced by a symlink to the theme file. The configuration is
+        neither parsed nor written, so the cost does not depend on its size. Themes
+        of a bundle, which cannot be linked to, are written to the managed file
+        instead.
+
+        Changes made during a preview are undone by `revert_preview`. Otherwise,
+        they are not recorded in the undo history.
+
+        Parameters
+        ----------
+        colors, font:
+            Paths to a color and a font YAML file, or None
+
+        Returns
+        -------
+        None, BaseException
+            None if the themes were applied, else the exception of the first invalid
+            one, in which case nothing is applied
+        """
+        if not self._imports_ready:
+            exception = self.enable_imports()
+            if exception != None:
+                return exception
+        themes = {}
+        for kind, theme_fn in (("colors", colors), ("font", font)):
+            if theme_fn == None:
+                continue
+            try:
+                theme_map, exception = self._load_theme(theme_fn, kind)
+            except Exception as error:
+                exception = error
+            if exception != None:
+                return exception
+            themes[kind] = (theme_fn, theme_map)
+        for kind, (theme_fn, theme_map) in themes.items():
+            import_fn = self.import_fns[kind]
+            if self.previewing and kind not in self._preview_imports:
+                self._preview_imports[kind] = self._current_import(kind)
+            with span("swap_import"):
+                if self.bundle != None and self.bundle.owns(theme_fn):
+                    data = AlacrittyContainer.render_yaml(theme_map)
+                    atomic_write(import_fn, data, follow_symlinks=False)
+                else:
+                    atomic_symlink(import_fn, os.path.abspath(theme_fn))
+        return None
+
+    def _current_import(self, kind: str) -> Union[None, str, bytes]:
+        """Target of the managed `kind` file if it is a symlink, else its contents
+        (None if it does not exist)
+        """
+        import_fn = self.import_fns[kind]
+        if os.path.islink(import_fn):
+            return os.readlink(import_fn)
+        try:
+            with open(import_fn, "rb") as stream:
+                return stream.read()
+        except FileNotFoundError:
+            return None
+
+    def _restore_import(self, kind: str, previous: Union[None, str, bytes]):
+        """Restores the managed `kind` file saved by `_current_import`"""
+        import_fn = self.import_fns[kind]
+        if isinstance(previous, str):
+            atomic_symlink(import_fn, previous)
+        elif isinstance(previous, bytes):
+            atomic_write(import_fn, previous, follow_symlinks=False)
+        elif os.path.lexists(import_fn):
+            os.unlink(import_fn)
 
     def set_colors(self, color_fn: str) -> Union[None, BaseException]:
         """Validates a propsed set of color options and, if successful, edits the
@@ -270,12 +982,22 @@ class AlacrittyContainer(object):
             If the proposed color option is valid, then it is immediately applied. Else,
             A `KeyError` is returned.
         """
-        color_map = AlacrittyContainer.load_yaml(color_fn)
-        exception = AlacrittyContainer._validate_colors(color_map)
-        if exception != None:
-            return exception
-        self.alacritty_config["colors"] = color_map["colors"]
-        self.dump_current_alacritty_config()
+        return self.transaction().set_colors(color_fn).commit()
+
+    def fade_colors(
+        self,
+        color_fn: str,
+        frames: int,
+        fps: float = FADE_FPS,
+        clock: Callable = time.monotonic,
+        sleep: Callable = time.sleep,
+    ) -> Union[None, BaseException]:
+        """Like `set_colors`, but cross-fades from the current colors to those of
+        `color_fn` over `frames` frames written at `fps` frames per second (see
+        `Transaction.fade`). Returns once the last frame is written.
+        """
+        tx = self.transaction().set_colors(color_fn)
+        return tx.fade(frames, fps, clock, sleep).commit()
 
     def set_font(self, font_fn: str) -> Union[None, BaseException]:
         """Validates a propsed set of font options and, if successful, edits the
@@ -294,16 +1016,9 @@ class AlacrittyContainer(object):
             A `KeyError` is returned.
         """
 
-        font_map = AlacrittyContainer.load_yaml(font_fn)
-        exception = AlacrittyContainer._validate_fonts(font_map)
+        exception = self.transaction().set_font(font_fn).commit()
         if exception != None:
             raise exception
-        self.alacritty_config["font"] = font_map["font"]
-        if "draw_bold_text_with_bright_colors" in list(font_map.keys()):
-            self.alacritty_config["draw_bold_text_with_bright_colors"] = font_map[
-                "draw_bold_text_with_bright_colors"
-            ]
-        self.dump_current_alacritty_config()
 
     @staticmethod
     def _validate_opacity(opacity: float) -> bool:
@@ -313,7 +1028,9 @@ class AlacrittyContainer(object):
         else:
             return None
 
-    def set_opacity(self, opacity: float) -> Union[None, BaseException]:
+    def set_opacity(
+        self, opacity: float, deferred: bool = False
+    ) -> Union[None, BaseException]:
         """Validates a propsed background window opacity and, if successful, edits the
         current, loaded Alacritty configuration. The updated configuration is then
         dumped.
@@ -323,6 +1040,11 @@ class AlacrittyContainer(object):
         opacity:
             Proposed background window opacity, which should be a float between 0.0
             and 1.0 inclusive.
+        deferred:
+            If True, the in-memory configuration is updated immediately but the dump
+            is handed to the write-behind scheduler, which coalesces rapid changes
+            into at most one write per `write_interval`. Call `flush` to force any
+            pending write.
 
         Returns
         -------
@@ -331,9 +1053,4 @@ class AlacrittyContainer(object):
             A `KeyError` is returned.
         """
 
-        exception = AlacrittyContainer._validate_opacity(opacity)
-        if exception != None:
-            return exception
-        else:
-            self.alacritty_config["window"]["opacity"] = opacity
-            self.dump_current_alacritty_config()
+        return self.transaction(deferred).set_opacity(opacity).commit()
@@ -0,0 +1,182 @@
+import os
+import json
+import socket
+from glob import glob
+from typing import Union, List
+
+ALACRITTY_SOCKET_ENV = "ALACRITTY_SOCKET"
+ALACRITTY_WINDOW_ID_ENV = "ALACRITTY_WINDOW_ID"
+
+
+class Applier(object):
+    """Base class for backends that apply changed parts of an Alacritty configuration.
+    Persistent appliers (e.g., `FileApplier`) store the configuration, while runtime
+    appliers (e.g., `IpcApplier`) only change running Alacritty instances.
+    """
+
+    persistent = False
+
+    def apply(
+        self, config: dict, paths: List[tuple], deferred: bool = False
+    ) -> Union[None, BaseException]:
+        """Applies the parts of `config` at `paths` (tuples of keys, e.g.
+        `("window", "opacity")`). Returns an exception if the change could not be
+        applied.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> Union[None, BaseException]:
+        """Drops all changes made by this applier that were not persisted"""
+        return None
+
+
+class FileApplier(Applier):
+    """Persistent applier that writes the configuration of an `AlacrittyContainer` to
+    its configuration file, through the container's write-behind scheduler
+
+    Parameters
+    ----------
+    container:
+        `AlacrittyContainer` whose configuration file is written
+    """
+
+    persistent = True
+
+    def __init__(self, container):
+        self.container = container
+
+    def apply(
+        self, config: dict, paths: List[tuple], deferred: bool = False
+    ) -> Union[None, BaseException]:
+        writer = self.container.writer
+        with writer.lock:
+            self.container._dirty_paths.update(paths)
+        writer.schedule()
+        if not deferred:
+            writer.flush()
+        return None
+
+
+def _ipc_value(value) -> str:
+    """Formats a configuration value for an IPC config option. JSON scalars and arrays
+    are valid YAML flow values, which Alacritty parses the option values as.
+    """
+    return json.dumps(value)
+
+
+def ipc_options(config: dict, paths: List[tuple]) -> List[str]:
+    """Flattens the parts of `config` at `paths` into `key.subkey=value` options, as
+    accepted by `alacritty msg config`
+
+    Parameters
+    ----------
+    config:
+        Alacritty configuration
+    paths:
+        Tuples of keys, e.g. `("colors",)` or `("window", "opacity")`
+
+    Returns
+    -------
+    options:
+        List of options, one for each leaf value
+    """
+
+    options = []
+
+    def flatten(prefix, value):
+        if isinstance(value, dict):
+            for key, sub_value in value.items():
+                flatten(prefix + [str(key)], sub_value)
+        else:
+            options.append("{}={}".format(".".join(prefix), _ipc_value(value)))
+
+    for path in sorted(paths):
+        value = config
+        for key in path:
+            value = value[key]
+        flatten(list(path), value)
+    return options
+
+
+def find_sockets() -> List[str]:
+    """Returns the IPC sockets of all running Alacritty instances. The socket in
+    `$ALACRITTY_SOCKET` (i.e., of the instance aed runs in) comes first.
+    """
+    sockets = []
+    if os.environ.get(ALACRITTY_SOCKET_ENV):
+        sockets.append(os.environ[ALACRITTY_SOCKET_ENV])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    for fn in sorted(glob(os.path.join(runtime_dir, "Alacritty-*.sock"))):
+        if fn not in sockets:
+            sockets.append(fn)
+    return sockets
+
+
+class IpcApplier(Applier):
+    """Runtime applier that pushes changes to running Alacritty instances over their
+    IPC sockets, like `alacritty msg config`. Changes are not persisted and can be
+    dropped with `reset`.
+
+    Parameters
+    ----------
+    scope:
+        "window" to only change the window aed runs in (identified by
+        `$ALACRITTY_WINDOW_ID` and `$ALACRITTY_SOCKET`), or "global" to change all
+        windows of all running Alacritty instances
+    sockets:
+        Socket paths to use instead of the discovered ones (see `find_sockets`)
+    timeout:
+        Socket timeout, in seconds
+    """
+
+    def __init__(
+        self, scope: str = "global", sockets: List[str] = None, timeout: float = 1.0
+    ):
+        if scope not in ("window", "global"):
+            raise ValueError("{} is not a valid IPC scope.".format(scope))
+        self.scope = scope
+        self.sockets = sockets
+        self.timeout = timeout
+
+    def _targets(self) -> Union[List[tuple], BaseException]:
+        """(socket, window_id) pairs to send messages to"""
+        sockets = self.sockets if self.sockets != None else find_sockets()
+        if len(sockets) == 0:
+            return ConnectionError("No Alacritty IPC socket found.")
+        if self.scope == "global":
+            return [(fn, -1) for fn in sockets]
+        window_id = os.environ.get(ALACRITTY_WINDOW_ID_ENV)
+        if window_id == None:
+            return ConnectionError(
+                "${} is not set. Is aed running in Alacritty?".format(
+                    ALACRITTY_WINDOW_ID_ENV
+                )
+            )
+        return [(sockets[0], int(window_id))]
+
+    def _send(self, options: List[str], reset: bool) -> Union[None, BaseException]:
+        targets = self._targets()
+        if isinstance(targets, BaseException):
+            return targets
+        for socket_fn, window_id in targets:
+            message = {
+                "Config": {"options": options, "window_id": window_id, "reset": reset}
+            }
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(self.timeout)
+                    sock.connect(socket_fn)
+                    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+            except OSError as exception:
+                return ConnectionError(
+                    "Unable to reach Alacritty at {}: {}".format(socket_fn, exception)
+                )
+        return None
+
+    def apply(
+        self, config: dict, paths: List[tuple], deferred: bool = False
+    ) -> Union[None, BaseException]:
+        return self._send(ipc_options(config, paths), reset=False)
+
+    def reset(self) -> Union[None, BaseException]:
+        return self._send([], reset=True)
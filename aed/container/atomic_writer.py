@@ -0,0 +1,179 @@
+import os
+import hashlib
+import tempfile
+from typing import Union
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def atomic_write(
+    fn: str, data: Union[str, bytes], fsync: bool = False, follow_symlinks: bool = True
+):
+    """Writes `data` to a temporary file in the same directory as `fn` and atomically
+    renames it into place, so that readers never observe a partially written file.
+    If `fn` is a symlink, its target is replaced and the link is left intact, unless
+    `follow_symlinks` is False, in which case the link itself is replaced.
+
+    Parameters
+    ----------
+    fn:
+        Path of the file to (over)write
+    data:
+        String or bytes to be written
+    fsync:
+        If True, the temporary file and its directory are fsync'ed so that the new
+        contents survive a crash
+    follow_symlinks:
+        If False and `fn` is a symlink, the link is replaced by a regular file
+    """
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    fn = os.path.realpath(fn) if follow_symlinks else os.path.abspath(fn)
+    directory = os.path.dirname(fn)
+    fd, tmp_fn = tempfile.mkstemp(
+        dir=directory, prefix=".{}.".format(os.path.basename(fn)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(data)
+            stream.flush()
+            if fsync:
+                os.fsync(stream.fileno())
+        try:
+            os.chmod(tmp_fn, os.stat(fn).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_fn, fn)
+    except BaseException:
+        try:
+            os.unlink(tmp_fn)
+        except FileNotFoundError:
+            pass
+        raise
+    if fsync:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_symlink(link_fn: str, target: str):
+    """Points the symlink `link_fn` at `target`, atomically replacing whatever
+    `link_fn` was (a symlink or a regular file), so that readers always find either
+    the old or the new target
+
+    Parameters
+    ----------
+    link_fn:
+        Path of the symlink to (re)place
+    target:
+        Path the symlink points to
+    """
+
+    directory = os.path.dirname(os.path.abspath(link_fn))
+    tmp_fn = tempfile.mktemp(
+        dir=directory, prefix=".{}.".format(os.path.basename(link_fn)), suffix=".tmp"
+    )
+    # mktemp only picks the name, creating the link fails if it was taken since
+    os.symlink(target, tmp_fn)
+    try:
+        os.replace(tmp_fn, link_fn)
+    except BaseException:
+        os.unlink(tmp_fn)
+        raise
+
+
+class AtomicWriter(object):
+    """Change-detecting, atomic file writer. The content hash of the last written (or
+    initially present) state is remembered and writes of identical content are
+    skipped.
+
+    Parameters
+    ----------
+    fn:
+        Path of the file managed by the writer
+    fsync:
+        If True, every write is fsync'ed (see `atomic_write`)
+    """
+
+    def __init__(self, fn: str, fsync: bool = False):
+        self.fn = fn
+        self.fsync = fsync
+        self.digest = None
+        self.stat = None
+        self.bytes_written = 0
+        self.writes = 0
+        self.skipped = 0
+
+    def _stat(self) -> Union[None, tuple]:
+        try:
+            stat = os.stat(self.fn)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _current_digest(self) -> Union[None, str]:
+        if self.digest == None:
+            try:
+                with open(self.fn, "rb") as stream:
+                    self.digest = _digest(stream.read())
+                self.stat = self._stat()
+            except FileNotFoundError:
+                pass
+        return self.digest
+
+    def remember(self, data: Union[str, bytes]):
+        """Records `data` as the current contents of the file, e.g. after reading it"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.digest = _digest(data)
+        self.stat = self._stat()
+
+    def changed_externally(self) -> bool:
+        """Checks whether the file was modified by another program since it was last
+        written or remembered. The file is only read (and hashed) if its modification
+        time, size or inode changed, so that touching it is not mistaken for an edit.
+        """
+        stat = self._stat()
+        if self.digest == None or stat == self.stat:
+            return False
+        try:
+            with open(self.fn, "rb") as stream:
+                digest = _digest(stream.read())
+        except FileNotFoundError:
+            return False
+        if digest == self.digest:
+            self.stat = stat
+            return False
+        return True
+
+    def write(self, data: Union[str, bytes]) -> bool:
+        """Writes `data` to file unless it is identical to the last known contents
+
+        Parameters
+        ----------
+        data:
+            String or bytes to be written
+
+        Returns
+        -------
+        bool:
+            True if the file was written, False if the write was skipped
+        """
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = _digest(data)
+        if digest == self._current_digest():
+            self.skipped += 1
+            return False
+        atomic_write(self.fn, data, fsync=self.fsync)
+        self.digest = digest
+        self.stat = self._stat()
+        self.bytes_written += len(data)
+        self.writes += 1
+        return True
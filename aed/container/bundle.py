@@ -0,0 +1,152 @@
+import os
+import json
+import mmap
+import struct
+from glob import glob
+from typing import Union, List, Tuple
+from .atomic_writer import atomic_write
+from .theme_cache import AED_CACHE_DIR, _exceptions
+
+THEME_BUNDLE = os.path.join(AED_CACHE_DIR, "themes.aedpack")
+
+# File layout: magic, little-endian uint32 length of the JSON index, the index, and
+# the payloads (compact JSON of each parsed theme file) at the offsets listed in the
+# index, relative to the end of the index.
+_magic = b"AEDPACK1"
+_length = struct.Struct("<I")
+
+
+def pack_library(
+    color_dir: str, font_dir: str, bundle_fn: str = THEME_BUNDLE
+) -> List[Tuple[str, str]]:
+    """Compiles all color and font files into a single bundle (see `ThemeBundle`).
+    Themes are parsed and validated once here, so that reading them from the bundle
+    only costs decoding their payload.
+
+    Parameters
+    ----------
+    color_dir:
+        Directory containing color YAML (.yml) files
+    font_dir:
+        Directory containing font YAML (.yml) files
+    bundle_fn:
+        Path of the bundle to (over)write
+
+    Returns
+    -------
+    skipped:
+        (path, error message) of the files that could not be parsed and were left
+        out of the bundle
+    """
+
+    from .alacritty_container import AlacrittyContainer
+
+    validators = {
+        "colors": AlacrittyContainer._validate_colors,
+        "font": AlacrittyContainer._validate_fonts,
+    }
+    index = {"colors": [], "font": []}
+    payloads = []
+    offset = 0
+    skipped = []
+    for kind, directory in (("colors", color_dir), ("font", font_dir)):
+        for fn in sorted(glob("{}/*.yml".format(directory))):
+            try:
+                data = AlacrittyContainer.load_yaml(fn)
+                exception = validators[kind](data)
+            except Exception as error:
+                skipped.append((fn, str(error).replace("\n", " ")))
+                continue
+            error = None
+            if exception != None:
+                error = [type(exception).__name__, str(exception.args[0])]
+            payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            name = os.path.splitext(os.path.basename(fn))[0]
+            index[kind].append([name, offset, len(payload), error])
+            payloads.append(payload)
+            offset += len(payload)
+    header = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(bundle_fn)), exist_ok=True)
+    atomic_write(
+        bundle_fn, b"".join([_magic, _length.pack(len(header)), header] + payloads)
+    )
+    return skipped
+
+
+class ThemeBundle(object):
+    """Read-only theme source backed by a bundle written by `pack_library`. The bundle
+    is memory-mapped: listing themes only reads its index, and loading a theme only
+    decodes its own slice of the file.
+
+    Themes are addressed by pseudo-paths (see `theme_fn`), so that a bundle can stand
+    in for the color and font directories of an `AlacrittyContainer`.
+
+    Parameters
+    ----------
+    bundle_fn:
+        Path to the bundle
+    """
+
+    def __init__(self, bundle_fn: str = THEME_BUNDLE):
+        self.bundle_fn = bundle_fn
+        self.prefix = "{}#".format(os.path.abspath(bundle_fn))
+        with open(bundle_fn, "rb") as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        start = len(_magic) + _length.size
+        if self._map[: len(_magic)] != _magic:
+            self._map.close()
+            raise ValueError("{} is not an aed theme bundle.".format(bundle_fn))
+        (length,) = _length.unpack(self._map[len(_magic) : start])
+        index = json.loads(self._map[start : start + length].decode("utf-8"))
+        self._base = start + length
+        self._index = {
+            kind: {entry[0]: entry[1:] for entry in entries}
+            for kind, entries in index.items()
+        }
+
+    def names(self, kind: str) -> List[str]:
+        """Names of the color ("colors") or font ("font") themes, in file order"""
+        return list(self._index[kind].keys())
+
+    def theme_fn(self, name: str, kind: str) -> str:
+        """Pseudo-path of a theme, e.g. `/path/themes.aedpack#colors/dark`"""
+        return "{}{}/{}".format(self.prefix, kind, name)
+
+    def index(self, kind: str) -> dict[str, str]:
+        """Dictionary of theme names and pseudo-paths, like
+        `AlacrittyContainer.get_colors`
+        """
+        return {name: self.theme_fn(name, kind) for name in self._index[kind]}
+
+    def owns(self, theme_fn: str) -> bool:
+        """True if `theme_fn` is a pseudo-path of this bundle"""
+        return theme_fn.startswith(self.prefix)
+
+    def load(self, name: str, kind: str) -> Tuple[dict, Union[None, BaseException]]:
+        """Decodes a theme
+
+        Returns
+        -------
+        data:
+            Parsed theme dictionary, a new copy on every call
+        exception:
+            None if the theme is valid, else its validation exception
+        """
+        entry = self._index[kind].get(name)
+        if entry == None:
+            raise FileNotFoundError(self.theme_fn(name, kind))
+        offset, length, error = entry
+        start = self._base + offset
+        data = json.loads(self._map[start : start + length].decode("utf-8"))
+        exception = None
+        if error != None:
+            exception = _exceptions.get(error[0], RuntimeError)(error[1])
+        return data, exception
+
+    def load_fn(self, theme_fn: str) -> Tuple[dict, Union[None, BaseException]]:
+        """Decodes the theme with the pseudo-path `theme_fn`, see `load`"""
+        kind, name = theme_fn[len(self.prefix) :].split("/", 1)
+        return self.load(name, kind)
+
+    def close(self):
+        self._map.close()
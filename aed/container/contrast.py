@@ -0,0 +1,111 @@
+from collections import namedtuple
+from functools import lru_cache
+from typing import Union, List
+from .similar import PALETTE_KEYS, parse_hex, _linear
+
+ContrastScore = namedtuple("ContrastScore", ["primary", "ansi"])
+ContrastScore.__doc__ = """WCAG contrast ratios (from 1 to 21) of a color theme
+against its primary background: `primary` for the primary foreground, and `ansi`
+for the least readable of the chromatic normal and bright colors (red, green,
+yellow, blue, magenta and cyan). Black and white are left out, since one of them is
+meant to blend with the background. Either is None if the colors involved are
+missing or not hex values."""
+
+# WCAG 2 recommends at least 4.5 for body text (level AA) and 7 for level AAA
+WCAG_AA = 4.5
+WCAG_AAA = 7.0
+
+_background = PALETTE_KEYS.index(("primary", "background"))
+_foreground = PALETTE_KEYS.index(("primary", "foreground"))
+_chromatic = [
+    i
+    for i, (group, name) in enumerate(PALETTE_KEYS)
+    if group in ("normal", "bright") and name not in ("black", "white")
+]
+
+
+@lru_cache(maxsize=4096)
+def relative_luminance(value: str) -> Union[None, float]:
+    """WCAG relative luminance (from 0 for black to 1 for white) of an Alacritty
+    color value, or None if `value` is not a hex color
+    """
+    rgb = parse_hex(value)
+    if rgb == None:
+        return None
+    r, g, b = (_linear(channel) for channel in rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def luminances(colors: dict) -> List[Union[None, float]]:
+    """Relative luminances of the compared colors (see `PALETTE_KEYS`) of an
+    Alacritty color map, with None for the colors that are missing or not hex values
+    """
+    values = []
+    for group, name in PALETTE_KEYS:
+        value = (colors or {}).get(group)
+        value = value.get(name) if isinstance(value, dict) else None
+        values.append(relative_luminance(value) if isinstance(value, str) else None)
+    return values
+
+
+def contrast_scores(rows: List[list], numpy=None) -> List[ContrastScore]:
+    """Scores many themes at once
+
+    Parameters
+    ----------
+    rows:
+        Luminances of the themes, see `luminances`
+    numpy:
+        numpy module, in which case the ratios of all themes are computed with
+        array operations. Otherwise, they are computed in pure Python, with the
+        same results.
+
+    Returns
+    -------
+    scores:
+        One `ContrastScore` per row
+    """
+    if len(rows) == 0:
+        return []
+    if numpy != None:
+        np = numpy
+        values = np.array(
+            [[np.nan if value == None else value for value in row] for row in rows]
+        )
+        background = values[:, _background : _background + 1]
+        lighter = np.fmax(values, background)
+        darker = np.fmin(values, background)
+        # nan wherever the color or the background is missing
+        ratios = (lighter + 0.05) / (darker + 0.05)
+        ratios[np.isnan(values) | np.isnan(background)] = np.nan
+        chromatic = ratios[:, _chromatic]
+        defined = ~np.isnan(chromatic)
+        worst = np.where(defined, chromatic, np.inf).min(axis=1)
+        scores = []
+        for primary, ansi, any_defined in zip(
+            ratios[:, _foreground].tolist(), worst.tolist(), defined.any(axis=1)
+        ):
+            scores.append(
+                ContrastScore(
+                    None if primary != primary else primary,
+                    ansi if any_defined else None,
+                )
+            )
+        return scores
+    scores = []
+    for row in rows:
+        background = row[_background]
+        ratios = []
+        for value in row:
+            if value == None or background == None:
+                ratios.append(None)
+            else:
+                lighter, darker = max(value, background), min(value, background)
+                ratios.append((lighter + 0.05) / (darker + 0.05))
+        chromatic = [ratios[i] for i in _chromatic if ratios[i] != None]
+        scores.append(
+            ContrastScore(
+                ratios[_foreground], min(chromatic) if len(chromatic) > 0 else None
+            )
+        )
+    return scores
@@ -0,0 +1,101 @@
+import copy
+import time
+from typing import List, Callable
+from .similar import parse_hex
+
+# frame rate of fades, in frames per second
+FADE_FPS = 30.0
+
+
+def _hex_pairs(start, end, path: tuple, pairs: list):
+    """Collects the (path, start rgb, end rgb) of the hex colors set in both `start`
+    and `end`, walking dictionaries by key and lists of equal length by index
+    """
+    if isinstance(end, dict) and isinstance(start, dict):
+        for key, value in end.items():
+            if key in start:
+                _hex_pairs(start[key], value, path + (key,), pairs)
+    elif isinstance(end, list) and isinstance(start, list):
+        if len(end) == len(start):
+            for i, (old, new) in enumerate(zip(start, end)):
+                _hex_pairs(old, new, path + (i,), pairs)
+    elif isinstance(end, str) and isinstance(start, str):
+        old, new = parse_hex(start), parse_hex(end)
+        if old != None and new != None and old != new:
+            pairs.append((path, old, new))
+
+
+def interpolate_palettes(start: dict, end: dict, frames: int) -> List[dict]:
+    """Precomputes the frames of a cross-fade between two Alacritty color maps.
+    Every hex color defined in both maps is linearly interpolated; all other values
+    (e.g., 'CellBackground', or colors missing from `start`) take their value in
+    `end` from the first frame on.
+
+    Parameters
+    ----------
+    start, end:
+        Color maps, e.g. `alacritty_config["colors"]` and the colors of a theme
+    frames:
+        Number of frames, at least 1
+
+    Returns
+    -------
+    palettes:
+        `frames` color maps, the last of which is equal to `end`
+    """
+    pairs = []
+    _hex_pairs(start or {}, end, (), pairs)
+    palettes = []
+    for frame in range(1, frames + 1):
+        t = frame / frames
+        palette = copy.deepcopy(end)
+        for path, old, new in pairs:
+            parent = palette
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = "#{:02x}{:02x}{:02x}".format(
+                *(round(a + (b - a) * t) for a, b in zip(old, new))
+            )
+        palettes.append(palette)
+    return palettes
+
+
+def play_frames(
+    write: Callable,
+    palettes: List[dict],
+    fps: float = FADE_FPS,
+    clock: Callable = time.monotonic,
+    sleep: Callable = time.sleep,
+) -> int:
+    """Writes frames at a fixed rate. Frame `i` is due `i / fps` seconds after the
+    first one, and frames whose due time passed while an earlier frame was written
+    are dropped, so that slow writes shorten the fade instead of piling up. Returns
+    once the frame following the last one is due.
+
+    Parameters
+    ----------
+    write:
+        Function applying a single frame
+    palettes:
+        Frames to write, see `interpolate_palettes`
+    fps:
+        Maximum number of frames per second
+
+    Returns
+    -------
+    written:
+        Number of frames that were written
+    """
+    period = 1.0 / fps
+    start = clock()
+    written = 0
+    i = 0
+    while i < len(palettes):
+        write(palettes[i])
+        written += 1
+        # the next frame is the latest one that is due, if any is late
+        i = max(i + 1, int((clock() - start) / period))
+        delay = start + i * period - clock()
+        if delay > 0:
+            sleep(delay)
+    return written
@@ -0,0 +1,154 @@
+import os
+import time
+from glob import glob, has_magic
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, List
+from .alacritty_container import (
+    AlacrittyContainer,
+    ALACRITTY_COLOR_DIR,
+    ALACRITTY_FONT_DIR,
+)
+from .theme_cache import ThemeCache
+from .history import History
+
+TargetResult = namedtuple("TargetResult", ["fn", "error", "written", "seconds"])
+TargetResult.__doc__ = """Result of applying changes to a single configuration file.
+`error` is None on success, `written` tells whether the file was actually written
+(it is not if it already had the requested options), and `seconds` is the time
+spent on the target."""
+
+
+def expand_targets(patterns: List[str]) -> List[str]:
+    """Expands `~` and glob patterns into a list of configuration files. Files that
+    are matched more than once (e.g., through symlinks) are only listed once.
+    Patterns without wildcards are kept even if the file does not exist, so that
+    they are reported as failed targets.
+    """
+    targets = []
+    seen = set()
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        fns = sorted(glob(pattern)) if has_magic(pattern) else [pattern]
+        for fn in fns:
+            key = os.path.realpath(fn)
+            if key not in seen:
+                seen.add(key)
+                targets.append(fn)
+    return targets
+
+
+def _apply_target(
+    config_fn: str,
+    changes: dict,
+    color_dir: str,
+    font_dir: str,
+    theme_cache: ThemeCache,
+    journal_fn: str,
+) -> TargetResult:
+    start = time.perf_counter()
+    written = False
+    try:
+        container = AlacrittyContainer(
+            config_fn,
+            color_dir,
+            font_dir,
+            theme_cache=theme_cache,
+            history=History(config_fn, journal_fn),
+        )
+        tx = container.transaction()
+        if changes.get("colors") != None:
+            tx.set_colors(changes["colors"])
+        if changes.get("font") != None:
+            tx.set_font(changes["font"])
+        if changes.get("opacity") != None:
+            tx.set_opacity(changes["opacity"])
+        error = tx.commit()
+        written = container.config_writer.writes > 0
+    except Exception as exception:
+        error = exception
+    return TargetResult(config_fn, error, written, time.perf_counter() - start)
+
+
+def apply_to_targets(
+    config_fns: List[str],
+    colors: str = None,
+    font: str = None,
+    opacity: float = None,
+    color_dir: str = ALACRITTY_COLOR_DIR,
+    font_dir: str = ALACRITTY_FONT_DIR,
+    workers: int = None,
+    theme_cache: ThemeCache = None,
+    journal_fn: str = None,
+) -> Union[List[TargetResult], BaseException]:
+    """Applies the same colors, font and/or opacity to many configuration files. The
+    themes are parsed and validated once, then all targets are patched and written
+    concurrently, each in its own transaction (see `AlacrittyContainer.transaction`).
+
+    Parameters
+    ----------
+    config_fns:
+        Paths to the configuration files, see `expand_targets`
+    colors, font:
+        Paths to a color and a font YAML file, or None
+    opacity:
+        New window opacity, or None
+    color_dir, font_dir:
+        Theme directories of the targets
+    workers:
+        Number of threads. Defaults to one per target, up to 32.
+    theme_cache:
+        Theme cache shared by all targets. Defaults to one kept in memory.
+    journal_fn:
+        Undo journal in which the changes of every target are recorded (see
+        `History`), or None to not record them
+
+    Returns
+    -------
+    results, BaseException:
+        One `TargetResult` per target, in the order of `config_fns`, or the
+        validation exception of an invalid theme or opacity, in which case no target
+        is changed
+    """
+    theme_cache = theme_cache if theme_cache != None else ThemeCache()
+    if opacity != None:
+        exception = AlacrittyContainer._validate_opacity(opacity)
+        if exception != None:
+            return exception
+    validators = {
+        "colors": AlacrittyContainer._validate_colors,
+        "font": AlacrittyContainer._validate_fonts,
+    }
+    changes = {"colors": colors, "font": font, "opacity": opacity}
+    for kind in ("colors", "font"):
+        if changes[kind] == None:
+            continue
+        # parsed once here, then served to every target by the shared cache
+        changes[kind] = os.path.abspath(os.path.expanduser(changes[kind]))
+        try:
+            _, exception = theme_cache.get(
+                changes[kind], kind, AlacrittyContainer.load_yaml, validators[kind]
+            )
+        except Exception as error:
+            exception = error
+        if exception != None:
+            return exception
+    theme_cache.save()
+
+    if len(config_fns) == 0:
+        return []
+    workers = workers or min(32, len(config_fns))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _apply_target,
+                fn,
+                changes,
+                color_dir,
+                font_dir,
+                theme_cache,
+                journal_fn,
+            )
+            for fn in config_fns
+        ]
+        return [future.result() for future in futures]
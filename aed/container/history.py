@@ -0,0 +1,239 @@
+import os
+import copy
+import json
+import threading
+from collections import deque
+from typing import Union, List
+from .atomic_writer import atomic_write
+
+HOME = os.path.expanduser("~")
+XDG_STATE_HOME = os.environ.get("XDG_STATE_HOME") or os.path.join(HOME, ".local/state")
+AED_STATE_DIR = os.path.join(XDG_STATE_HOME, "aed")
+HISTORY_JOURNAL = os.path.join(AED_STATE_DIR, "history.json")
+
+# serializes the read-modify-write of journals shared by several histories
+_journal_lock = threading.Lock()
+
+
+def diff(old, new, path: tuple = ()) -> List[dict]:
+    """Structural diff of two configuration subtrees. Dictionaries are compared key by
+    key, so that only the values that actually differ are recorded.
+
+    Parameters
+    ----------
+    old, new:
+        Subtrees before and after the change
+    path:
+        Keys leading to the subtrees in the configuration
+
+    Returns
+    -------
+    ops:
+        List of operations `{"p": keys, "o": old value, "n": new value}`. "o" (resp.
+        "n") is left out if the key did not exist before (resp. after) the change.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in list(old.keys()) + [key for key in new.keys() if key not in old]:
+            if key not in new:
+                ops.append({"p": list(path) + [key], "o": copy.deepcopy(old[key])})
+            elif key not in old:
+                ops.append({"p": list(path) + [key], "n": copy.deepcopy(new[key])})
+            else:
+                ops += diff(old[key], new[key], path + (key,))
+        return ops
+    if old == new and type(old) == type(new):
+        return []
+    return [{"p": list(path), "o": copy.deepcopy(old), "n": copy.deepcopy(new)}]
+
+
+def _get(config: dict, path: list):
+    """Returns (found, value) of the value at `path`"""
+    for key in path:
+        if not isinstance(config, dict) or key not in config:
+            return False, None
+        config = config[key]
+    return True, config
+
+
+def apply_ops(config: dict, ops: List[dict], reverse: bool = False) -> bool:
+    """Applies the operations of a `diff` to `config`, or reverts them if `reverse`.
+    Nothing is changed unless the configuration still holds the values the
+    operations start from.
+
+    Returns
+    -------
+    bool:
+        True if the operations were applied, False if they do not match `config`
+    """
+    source, target = ("n", "o") if reverse else ("o", "n")
+    for op in ops:
+        found, value = _get(config, op["p"])
+        if found != (source in op) or (found and value != op[source]):
+            return False
+    if reverse:
+        ops = list(reversed(ops))
+    for op in ops:
+        parent = config
+        for key in op["p"][:-1]:
+            if not isinstance(parent.get(key), dict):
+                parent[key] = {}
+            parent = parent[key]
+        if target in op:
+            parent[op["p"][-1]] = copy.deepcopy(op[target])
+        else:
+            del parent[op["p"][-1]]
+    return True
+
+
+class History(object):
+    """Bounded undo/redo history of a configuration file, stored as structural diffs
+    (see `diff`) and persisted in a small JSON journal, so that undoing works across
+    runs
+
+    Parameters
+    ----------
+    config_fn:
+        Path to the configuration file whose history is kept
+    journal_fn:
+        Path to the JSON journal, e.g. `HISTORY_JOURNAL`
+        (`$XDG_STATE_HOME/aed/history.json`, as used by the `aed` command). If None
+        (the default), the history is kept in memory only.
+    capacity:
+        Maximum number of undoable changes
+    """
+
+    def __init__(
+        self,
+        config_fn: str,
+        journal_fn: str = None,
+        capacity: int = 100,
+    ):
+        self.key = os.path.realpath(config_fn)
+        self.journal_fn = journal_fn
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        self._undo = None
+        self._redo = None
+        self._coalesce = False
+        self._dirty = False
+
+    def _load(self):
+        if self._undo != None:
+            return
+        entry = {}
+        if self.journal_fn != None:
+            try:
+                with open(self.journal_fn, "r") as stream:
+                    entry = json.load(stream).get(self.key) or {}
+            except (OSError, ValueError, AttributeError):
+                entry = {}
+        self._undo = deque(entry.get("undo") or [], maxlen=self.capacity)
+        self._redo = deque(entry.get("redo") or [], maxlen=self.capacity)
+
+    @property
+    def can_undo(self) -> bool:
+        with self.lock:
+            self._load()
+            return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        with self.lock:
+            self._load()
+            return len(self._redo) > 0
+
+    def record(self, ops: List[dict], coalesce: bool = False):
+        """Records a change, clearing the redo stack
+
+        Parameters
+        ----------
+        ops:
+            Operations of the change (see `diff`)
+        coalesce:
+            If True and the previous change was also recorded with `coalesce` and
+            touched the same values (e.g., repeated opacity steps), both are merged
+            into a single undoable change
+        """
+        if len(ops) == 0:
+            return
+        with self.lock:
+            self._load()
+            last = self._undo[-1] if len(self._undo) > 0 else None
+            if (
+                coalesce
+                and self._coalesce
+                and last != None
+                and [op["p"] for op in last] == [op["p"] for op in ops]
+                and all("n" in op for op in ops)
+            ):
+                for previous, op in zip(last, ops):
+                    previous["n"] = op["n"]
+                if all("o" in op and op["o"] == op["n"] for op in last):
+                    self._undo.pop()
+            else:
+                self._undo.append(ops)
+            self._coalesce = coalesce
+            self._redo.clear()
+            self._dirty = True
+
+    def undo(self, config: dict) -> Union[List[list], BaseException]:
+        """Reverts the last change in `config`
+
+        Returns
+        -------
+        paths, BaseException:
+            Keys of the reverted values, or an exception if there is nothing to undo
+            or if `config` was changed in the meantime (e.g., by editing the file by
+            hand), in which case the history is cleared
+        """
+        return self._step(config, True)
+
+    def redo(self, config: dict) -> Union[List[list], BaseException]:
+        """Re-applies the last undone change to `config`, see `undo`"""
+        return self._step(config, False)
+
+    def _step(self, config: dict, undo: bool) -> Union[List[list], BaseException]:
+        with self.lock:
+            self._load()
+            source, target = (
+                (self._undo, self._redo) if undo else (self._redo, self._undo)
+            )
+            if len(source) == 0:
+                return IndexError("Nothing to {}.".format("undo" if undo else "redo"))
+            ops = source[-1]
+            self._coalesce = False
+            self._dirty = True
+            if not apply_ops(config, ops, reverse=undo):
+                self._undo.clear()
+                self._redo.clear()
+                return ValueError(
+                    "The configuration changed outside of aed; history cleared."
+                )
+            target.append(source.pop())
+            return [op["p"] for op in ops]
+
+    def save(self):
+        """Writes the history to the journal, if it changed. The histories of other
+        configuration files are kept, unless these files no longer exist.
+        """
+        with self.lock, _journal_lock:
+            if not self._dirty or self.journal_fn == None:
+                return
+            try:
+                with open(self.journal_fn, "r") as stream:
+                    journal = json.load(stream)
+                if not isinstance(journal, dict):
+                    journal = {}
+            except (OSError, ValueError):
+                journal = {}
+            journal = {
+                key: entry for key, entry in journal.items() if os.path.exists(key)
+            }
+            journal[self.key] = {"undo": list(self._undo), "redo": list(self._redo)}
+            try:
+                os.makedirs(os.path.dirname(self.journal_fn), exist_ok=True)
+                atomic_write(self.journal_fn, json.dumps(journal))
+                self._dirty = False
+            except OSError:
+                pass
@@ -0,0 +1,105 @@
+import copy
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Union, List, Callable, Tuple
+
+
+class ThemePrefetcher(object):
+    """Loads and validates theme files ahead of time in a small thread pool, keeping
+    the results in a bounded LRU, so that applying a prefetched theme is an in-memory
+    swap
+
+    Parameters
+    ----------
+    loader:
+        Function taking a theme path and kind ("colors" or "font") and returning a
+        tuple of the parsed theme and its validation exception (or None)
+    max_workers:
+        Number of prefetching threads
+    capacity:
+        Maximum number of prefetched themes kept in memory
+    """
+
+    def __init__(self, loader: Callable, max_workers: int = 2, capacity: int = 64):
+        self.loader = loader
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="aed-prefetch"
+        )
+
+    def _load(self, theme_fn: str, kind: str) -> tuple:
+        try:
+            return self.loader(theme_fn, kind)
+        except Exception as exception:
+            return None, exception
+
+    def _evict(self):
+        while len(self._lru) > self.capacity:
+            _, future = self._lru.popitem(last=False)
+            future.cancel()
+
+    def prefetch(self, theme_fns: List[str], kind: str):
+        """Schedules the loading of `theme_fns` that are not prefetched yet. The
+        first paths are loaded first, so the focused theme should come first.
+        """
+        with self.lock:
+            for theme_fn in theme_fns:
+                key = (kind, theme_fn)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                else:
+                    self._lru[key] = self._pool.submit(self._load, theme_fn, kind)
+            self._evict()
+
+    def get(self, theme_fn: str, kind: str) -> Tuple[dict, Union[None, BaseException]]:
+        """Returns the parsed theme and its validation exception (or None), waiting
+        for an in-flight prefetch or loading the theme synchronously on a miss.
+        Prefetches that failed to load are dropped and retried synchronously, and
+        exceptions raised by that load (e.g., a missing file) are re-raised.
+        """
+        key = (kind, theme_fn)
+        with self.lock:
+            future = self._lru.get(key)
+            if future != None and future.cancelled():
+                future = None
+        if future != None:
+            theme_map, exception = future.result()
+            if theme_map == None:
+                # failed loads are never served, the file may have been fixed since
+                with self.lock:
+                    if self._lru.get(key) is future:
+                        self._lru.pop(key)
+                future = None
+        with self.lock:
+            if future != None:
+                self.hits += 1
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+            else:
+                self.misses += 1
+        if future == None:
+            theme_map, exception = self._load(theme_fn, kind)
+            if theme_map == None:
+                raise exception
+            future = Future()
+            future.set_result((theme_map, exception))
+            with self.lock:
+                self._lru[key] = future
+                self._evict()
+        return copy.deepcopy(theme_map), exception
+
+    def invalidate(self, theme_fn: str = None):
+        """Drops the prefetched results of `theme_fn`, or of all themes if None"""
+        with self.lock:
+            for key in list(self._lru.keys()):
+                if theme_fn == None or key[1] == theme_fn:
+                    self._lru.pop(key).cancel()
+
+    def shutdown(self):
+        """Stops prefetching, dropping all queued loads"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
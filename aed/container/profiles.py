@@ -0,0 +1,73 @@
+import os
+import io
+from typing import Union
+from .atomic_writer import atomic_write
+from .yaml_backend import get_backend
+
+HOME = os.path.expanduser("~")
+ALACRITTY_PROFILES = os.path.join(HOME, ".config/alacritty/aed-profiles.yml")
+
+_profile_options = set(["colors", "font", "opacity"])
+
+
+def load_profiles(profile_fn: str = ALACRITTY_PROFILES) -> dict:
+    """Loads saved profiles. Profiles bundle color, font and opacity options that are
+    applied together, e.g. :
+
+        night:
+          colors: tomorrow-night
+          font: dina
+          opacity: 0.85
+        day:
+          colors: ~/.config/alacritty/colors/solarized-light.yml
+
+    where colors and fonts are names of color/font files or paths to them.
+
+    Parameters
+    ----------
+    profile_fn:
+        Path to the profiles YAML file
+
+    Returns
+    -------
+    profiles:
+        Dictionary mapping profile names to profiles. Empty if `profile_fn` does not
+        exist.
+    """
+
+    if not os.path.isfile(profile_fn):
+        return {}
+    with open(profile_fn, "r") as stream:
+        profiles = get_backend().load(stream)
+    return profiles or {}
+
+
+def save_profile(
+    name: str, profile: dict, profile_fn: str = ALACRITTY_PROFILES
+) -> Union[None, BaseException]:
+    """Adds (or replaces) a profile in the profiles file
+
+    Parameters
+    ----------
+    name:
+        Name of the profile
+    profile:
+        Dictionary with (some of) the "colors", "font" and "opacity" keys
+    profile_fn:
+        Path to the profiles YAML file
+
+    Returns
+    -------
+    None, BaseException
+        A `KeyError` is returned if the profile contains unknown options
+    """
+
+    for key in profile.keys():
+        if key not in _profile_options:
+            return KeyError("{} not acceptable profile option.".format(key))
+    profiles = load_profiles(profile_fn)
+    profiles[name] = {key: val for key, val in profile.items() if val != None}
+    stream = io.StringIO()
+    get_backend().dump(profiles, stream)
+    atomic_write(profile_fn, stream.getvalue())
+    return None
@@ -0,0 +1,387 @@
+import os
+import re
+import json
+import heapq
+import threading
+from functools import lru_cache
+from typing import Union, List, Tuple, Callable
+from .atomic_writer import atomic_write
+from .theme_cache import AED_CACHE_DIR
+
+PALETTE_CACHE = os.path.join(AED_CACHE_DIR, "palettes.json")
+
+_hex = re.compile(r"^(#|0x)([0-9a-fA-F]{6}|[0-9a-fA-F]{3})$")
+
+# colors compared between themes: the primary background and foreground and the 16
+# ANSI colors
+_ansi_names = ["black", "red", "green", "yellow", "blue", "magenta", "cyan", "white"]
+PALETTE_KEYS = [("primary", "background"), ("primary", "foreground")] + [
+    (group, name) for group in ("normal", "bright") for name in _ansi_names
+]
+
+# linear sRGB to CIE XYZ, and the D65 reference white
+_xyz = [
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+]
+_white = (0.95047, 1.0, 1.08883)
+
+
+def _numpy():
+    """Returns the numpy module, or None if it is not installed. numpy is optional:
+    without it, rankings are computed in pure Python, with the same results.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def parse_hex(value: str) -> Union[None, Tuple[int, int, int]]:
+    """Parses an Alacritty color value ('#rrggbb', '0xrrggbb' or '#rgb')
+
+    Returns
+    -------
+    None, (r, g, b):
+        Color channels from 0 to 255, or None if `value` is not a hex color (e.g.
+        'CellBackground')
+    """
+    match = _hex.match(str(value).strip())
+    if match == None:
+        return None
+    digits = match.group(2)
+    if len(digits) == 3:
+        digits = "".join(digit * 2 for digit in digits)
+    return tuple(int(digits[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def _linear(channel: int) -> float:
+    c = channel / 255.0
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _f(t: float) -> float:
+    return (
+        t ** (1.0 / 3.0)
+        if t > (6.0 / 29.0) ** 3
+        else t / (3 * (6.0 / 29.0) ** 2) + 4.0 / 29.0
+    )
+
+
+@lru_cache(maxsize=4096)
+def to_lab(value: str) -> Union[None, Tuple[float, float, float]]:
+    """Converts an Alacritty color value ('#rrggbb', '0xrrggbb' or '#rgb') to CIELAB
+    (D65), in which euclidean distances approximate perceived color differences
+
+    Returns
+    -------
+    None, (L, a, b):
+        CIELAB coordinates, or None if `value` is not a hex color
+    """
+    rgb = parse_hex(value)
+    if rgb == None:
+        return None
+    linear = [_linear(channel) for channel in rgb]
+    x, y, z = (
+        _f(sum(m * c for m, c in zip(row, linear)) / white)
+        for row, white in zip(_xyz, _white)
+    )
+    return (116.0 * y - 16.0, 500.0 * (x - y), 200.0 * (y - z))
+
+
+def palette(colors: dict) -> List[Union[None, Tuple[float, float, float]]]:
+    """Converts the compared colors (see `PALETTE_KEYS`) of an Alacritty color map to
+    CIELAB, with None for the colors that are missing or not hex values
+    """
+    lab = []
+    for group, name in PALETTE_KEYS:
+        value = (colors or {}).get(group)
+        value = value.get(name) if isinstance(value, dict) else None
+        lab.append(to_lab(value) if isinstance(value, str) else None)
+    return lab
+
+
+def _signature(theme_fn: str) -> Tuple[int, int]:
+    """Modification time and size of a theme file. Pseudo-paths of a `ThemeBundle`
+    are signed by the bundle file.
+    """
+    try:
+        stat = os.stat(theme_fn)
+    except FileNotFoundError:
+        if "#" not in theme_fn:
+            raise
+        stat = os.stat(theme_fn.rsplit("#", 1)[0])
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PaletteIndex(object):
+    """Searchable index of the palettes of a color theme library. Every theme's
+    primary and ANSI colors are converted to CIELAB once, cached on disk along with
+    the modification time and size of the file, and stacked into a matrix, so that
+    the whole library is ranked by distance to a palette with a few vectorized
+    operations (see `nearest`). The WCAG contrast scores of the themes (see
+    `aed.container.contrast`) are computed in the same pass and cached alongside.
+
+    Parameters
+    ----------
+    cache_fn:
+        Path to the JSON file in which the palettes are stored, e.g.
+        `PALETTE_CACHE` (`$XDG_CACHE_HOME/aed/palettes.json`, as used by the `aed`
+        command). If None (the default), they are kept in memory only.
+    use_numpy:
+        If False, rankings are computed in pure Python even if numpy is installed
+    """
+
+    def __init__(self, cache_fn: str = None, use_numpy: bool = True):
+        self.cache_fn = cache_fn
+        self.use_numpy = use_numpy
+        self._numpy_module = None
+        self.lock = threading.RLock()
+        self.names = []
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._rows = []
+        self._fns = []
+        self._matrix = None
+        self._stale = False
+        # paths whose cache entry was checked against the file since it was loaded
+        self._verified = set()
+
+    @property
+    def numpy(self):
+        """numpy module used for rankings, or None. It is imported on first use,
+        so that creating an index costs nothing until themes are compared.
+        """
+        if self._numpy_module == None:
+            self._numpy_module = (_numpy() if self.use_numpy else None) or False
+        return self._numpy_module or None
+
+    @property
+    def entries(self) -> dict:
+        """Cached palettes by theme path, loaded from `cache_fn` on first access"""
+        if self._entries == None:
+            if self.cache_fn == None:
+                self._entries = {}
+                return self._entries
+            try:
+                with open(self.cache_fn, "r") as stream:
+                    self._entries = json.load(stream)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def update(self, themes: dict, loader: Callable, verify: bool = True):
+        """Indexes the color themes of a library, converting only the new and
+        modified ones
+
+        Parameters
+        ----------
+        themes:
+            Dictionary of theme names and paths, e.g. `AlacrittyContainer.colors`
+        loader:
+            Function that returns the parsed theme (and its validation exception)
+            of a path. Themes that cannot be loaded are left out of the index.
+        verify:
+            If False, themes that were already checked against their file are
+            trusted without another `stat`, e.g. when modified files are reported
+            by a watcher (see `invalidate`)
+        """
+        with self.lock:
+            listed = []
+            misses = []
+            for name, theme_fn in themes.items():
+                entry = self.entries.get(theme_fn)
+                if not verify and entry != None and theme_fn in self._verified:
+                    listed.append((name, theme_fn))
+                    continue
+                try:
+                    signature = list(_signature(theme_fn))
+                except OSError:
+                    continue
+                self._verified.add(theme_fn)
+                if (
+                    entry == None
+                    or entry["stat"] != signature
+                    or "contrast" not in entry
+                ):
+                    misses.append((theme_fn, signature))
+                listed.append((name, theme_fn))
+            converted = self._convert(misses, loader)
+            # themes that could not be loaded are left out
+            failed = set(theme_fn for theme_fn, _ in misses) - converted
+            listed = [(name, fn) for name, fn in listed if fn not in failed]
+            names = [name for name, _ in listed]
+            if len(converted) > 0 or self._stale or names != self.names:
+                self.names = names
+                self._fns = [fn for _, fn in listed]
+                self._rows = [self.entries[fn]["lab"] for fn in self._fns]
+                self._matrix = None
+                self._stale = False
+
+    def _convert(self, misses: List[tuple], loader: Callable) -> set:
+        """Converts the palettes of new and modified themes, given as (path,
+        signature) pairs, and scores their contrast in a single batch
+
+        Returns
+        -------
+        converted:
+            Paths of the themes that could be loaded
+        """
+        from .contrast import luminances, contrast_scores
+
+        loaded = []
+        for theme_fn, signature in misses:
+            self.misses += 1
+            try:
+                data, _ = loader(theme_fn)
+                colors = data.get("colors")
+                lab = palette(colors)
+            except Exception:
+                continue
+            lab = [list(color) if color != None else None for color in lab]
+            loaded.append((theme_fn, signature, lab, luminances(colors)))
+        scores = contrast_scores([row[3] for row in loaded], self.numpy)
+        for (theme_fn, signature, lab, _), score in zip(loaded, scores):
+            self.entries[theme_fn] = {
+                "stat": signature,
+                "lab": lab,
+                "contrast": list(score),
+            }
+            self._dirty = True
+        return set(row[0] for row in loaded)
+
+    def contrast(self, theme_fn: str, loader: Callable) -> Union[None, tuple]:
+        """Contrast scores of a single theme (see `ContrastScore`), converting it
+        first if it is new or was modified
+
+        Returns
+        -------
+        None, ContrastScore:
+            Scores of the theme, or None if it cannot be loaded
+        """
+        from .contrast import ContrastScore
+
+        with self.lock:
+            entry = self.entries.get(theme_fn)
+            if entry == None or theme_fn not in self._verified:
+                try:
+                    signature = list(_signature(theme_fn))
+                except OSError:
+                    return None
+                self._verified.add(theme_fn)
+                if (
+                    entry == None
+                    or entry["stat"] != signature
+                    or "contrast" not in entry
+                ):
+                    if len(self._convert([(theme_fn, signature)], loader)) == 0:
+                        return None
+                    # the rows of `nearest` are rebuilt on the next update
+                    self._stale = True
+            return ContrastScore(*self.entries[theme_fn]["contrast"])
+
+    def contrasts(self) -> dict:
+        """Contrast scores of the indexed themes (see `update`), by name"""
+        from .contrast import ContrastScore
+
+        with self.lock:
+            return {
+                name: ContrastScore(*self.entries[theme_fn]["contrast"])
+                for name, theme_fn in zip(self.names, self._fns)
+            }
+
+    def invalidate(self, theme_fn: str):
+        """Makes the next `update` check `theme_fn` against its file again"""
+        with self.lock:
+            self._verified.discard(theme_fn)
+
+    def save(self):
+        """Writes the cached palettes to `cache_fn` if they changed since they were
+        loaded
+        """
+        with self.lock:
+            if not self._dirty or self.cache_fn == None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.cache_fn), exist_ok=True)
+                atomic_write(self.cache_fn, json.dumps(self.entries))
+            except (OSError, TypeError, ValueError):
+                return
+            self._dirty = False
+
+    def _stacked(self):
+        """(values, mask) matrices of the indexed palettes, of shapes (themes, colors,
+        3) and (themes, colors), built once per change of the index
+        """
+        if self._matrix == None:
+            np = self.numpy
+            values = np.zeros((len(self._rows), len(PALETTE_KEYS), 3))
+            mask = np.zeros((len(self._rows), len(PALETTE_KEYS)), dtype=bool)
+            for i, row in enumerate(self._rows):
+                for j, lab in enumerate(row):
+                    if lab != None:
+                        values[i, j] = lab
+                        mask[i, j] = True
+            self._matrix = (values, mask)
+        return self._matrix
+
+    def distances(self, colors: dict) -> List[Union[None, float]]:
+        """Perceptual distances of all indexed themes to the Alacritty color map
+        `colors`: the mean CIELAB (CIE76) difference over the colors both palettes
+        define, or None for themes that share no color with `colors`
+        """
+        query = palette(colors)
+        with self.lock:
+            if self.numpy != None and len(self._rows) > 0:
+                np = self.numpy
+                values, mask = self._stacked()
+                query_mask = np.array([lab != None for lab in query])
+                query_values = np.array([lab or (0.0, 0.0, 0.0) for lab in query])
+                shared = mask & query_mask
+                delta = np.sqrt(((values - query_values) ** 2).sum(axis=2))
+                counts = shared.sum(axis=1)
+                totals = (delta * shared).sum(axis=1)
+                means = totals / np.maximum(counts, 1)
+                return [
+                    float(mean) if count > 0 else None
+                    for mean, count in zip(means.tolist(), counts.tolist())
+                ]
+            distances = []
+            for row in self._rows:
+                total = 0.0
+                count = 0
+                for lab, other in zip(row, query):
+                    if lab != None and other != None:
+                        total += sum((x - y) ** 2 for x, y in zip(lab, other)) ** 0.5
+                        count += 1
+                distances.append(total / count if count > 0 else None)
+            return distances
+
+    def nearest(self, colors: dict, k: int = None) -> List[Tuple[str, float]]:
+        """Ranks the indexed themes by distance to `colors` (see `distances`)
+
+        Parameters
+        ----------
+        colors:
+            Alacritty color map, e.g. `alacritty_config["colors"]`
+        k:
+            Number of themes to return. Defaults to all themes sharing colors with
+            `colors`.
+
+        Returns
+        -------
+        ranking:
+            (name, distance) of the closest themes, closest first
+        """
+        distances = self.distances(colors)
+        ranked = [
+            (distance, i) for i, distance in enumerate(distances) if distance != None
+        ]
+        if k != None and k < len(ranked):
+            ranked = heapq.nsmallest(k, ranked)
+        else:
+            ranked = sorted(ranked)
+        return [(self.names[i], distance) for distance, i in ranked]
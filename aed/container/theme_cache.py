@@ -0,0 +1,139 @@
+import os
+import json
+import copy
+import hashlib
+import threading
+from typing import Union, Callable, Tuple
+from .atomic_writer import atomic_write
+
+HOME = os.path.expanduser("~")
+XDG_CACHE_HOME = os.environ.get("XDG_CACHE_HOME") or os.path.join(HOME, ".cache")
+AED_CACHE_DIR = os.path.join(XDG_CACHE_HOME, "aed")
+THEME_CACHE = os.path.join(AED_CACHE_DIR, "themes")
+
+_exceptions = {"KeyError": KeyError, "ValueError": ValueError}
+
+
+class ThemeCache(object):
+    """Persistent cache of parsed and validated color/font theme files. Entries are
+    keyed by kind and absolute path, and are invalidated whenever the modification
+    time or size of the theme file changes. Every entry is stored in its own JSON
+    file, named after a hash of its key, so that a lookup only reads the entry it
+    needs, however large the library is.
+
+    Parameters
+    ----------
+    cache_dir:
+        Directory in which the entries are stored, e.g. `THEME_CACHE`
+        (`$XDG_CACHE_HOME/aed/themes`, as used by the `aed` command). If None (the
+        default), the cache is kept in memory only.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        # entries looked up so far, by key, and the keys of those not saved yet
+        self.entries = {}
+        self._dirty = set()
+
+    def _entry_fn(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _lookup(self, key: str) -> Union[None, dict]:
+        """Returns the entry of `key`, reading it from `cache_dir` on first access"""
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+        entry = None
+        if self.cache_dir != None:
+            try:
+                with open(self._entry_fn(key), "r") as stream:
+                    entry = json.load(stream)
+            except (OSError, ValueError):
+                entry = None
+            # files are named after a hash, so the key is checked as well
+            if not isinstance(entry, dict) or entry.get("key") != key:
+                entry = None
+        with self.lock:
+            return self.entries.setdefault(key, entry)
+
+    def get(
+        self, theme_fn: str, kind: str, loader: Callable, validator: Callable
+    ) -> Tuple[dict, Union[None, BaseException]]:
+        """Returns the parsed contents of `theme_fn` along with its validation result,
+        parsing and validating the file only if there is no up-to-date cache entry
+
+        Parameters
+        ----------
+        theme_fn:
+            Path to a color or font YAML file
+        kind:
+            Kind of theme, e.g. "colors" or "font". Used to separate cache entries of
+            the same file validated in different ways.
+        loader:
+            Function that parses `theme_fn` into a dictionary
+        validator:
+            Function that returns None for valid parsed data, or an exception otherwise
+
+        Returns
+        -------
+        data:
+            Parsed theme dictionary. A copy is returned, so that it can be freely
+            modified by the caller.
+        exception:
+            None if the theme is valid, else the exception returned by `validator`
+        """
+
+        theme_fn = os.path.abspath(theme_fn)
+        stat = os.stat(theme_fn)
+        key = "{}:{}".format(kind, theme_fn)
+        entry = self._lookup(key)
+        with self.lock:
+            if (
+                entry != None
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                self.hits += 1
+            else:
+                self.misses += 1
+                entry = None
+        if entry == None:
+            # parsed without the lock, so that threads (e.g., the prefetcher's)
+            # parse concurrently. Entries are never modified once stored, and the
+            # last thread to store the same file wins.
+            data = loader(theme_fn)
+            exception = validator(data)
+            entry = {
+                "key": key,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "data": data,
+                "error": None,
+            }
+            if exception != None:
+                entry["error"] = [type(exception).__name__, str(exception.args[0])]
+            with self.lock:
+                self.entries[key] = entry
+                self._dirty.add(key)
+        exception = None
+        if entry["error"] != None:
+            name, message = entry["error"]
+            exception = _exceptions.get(name, RuntimeError)(message)
+        return copy.deepcopy(entry["data"]), exception
+
+    def save(self):
+        """Writes the entries that were added or replaced since they were read"""
+        with self.lock:
+            if len(self._dirty) == 0 or self.cache_dir == None:
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                for key in sorted(self._dirty):
+                    atomic_write(self._entry_fn(key), json.dumps(self.entries[key]))
+                    self._dirty.discard(key)
+            except (OSError, TypeError, ValueError):
+                return
@@ -0,0 +1,170 @@
+import os
+import time
+import json
+import threading
+import functools
+from typing import Union, List, Callable
+
+# active Profiler, or None if timing is disabled
+_profiler = None
+
+
+class Profiler(object):
+    """Collects the timing spans recorded by `span` and `timed` while it is enabled
+    (see `enable`), e.g. :
+
+        from aed.container import timing
+
+        profiler = timing.enable()
+        container = AlacrittyContainer(ALACRITTY_CONFIG)
+        container.set_opacity(0.9)
+        timing.disable()
+        print(profiler.format_summary())
+        profiler.write_chrome_trace("aed-trace.json")
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    def record(self, name: str, start: float, duration: float):
+        """Records a span of `duration` seconds that started at `start` (in
+        `time.perf_counter` seconds)
+        """
+        self.spans.append((name, start, duration, threading.get_ident()))
+
+    def summary(self) -> List[tuple]:
+        """Aggregates the spans by name
+
+        Returns
+        -------
+        rows:
+            Tuples of (name, count, total, mean, max) durations in seconds, by
+            decreasing total duration
+        """
+        totals = {}
+        for name, _, duration, _ in self.spans:
+            count, total, longest = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (count + 1, total + duration, max(longest, duration))
+        rows = [
+            (name, count, total, total / count, longest)
+            for name, (count, total, longest) in totals.items()
+        ]
+        return sorted(rows, key=lambda row: -row[2])
+
+    def format_summary(self) -> str:
+        """Renders `summary` as a table, in milliseconds"""
+        lines = [
+            "{:<32}{:>8}{:>12}{:>12}{:>12}".format(
+                "span", "count", "total (ms)", "mean (ms)", "max (ms)"
+            )
+        ]
+        for name, count, total, mean, longest in self.summary():
+            lines.append(
+                "{:<32}{:>8}{:>12.3f}{:>12.3f}{:>12.3f}".format(
+                    name, count, 1e3 * total, 1e3 * mean, 1e3 * longest
+                )
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Returns the spans in the Chrome trace event format, which can be opened in
+        chrome://tracing or https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        events = []
+        for name, start, duration, tid in self.spans:
+            events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": 1e6 * (start - self.origin),
+                    "dur": 1e6 * duration,
+                    "pid": pid,
+                    "tid": tid,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, trace_fn: str):
+        """Writes `chrome_trace` to the JSON file `trace_fn`"""
+        with open(trace_fn, "w") as stream:
+            json.dump(self.chrome_trace(), stream)
+
+
+def enable(profiler: Profiler = None) -> Profiler:
+    """Starts recording spans into `profiler` (a new one if None) and returns it"""
+    global _profiler
+    _profiler = profiler if profiler != None else Profiler()
+    return _profiler
+
+
+def disable() -> Union[None, Profiler]:
+    """Stops recording spans, returning the profiler that recorded them, if any"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
+
+
+def enabled() -> bool:
+    return _profiler != None
+
+
+class _Span(object):
+    __slots__ = ("name", "profiler", "start")
+
+    def __init__(self, name: str, profiler: Profiler):
+        self.name = name
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+def span(name: str):
+    """Context manager timing its body as the span `name`. While timing is disabled,
+    a shared no-op context manager is returned, so nothing is allocated or timed.
+    """
+    if _profiler == None:
+        return _null_span
+    return _Span(name, _profiler)
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of the decorated function as the span `name`. While
+    timing is disabled, the only overhead is a check of a global.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler == None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.record(name, start, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
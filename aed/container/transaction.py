@@ -0,0 +1,246 @@
+import os
+import copy
+import time
+from typing import Union, List, Callable
+from .history import diff
+from .timing import timed, span
+from .fade import FADE_FPS, interpolate_palettes, play_frames
+
+
+class Transaction(object):
+    """Batch of staged changes to the configuration of an `AlacrittyContainer`. All
+    staged changes are validated up front and, only if all of them are valid, applied
+    together with a single write. Use through `AlacrittyContainer.transaction`:
+
+        with container.transaction() as tx:
+            tx.set_colors("~/.config/alacritty/colors/dark.yml")
+            tx.set_named_font("dina")
+            tx.set_opacity(0.9)
+
+    Leaving the `with` block normally commits the transaction, raising the exception
+    of the first invalid change, if any. Leaving it with an exception discards all
+    staged changes.
+
+    Parameters
+    ----------
+    container:
+        `AlacrittyContainer` to which the changes are applied
+    deferred:
+        If True, the write of the committed changes is handed to the container's
+        write-behind scheduler instead of happening immediately
+    """
+
+    def __init__(self, container, deferred: bool = False):
+        self.container = container
+        self.deferred = deferred
+        self.frames = 1
+        self.fps = FADE_FPS
+        self.clock = time.monotonic
+        self.sleep = time.sleep
+        self._changes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type != None:
+            self.rollback()
+            return False
+        exception = self.commit()
+        if exception != None:
+            raise exception
+        return False
+
+    def set_colors(self, color_fn: str) -> "Transaction":
+        """Stages the color options of the YAML file `color_fn`"""
+        self._changes.append(("colors", color_fn))
+        return self
+
+    def set_named_colors(self, color_key: str) -> "Transaction":
+        """Stages the color options of the color file named `color_key`"""
+        self._changes.append(("named_colors", color_key))
+        return self
+
+    def set_font(self, font_fn: str) -> "Transaction":
+        """Stages the font options of the YAML file `font_fn`"""
+        self._changes.append(("font", font_fn))
+        return self
+
+    def set_named_font(self, font_key: str) -> "Transaction":
+        """Stages the font options of the font file named `font_key`"""
+        self._changes.append(("named_font", font_key))
+        return self
+
+    def set_opacity(self, opacity: float) -> "Transaction":
+        """Stages a new background window opacity"""
+        self._changes.append(("opacity", opacity))
+        return self
+
+    def fade(
+        self,
+        frames: int,
+        fps: float = FADE_FPS,
+        clock: Callable = time.monotonic,
+        sleep: Callable = time.sleep,
+    ) -> "Transaction":
+        """Makes the staged colors cross-fade in from the current ones over `frames`
+        frames, written at most `fps` times per second (see `play_frames`, which
+        times the frames with `clock` and waits for them with `sleep`). Only the
+        `colors` block is written for the intermediate frames, and the other staged
+        changes are applied along with the last frame.
+        """
+        self.frames = max(1, int(frames))
+        self.fps = fps
+        self.clock = clock
+        self.sleep = sleep
+        return self
+
+    def _play_fade(self, colors: dict):
+        """Writes the intermediate frames of a fade from the current colors to
+        `colors`, then restores the current colors in memory
+        """
+        container = self.container
+        config = container.alacritty_config
+        missing = object()
+        start = config.get("colors", missing)
+        palettes = interpolate_palettes(
+            start if isinstance(start, dict) else {}, colors, self.frames
+        )
+
+        def write(palette: dict):
+            with container.writer.lock:
+                config["colors"] = palette
+            container._write([("colors",)])
+
+        try:
+            with span("fade"):
+                # the last frame is written by the commit itself
+                play_frames(write, palettes[:-1], self.fps, self.clock, self.sleep)
+        finally:
+            with container.writer.lock:
+                if start is missing:
+                    config.pop("colors", None)
+                else:
+                    config["colors"] = start
+
+    def set_profile(self, profile: dict) -> "Transaction":
+        """Stages the colors, font and/or opacity of a profile (see
+        `aed.container.profiles`). Colors and fonts are given either as names of
+        color/font files or as paths.
+        """
+        if profile.get("colors") != None:
+            if profile["colors"] in self.container.colors:
+                self.set_named_colors(profile["colors"])
+            else:
+                self.set_colors(os.path.expanduser(profile["colors"]))
+        if profile.get("font") != None:
+            if profile["font"] in self.container.fonts:
+                self.set_named_font(profile["font"])
+            else:
+                self.set_font(os.path.expanduser(profile["font"]))
+        if profile.get("opacity") != None:
+            self.set_opacity(profile["opacity"])
+        return self
+
+    def _resolve(self, kind: str, value) -> Union[List[tuple], BaseException]:
+        """Loads and validates a single staged change
+
+        Returns
+        -------
+        updates, BaseException:
+            List of (path, value) updates to the configuration, or an exception if the
+            change is invalid
+        """
+        container = self.container
+        if kind == "named_colors" or kind == "named_font":
+            index = container.colors if kind == "named_colors" else container.fonts
+            if value not in index:
+                return KeyError("No {} named {}.".format(kind.split("_")[1], value))
+            kind, value = kind.split("_")[1], index[value]
+
+        if kind == "opacity":
+            exception = container._validate_opacity(value)
+            if exception != None:
+                return exception
+            return [(("window", "opacity"), value)]
+
+        theme_map, exception = container._load_theme(value, kind)
+        if exception != None:
+            return exception
+        updates = [((kind,), theme_map[kind])]
+        if kind == "font" and "draw_bold_text_with_bright_colors" in theme_map:
+            updates.append(
+                (
+                    ("draw_bold_text_with_bright_colors",),
+                    theme_map["draw_bold_text_with_bright_colors"],
+                )
+            )
+        return updates
+
+    @timed("transaction.commit")
+    def commit(self) -> Union[None, BaseException]:
+        """Validates all staged changes and, if they are all valid, applies them to the
+        configuration with a single write. If the write fails, the configuration is
+        rolled back and the exception is raised.
+
+        Returns
+        -------
+        None, BaseException
+            None if all changes were applied, else the exception of the first invalid
+            change, in which case nothing is applied
+        """
+
+        updates = []
+        for kind, value in self._changes:
+            try:
+                resolved = self._resolve(kind, value)
+            except (OSError, RuntimeError) as exception:
+                resolved = exception
+            if isinstance(resolved, BaseException):
+                self.rollback()
+                return resolved
+            updates += resolved
+        self._changes = []
+        if len(updates) == 0:
+            return None
+
+        container = self.container
+        colors = [value for path, value in updates if path == ("colors",)]
+        if self.frames > 1 and len(colors) > 0:
+            self._play_fade(colors[-1])
+        config = container.alacritty_config
+        missing = object()
+        snapshot = []
+        with container.writer.lock:
+            for path, value in updates:
+                parent = config
+                for key in path[:-1]:
+                    parent = parent.setdefault(key, {})
+                snapshot.append((parent, path[-1], parent.get(path[-1], missing)))
+                parent[path[-1]] = value
+        try:
+            container._write([path for path, _ in updates], self.deferred)
+        except BaseException:
+            with container.writer.lock:
+                for parent, key, old in reversed(snapshot):
+                    if old is missing:
+                        del parent[key]
+                    else:
+                        parent[key] = old
+            raise
+        if not container.previewing:
+            # previewed changes are recorded once they are kept
+            ops = []
+            for (path, value), (_, _, old) in zip(updates, snapshot):
+                if old is missing:
+                    ops.append({"p": list(path), "n": copy.deepcopy(value)})
+                else:
+                    ops += diff(old, value, path)
+            container.history.record(ops, coalesce=self.deferred)
+            if not self.deferred:
+                container.history.save()
+        return None
+
+    def rollback(self):
+        """Discards all staged changes"""
+        self._changes = []
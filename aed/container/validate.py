@@ -0,0 +1,142 @@
+import os
+import json
+import hashlib
+from glob import glob
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from .atomic_writer import atomic_write
+from .theme_cache import AED_CACHE_DIR
+
+VALIDATE_CACHE = os.path.join(AED_CACHE_DIR, "validate.json")
+
+ValidationResult = namedtuple("ValidationResult", ["fn", "kind", "errors"])
+ValidationResult.__doc__ = """Result of validating a single theme file. `kind` is
+"colors" or "font", and `errors` is a (possibly empty) list of error messages."""
+
+
+def validate_theme(theme_fn: str, kind: str) -> List[str]:
+    """Parses and validates a color ("colors") or font ("font") file, collecting all
+    errors instead of stopping at the first one
+
+    Parameters
+    ----------
+    theme_fn:
+        Path to a color or font YAML file
+    kind:
+        "colors" or "font"
+
+    Returns
+    -------
+    errors:
+        List of error messages, empty if the file is valid
+    """
+
+    from .alacritty_container import AlacrittyContainer
+
+    options = {
+        "colors": AlacrittyContainer._color_options,
+        "font": AlacrittyContainer._font_options,
+    }[kind]
+    try:
+        data = AlacrittyContainer.load_yaml(theme_fn)
+    except Exception as exception:
+        return ["unable to parse: {}".format(exception).replace("\n", " ")]
+    if not isinstance(data, dict) or not isinstance(data.get(kind), dict):
+        return ["missing '{}' options".format(kind)]
+    errors = []
+    for key in data[kind].keys():
+        if key not in options:
+            errors.append(
+                "{}: not acceptable Alacritty {} option.".format(
+                    key, "color" if kind == "colors" else kind
+                )
+            )
+    return errors
+
+
+def _validate_job(job: tuple) -> List[str]:
+    return validate_theme(*job)
+
+
+def _digest(fn: str) -> str:
+    with open(fn, "rb") as stream:
+        return hashlib.sha1(stream.read()).hexdigest()
+
+
+def validate_library(
+    color_dir: str,
+    font_dir: str,
+    workers: int = None,
+    cache_fn: str = VALIDATE_CACHE,
+) -> List[ValidationResult]:
+    """Validates every color and font file of a theme library in parallel. Results
+    are cached per file content hash, so that only new or modified files are parsed
+    and validated again.
+
+    Parameters
+    ----------
+    color_dir:
+        Directory containing color YAML (.yml) files
+    font_dir:
+        Directory containing font YAML (.yml) files
+    workers:
+        Number of worker processes. Defaults to the number of CPUs.
+    cache_fn:
+        Path to the JSON file in which results are cached, or None to disable caching
+
+    Returns
+    -------
+    results:
+        One `ValidationResult` per file, sorted by kind and path
+    """
+
+    cache = {}
+    if cache_fn != None:
+        try:
+            with open(cache_fn, "r") as stream:
+                cache = json.load(stream)
+        except (OSError, ValueError):
+            cache = {}
+
+    files = [(fn, "colors") for fn in sorted(glob("{}/*.yml".format(color_dir)))]
+    files += [(fn, "font") for fn in sorted(glob("{}/*.yml".format(font_dir)))]
+    results = {}
+    digests = {}
+    jobs = []
+    for fn, kind in files:
+        key = "{}:{}".format(kind, os.path.abspath(fn))
+        digests[key] = _digest(fn)
+        entry = cache.get(key)
+        if entry != None and entry["sha1"] == digests[key]:
+            results[key] = ValidationResult(fn, kind, entry["errors"])
+        else:
+            jobs.append((key, fn, kind))
+
+    errors = []
+    if len(jobs) == 1:
+        # not worth starting a process pool for a single file
+        errors = [validate_theme(jobs[0][1], jobs[0][2])]
+    elif len(jobs) > 1:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(jobs) // (4 * workers))
+            errors = list(
+                pool.map(
+                    _validate_job,
+                    [(fn, kind) for _, fn, kind in jobs],
+                    chunksize=chunksize,
+                )
+            )
+    for (key, fn, kind), file_errors in zip(jobs, errors):
+        results[key] = ValidationResult(fn, kind, file_errors)
+
+    if cache_fn != None and len(jobs) > 0:
+        for key, result in results.items():
+            cache[key] = {"sha1": digests[key], "errors": result.errors}
+        try:
+            os.makedirs(os.path.dirname(cache_fn), exist_ok=True)
+            atomic_write(cache_fn, json.dumps(cache))
+        except OSError:
+            pass
+    return [results["{}:{}".format(kind, os.path.abspath(fn))] for fn, kind in files]
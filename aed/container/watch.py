@@ -0,0 +1,146 @@
+import os
+import struct
+import ctypes
+import ctypes.util
+from collections import namedtuple
+from typing import Union, List
+
+WatchEvent = namedtuple("WatchEvent", ["path", "kind"])
+WatchEvent.__doc__ = """Change of a file in a watched directory. `kind` is one of
+"created", "deleted" or "modified"."""
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_event = struct.Struct("iIII")
+_mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class InotifyWatcher(object):
+    """Watches directories for created, deleted and modified files with Linux
+    inotify, through ctypes. The watcher is non-blocking: `fileno` can be polled
+    (e.g., with `urwid.MainLoop.watch_file`) and `read_events` returns immediately.
+
+    Parameters
+    ----------
+    directories:
+        Directories to watch. Missing directories are skipped.
+    """
+
+    def __init__(self, directories: List[str]):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name == None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories = {}
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), _mask)
+            if wd >= 0:
+                self._directories[wd] = directory
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def read_events(self) -> List[WatchEvent]:
+        """Returns the events that happened since the last call, without blocking"""
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _event.unpack_from(data, offset)
+            offset += _event.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if wd not in self._directories or len(name) == 0:
+                continue
+            path = os.path.join(self._directories[wd], name)
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(WatchEvent(path, "deleted"))
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                events.append(WatchEvent(path, "created"))
+            elif mask & IN_CLOSE_WRITE:
+                events.append(WatchEvent(path, "modified"))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher(object):
+    """Portable fallback for `InotifyWatcher`, which compares the modification times
+    and sizes of the files in the watched directories on every `read_events` call
+
+    Parameters
+    ----------
+    directories:
+        Directories to watch. Missing directories are skipped.
+    """
+
+    def __init__(self, directories: List[str]):
+        self._directories = [d for d in directories if os.path.isdir(d)]
+        self._state = self._scan()
+
+    def _scan(self) -> dict:
+        state = {}
+        for directory in self._directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                state[entry.path] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        return state
+
+    def fileno(self) -> None:
+        """Polling watchers have no file descriptor to wait on"""
+        return None
+
+    def read_events(self) -> List[WatchEvent]:
+        """Returns the changes since the last call"""
+        state = self._scan()
+        events = []
+        for path in sorted(set(self._state) | set(state)):
+            if path not in state:
+                events.append(WatchEvent(path, "deleted"))
+            elif path not in self._state:
+                events.append(WatchEvent(path, "created"))
+            elif state[path] != self._state[path]:
+                events.append(WatchEvent(path, "modified"))
+        self._state = state
+        return events
+
+    def close(self):
+        pass
+
+
+def make_watcher(
+    directories: List[str], polling: bool = False
+) -> Union[InotifyWatcher, PollingWatcher]:
+    """Returns an `InotifyWatcher` if inotify is available (and `polling` is False),
+    else a `PollingWatcher`
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Callable
+
+
+class WriteBehind(object):
+    """Coalescing write-behind scheduler. Rapid calls to `schedule` are merged into
+    a single pending flush, and the wrapped `flush_fn` is called at most once per
+    `interval` seconds.
+
+    Parameters
+    ----------
+    flush_fn:
+        Callable that persists the current state (e.g., dumps a configuration to file)
+    interval:
+        Minimum number of seconds between two consecutive calls to `flush_fn`. If
+        `interval` is 0, every call to `schedule` flushes immediately.
+    """
+
+    def __init__(self, flush_fn: Callable, interval: float = 0.25):
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.lock = threading.RLock()
+        self._timer = None
+        self._pending = False
+        self._last_flush = None
+
+    @property
+    def pending(self) -> bool:
+        """True if there is a scheduled state that has not yet been flushed"""
+        return self._pending
+
+    def schedule(self):
+        """Marks the current state as dirty and schedules a flush. If the last flush
+        happened more than `interval` seconds ago, the flush happens immediately.
+        Otherwise, a single timer is armed for the remainder of the interval and
+        subsequent calls before it fires are merged into the same flush.
+        """
+        with self.lock:
+            self._pending = True
+            if self._timer != None:
+                return
+            delay = 0.0
+            if self._last_flush != None:
+                delay = self._last_flush + self.interval - time.monotonic()
+            if delay <= 0:
+                self._flush()
+            else:
+                self._timer = threading.Timer(delay, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self._timer = None
+            if self._pending:
+                self._flush()
+
+    def _flush(self):
+        self._pending = False
+        self._last_flush = time.monotonic()
+        self.flush_fn()
+
+    def flush(self):
+        """Cancels any armed timer and immediately flushes the pending state, if any"""
+        with self.lock:
+            if self._timer != None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._flush()
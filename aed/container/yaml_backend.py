@@ -0,0 +1,166 @@
+import os
+import threading
+import importlib.util
+from typing import Union, List, IO
+
+YAML_BACKEND_ENV = "AED_YAML_BACKEND"
+
+
+class YamlBackend(object):
+    """Base class for the YAML parser/emitter used to load and dump Alacritty
+    configuration and theme files. Subclasses implement `load` and `dump` using
+    the safe (plain Python types only) flavour of their YAML library.
+    """
+
+    name = None
+
+    def load(self, stream: Union[str, IO]) -> dict:
+        raise NotImplementedError
+
+    def dump(self, data: dict, stream: IO):
+        raise NotImplementedError
+
+
+class RuamelBackend(YamlBackend):
+    """Pure-Python safe loader and dumper from ruamel.yaml (YAML 1.2), which never
+    uses the ruamel.yaml C extension, even when it is installed
+    """
+
+    name = "ruamel"
+
+    def __init__(self):
+        from ruamel.yaml import YAML
+
+        self.yaml = YAML(typ="safe", pure=True)
+        self.yaml.default_flow_style = False
+
+    def load(self, stream: Union[str, IO]) -> dict:
+        return self.yaml.load(stream)
+
+    def dump(self, data: dict, stream: IO):
+        self.yaml.dump(data, stream)
+
+
+class LibyamlBackend(RuamelBackend):
+    """C-accelerated safe loader and dumper of ruamel.yaml (ruamel.yaml.clib),
+    built on libyaml. Scalars are resolved by ruamel.yaml, so that files load to
+    the same data as with the `ruamel` backend. An `ImportError` is raised if the
+    C extension is not installed.
+    """
+
+    name = "libyaml"
+
+    def __init__(self):
+        from ruamel.yaml import YAML
+
+        # the C extension is only checked for, ruamel.yaml imports it itself
+        if importlib.util.find_spec("_ruamel_yaml") == None:
+            raise ImportError("ruamel.yaml.clib is not installed")
+        self.yaml = YAML(typ="safe", pure=False)
+        self.yaml.default_flow_style = False
+
+
+class PyyamlBackend(YamlBackend):
+    """C-accelerated safe loader and dumper of PyYAML (`CSafeLoader` and
+    `CSafeDumper`). PyYAML follows YAML 1.1, so some plain scalars load to other
+    values than with the other backends (e.g., `on` and `yes` to True, `012` to 10
+    and `1:30` to 90). It is never selected by "auto", only on request. An
+    `ImportError` is raised if PyYAML is not installed with libyaml.
+    """
+
+    name = "pyyaml"
+
+    def __init__(self):
+        import yaml
+
+        try:
+            self._loader = yaml.CSafeLoader
+            self._dumper = yaml.CSafeDumper
+        except AttributeError:
+            raise ImportError("PyYAML is not built with libyaml")
+        self._pyyaml = yaml
+
+    def load(self, stream: Union[str, IO]) -> dict:
+        return self._pyyaml.load(stream, Loader=self._loader)
+
+    def dump(self, data: dict, stream: IO):
+        self._pyyaml.dump(
+            data,
+            stream,
+            Dumper=self._dumper,
+            default_flow_style=False,
+            allow_unicode=True,
+        )
+
+
+_backend_classes = {
+    LibyamlBackend.name: LibyamlBackend,
+    RuamelBackend.name: RuamelBackend,
+    PyyamlBackend.name: PyyamlBackend,
+}
+# parsers and emitters keep their state in the instance and are not thread-safe,
+# so every thread gets its own instances
+_backends = threading.local()
+_default = None
+
+
+def backend_names() -> List[str]:
+    """Names of all known backends, in order of preference"""
+    return list(_backend_classes.keys())
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose dependencies are installed"""
+    names = []
+    for name in backend_names():
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(name: str = None) -> YamlBackend:
+    """Returns a YAML backend instance
+
+    Parameters
+    ----------
+    name:
+        One of "libyaml", "ruamel", "pyyaml" or "auto". If None, the backend chosen
+        through `set_backend`, or else the `AED_YAML_BACKEND` environment variable,
+        is used. "auto" (the default) selects the libyaml backend if it is
+        available and falls back to the ruamel backend. Both follow YAML 1.2.
+
+    Returns
+    -------
+    backend:
+        `YamlBackend` instance, shared by all the calls from the same thread
+    """
+
+    if name == None:
+        name = _default or os.environ.get(YAML_BACKEND_ENV) or "auto"
+    if name == "auto":
+        try:
+            return get_backend(LibyamlBackend.name)
+        except ImportError:
+            return get_backend(RuamelBackend.name)
+    if name not in _backend_classes:
+        raise ValueError(
+            "{} is not a valid YAML backend. Choose from {}.".format(
+                name, ", ".join(["auto"] + backend_names())
+            )
+        )
+    backends = getattr(_backends, "instances", None)
+    if backends == None:
+        backends = _backends.instances = {}
+    if name not in backends:
+        backends[name] = _backend_classes[name]()
+    return backends[name]
+
+
+def set_backend(name: str):
+    """Sets the default backend returned by `get_backend`"""
+    global _default
+    get_backend(name)
+    _default = name
@@ -0,0 +1,213 @@
+import re
+from typing import Union, Tuple, Callable
+
+_anchor = re.compile(r"(^|[\s\[{,:\-])[&*][^\s,\[\]{}]+")
+_top_level = re.compile(r"^([^\s#\-{\[][^:]*:(\s|$)|---|\.\.\.)")
+_scalar_line = re.compile(
+    r"^(?P<head>[ ]+\S+:[ ]+)(?P<value>[^#\n]*?)(?P<tail>[ ]+#.*)?$"
+)
+
+
+def _lines(text: str) -> list:
+    """Splits `text` into lines, keeping line endings"""
+    return text.splitlines(keepends=True)
+
+
+def _is_content(line: str) -> bool:
+    """True for lines that are not blank and not comments"""
+    stripped = line.strip()
+    return len(stripped) > 0 and not stripped.startswith("#")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def find_block(text: str, key: str) -> Union[None, Tuple[int, int]]:
+    """Finds the character range of a top-level block in a YAML document. The block
+    starts at the `key:` line and ends after its last indented content line, so that
+    blank lines and comments preceding the next top-level key are not part of it.
+
+    Parameters
+    ----------
+    text:
+        YAML document
+    key:
+        Top-level key
+
+    Returns
+    -------
+    None, (start, end):
+        Character offsets of the block, or None if the key is not present exactly
+        once at the top level.
+    """
+
+    head = re.compile(r"^{}:(\s|$)".format(re.escape(key)))
+    spans = []
+    current = None
+    offset = 0
+    for line in _lines(text):
+        if _is_content(line):
+            if _indent(line) == 0 and not (
+                line.startswith("- ") or line.rstrip() == "-"
+            ):
+                # top-level line, i.e. a new key or a document marker
+                current = None
+                if head.match(line):
+                    current = [offset, offset + len(line)]
+                    spans.append(current)
+            elif current != None:
+                current[1] = offset + len(line)
+        offset += len(line)
+    if len(spans) != 1:
+        return None
+    return spans[0][0], spans[0][1]
+
+
+def _safe_to_replace(block: str) -> bool:
+    """Blocks containing tabs or anchors/aliases are not patched, since other parts of
+    the document may depend on them
+    """
+    if "\t" in block:
+        return False
+    for line in _lines(block):
+        if _is_content(line) and _anchor.search(line.split(" #")[0]):
+            return False
+    return True
+
+
+def patch_block(text: str, key: str, value, render: Callable) -> Union[None, str]:
+    """Replaces (or appends) the top-level block `key` of a YAML document, leaving the
+    rest of the document byte-identical
+
+    Parameters
+    ----------
+    text:
+        YAML document
+    key:
+        Top-level key whose block is replaced
+    value:
+        New value of `key`
+    render:
+        Function that renders a dictionary as a YAML string
+
+    Returns
+    -------
+    None, str:
+        The patched document, or None if the block cannot be safely patched
+    """
+
+    new_block = render({key: value})
+    if not new_block.endswith("\n"):
+        new_block += "\n"
+    head = re.compile(r"^{}:(\s|$)".format(re.escape(key)), re.MULTILINE)
+    span = find_block(text, key)
+    if span == None:
+        if head.search(text):
+            return None
+        for line in _lines(text):
+            if _is_content(line) and _indent(line) == 0 and not _top_level.match(line):
+                # not a block mapping, e.g. a flow style document
+                return None
+        if len(text) > 0 and not text.endswith("\n"):
+            text += "\n"
+        return text + new_block
+    start, end = span
+    if not _safe_to_replace(text[start:end]):
+        return None
+    return text[:start] + new_block + text[end:]
+
+
+def remove_block(text: str, key: str) -> Union[None, str]:
+    """Removes the top-level block `key` of a YAML document, leaving the rest of the
+    document byte-identical
+
+    Parameters
+    ----------
+    text:
+        YAML document
+    key:
+        Top-level key whose block is removed
+
+    Returns
+    -------
+    None, str:
+        The patched document (unchanged if `key` is absent), or None if the block
+        cannot be safely removed
+    """
+
+    head = re.compile(r"^{}:(\s|$)".format(re.escape(key)), re.MULTILINE)
+    span = find_block(text, key)
+    if span == None:
+        return None if head.search(text) else text
+    start, end = span
+    if not _safe_to_replace(text[start:end]):
+        return None
+    return text[:start] + text[end:]
+
+
+def patch_scalar(
+    text: str, parent: str, key: str, value, render: Callable
+) -> Union[None, str]:
+    """Replaces (or inserts) the scalar value of `parent.key`, where `parent` is a
+    top-level key, leaving the rest of the line (e.g., trailing comments) and of the
+    document byte-identical
+
+    Parameters
+    ----------
+    text:
+        YAML document
+    parent:
+        Top-level key containing `key`
+    key:
+        Key of the scalar in the `parent` block
+    value:
+        New scalar value
+    render:
+        Function that renders a dictionary as a YAML string
+
+    Returns
+    -------
+    None, str:
+        The patched document, or None if the value cannot be safely patched
+    """
+
+    rendered = render({key: value}).strip()
+    prefix = "{}: ".format(key)
+    if "\n" in rendered or not rendered.startswith(prefix):
+        return None
+    new_value = rendered[len(prefix) :]
+
+    span = find_block(text, parent)
+    if span == None:
+        return None
+    start, end = span
+    block = text[start:end]
+    if "\t" in block:
+        return None
+    lines = _lines(block)
+    if lines[0].rstrip("\r\n").split("#")[0].strip() != "{}:".format(parent):
+        # flow style or scalar parent value
+        return None
+    children = [line for line in lines[1:] if _is_content(line)]
+    child_indent = _indent(children[0]) if len(children) > 0 else 2
+    head = re.compile(r"^ {{{}}}{}:(\s|$)".format(child_indent, re.escape(key)))
+    matches = [i for i, line in enumerate(lines) if head.match(line)]
+    if len(matches) > 1:
+        return None
+    if len(matches) == 0:
+        first = lines[0] if lines[0].endswith("\n") else lines[0] + "\n"
+        new_line = " " * child_indent + prefix + new_value + "\n"
+        lines = [first, new_line] + lines[1:]
+        return text[:start] + "".join(lines) + text[end:]
+
+    i = matches[0]
+    line = lines[i]
+    ending = line[len(line.rstrip("\r\n")) :]
+    match = _scalar_line.match(line.rstrip("\r\n"))
+    if match == None or len(match.group("value").strip()) == 0:
+        return None
+    if _anchor.search(match.group("value")):
+        return None
+    lines[i] = match.group("head") + new_value + (match.group("tail") or "") + ending
+    return text[:start] + "".join(lines) + text[end:]
@@ -0,0 +1,3 @@
+# Only the light-weight client is imported here. The server, which loads the whole
+# container, lives in aed.daemon.server.
+from .client import AED_SOCKET_ENV, default_socket, request, response_error
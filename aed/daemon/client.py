@@ -0,0 +1,76 @@
+import os
+import json
+import socket
+from typing import Union
+
+AED_SOCKET_ENV = "AED_SOCKET"
+
+_exceptions = {
+    "KeyError": KeyError,
+    "ValueError": ValueError,
+    "IndexError": IndexError,
+    "FileNotFoundError": FileNotFoundError,
+    "RuntimeError": RuntimeError,
+}
+
+
+def default_socket() -> str:
+    """Path of the daemon socket: `$AED_SOCKET` if set, else `aed.sock` in
+    `$XDG_RUNTIME_DIR`, else a per-user socket in the temporary directory
+    """
+    if os.environ.get(AED_SOCKET_ENV):
+        return os.environ[AED_SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "aed.sock")
+    return os.path.join("/tmp", "aed-{}.sock".format(os.getuid()))
+
+
+def request(
+    message: dict, socket_fn: str = None, timeout: float = 5.0
+) -> Union[None, dict]:
+    """Sends a request to a running `aed daemon` and waits for its response. Requests
+    and responses are JSON objects, one per line, e.g. :
+
+        {"op": "apply", "colors": "/path/to/dark.yml", "opacity": 0.9}
+        {"ok": true}
+
+    Parameters
+    ----------
+    message:
+        Request, with the operation in "op" (see `aed.daemon.server.AedDaemon`)
+    socket_fn:
+        Path of the daemon socket. Defaults to `default_socket()`.
+    timeout:
+        Seconds to wait for the daemon
+
+    Returns
+    -------
+    None, dict:
+        The response, or None if no daemon is listening on the socket
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        try:
+            client.connect(socket_fn or default_socket())
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        client.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(65536)
+            if len(chunk) == 0:
+                break
+            data += chunk
+    finally:
+        client.close()
+    return json.loads(data.decode("utf-8"))
+
+
+def response_error(response: dict) -> Union[None, BaseException]:
+    """Returns the exception reported in a daemon response, or None if it succeeded"""
+    if response.get("ok"):
+        return None
+    exception = _exceptions.get(response.get("type"), RuntimeError)
+    return exception(response.get("error", "unknown daemon error"))
@@ -0,0 +1,152 @@
+import os
+import json
+import threading
+import socketserver
+from typing import Union
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.profiles import load_profiles
+from .client import default_socket, request
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # seconds a client may take to send a request
+    timeout = 5.0
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line.decode("utf-8"))
+                if not isinstance(message, dict):
+                    raise ValueError("Requests must be JSON objects.")
+            except ValueError as exception:
+                message = {}
+                response = {"ok": False, "type": "ValueError", "error": str(exception)}
+            else:
+                response = self.server.daemon.handle(message)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if message.get("op") == "shutdown":
+                self.server.daemon.stop()
+                return
+
+
+class _Server(socketserver.UnixStreamServer):
+    # requests are handled one at a time, so that changes never interleave
+    allow_reuse_address = True
+
+
+class AedDaemon(object):
+    """Resident process keeping an `AlacrittyContainer`, with its parsed configuration,
+    theme indexes and theme cache, in memory, and applying the requests of thin
+    clients (see `aed.daemon.request`) sent over a Unix socket. The theme directories
+    and the configuration file are watched, so that changes made on disk are picked
+    up before every request.
+
+    Operations (the "op" of a request):
+
+        ping                          -> {"ok": true, "pid": ...}
+        apply (colors, font, opacity and/or profile)
+        undo, redo
+        shutdown
+
+    Parameters
+    ----------
+    container:
+        Container whose configuration is edited
+    socket_fn:
+        Path of the socket to listen on. Defaults to `default_socket()`.
+    """
+
+    def __init__(self, container: AlacrittyContainer, socket_fn: str = None):
+        self.container = container
+        self.socket_fn = socket_fn or default_socket()
+        self.server = None
+
+    def handle(self, message: dict) -> dict:
+        """Applies a single request
+
+        Returns
+        -------
+        response:
+            `{"ok": true}` on success, else `{"ok": false, "type": exception class
+            name, "error": message}`
+        """
+        op = message.get("op")
+        try:
+            self.container.process_watch_events()
+            if op == "ping" or op == "shutdown":
+                exception = None
+            elif op == "apply":
+                exception = self._apply(message)
+            elif op == "undo":
+                exception = self.container.undo()
+            elif op == "redo":
+                exception = self.container.redo()
+            else:
+                exception = ValueError("Unknown operation {}.".format(op))
+        except Exception as error:
+            exception = error
+        if exception != None:
+            error = str(exception)
+            if isinstance(exception, KeyError) and len(exception.args) > 0:
+                # str() of a KeyError is the repr of its message
+                error = str(exception.args[0])
+            return {"ok": False, "type": type(exception).__name__, "error": error}
+        return {"ok": True, "pid": os.getpid()}
+
+    def _apply(self, message: dict) -> Union[None, BaseException]:
+        tx = self.container.transaction()
+        if message.get("profile") != None:
+            profiles = load_profiles()
+            if message["profile"] not in profiles:
+                return KeyError("No profile named {}.".format(message["profile"]))
+            tx.set_profile(profiles[message["profile"]])
+        if message.get("colors") != None:
+            tx.set_colors(message["colors"])
+        if message.get("font") != None:
+            tx.set_font(message["font"])
+        if message.get("opacity") != None:
+            tx.set_opacity(message["opacity"])
+        return tx.commit()
+
+    def _bind(self):
+        """Binds the socket, replacing a stale socket file left by a daemon that
+        exited without cleaning up
+        """
+        if os.path.exists(self.socket_fn):
+            try:
+                response = request({"op": "ping"}, self.socket_fn, timeout=1.0)
+            except (OSError, ValueError):
+                response = None
+            if response != None:
+                raise RuntimeError(
+                    "A daemon is already listening on {}.".format(self.socket_fn)
+                )
+            os.unlink(self.socket_fn)
+        umask = os.umask(0o077)
+        try:
+            self.server = _Server(self.socket_fn, _Handler)
+        finally:
+            os.umask(umask)
+        self.server.daemon = self
+
+    def serve_forever(self):
+        """Listens for requests until a "shutdown" request (or a KeyboardInterrupt)"""
+        self._bind()
+        self.container.watch()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.container.unwatch()
+            self.container.flush()
+            try:
+                os.unlink(self.socket_fn)
+            except FileNotFoundError:
+                pass
+
+    def stop(self):
+        """Makes `serve_forever` return after the current request"""
+        # shutdown() blocks until serve_forever returns, which cannot happen while
+        # the current request (possibly the caller) is handled
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
@@ -0,0 +1,97 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.appliers import IpcApplier, ipc_options
+import json
+import threading
+import socketserver
+import pytest
+
+config = "window:\n  opacity: 0.5  # translucent\ncolors:\n  primary:\n    background: '#000000'\n"
+
+
+class MockAlacritty(socketserver.ThreadingUnixStreamServer):
+    """Stands in for the IPC socket of a running Alacritty instance"""
+
+    def __init__(self, socket_fn):
+        self.messages = []
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(handler):
+                self.messages.append(json.loads(handler.rfile.readline()))
+
+        super().__init__(socket_fn, Handler)
+
+
+@pytest.fixture
+def alacritty(tmp_path):
+    server = MockAlacritty(str(tmp_path / "Alacritty-test.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def wait_for(server, n):
+    for _ in range(100):
+        if len(server.messages) >= n:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_ipc_options():
+    data = {"colors": {"primary": {"background": "#000000"}, "indexed_colors": []}}
+    assert ipc_options(data, [("colors",)]) == [
+        'colors.primary.background="#000000"',
+        "colors.indexed_colors=[]",
+    ]
+
+
+def test_preview_and_commit(tmp_path, alacritty):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text(config)
+    applier = IpcApplier("global", sockets=[alacritty.server_address])
+    ac = AlacrittyContainer(
+        str(config_fn), str(tmp_path), str(tmp_path), runtime_applier=applier
+    )
+    ac.begin_preview()
+    ac.set_opacity(0.8)
+    wait_for(alacritty, 1)
+    assert alacritty.messages == [
+        {"Config": {"options": ["window.opacity=0.8"], "window_id": -1, "reset": False}}
+    ]
+    assert config_fn.read_text() == config
+
+    ac.commit_preview()
+    wait_for(alacritty, 2)
+    assert alacritty.messages[-1]["Config"]["reset"]
+    assert "opacity: 0.8  # translucent" in config_fn.read_text()
+
+
+def test_preview_revert(tmp_path, alacritty):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text(config)
+    applier = IpcApplier("global", sockets=[alacritty.server_address])
+    ac = AlacrittyContainer(
+        str(config_fn), str(tmp_path), str(tmp_path), runtime_applier=applier
+    )
+    ac.begin_preview()
+    ac.set_opacity(0.8)
+    ac.revert_preview()
+    assert ac.alacritty_config["window"]["opacity"] == 0.5
+    assert config_fn.read_text() == config
+
+
+def test_preview_falls_back_to_file(tmp_path):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text(config)
+    applier = IpcApplier("global", sockets=[str(tmp_path / "missing.sock")])
+    ac = AlacrittyContainer(
+        str(config_fn), str(tmp_path), str(tmp_path), runtime_applier=applier
+    )
+    ac.begin_preview()
+    ac.set_opacity(0.8)
+    assert isinstance(ac.runtime_error, ConnectionError)
+    ac.flush()
+    assert "opacity: 0.8" in config_fn.read_text()
+    ac.revert_preview()
+    assert config_fn.read_text() == config
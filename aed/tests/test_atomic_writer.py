@@ -0,0 +1,38 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.atomic_writer import AtomicWriter, atomic_write
+import os
+
+
+def test_atomic_writer_skips_unchanged(tmp_path):
+    fn = tmp_path / "alacritty.yml"
+    fn.write_text("window:\n  opacity: 0.5\n")
+    writer = AtomicWriter(str(fn), fsync=True)
+    assert not writer.write("window:\n  opacity: 0.5\n")
+    assert writer.write("window:\n  opacity: 0.6\n")
+    assert not writer.write("window:\n  opacity: 0.6\n")
+    assert fn.read_text() == "window:\n  opacity: 0.6\n"
+    assert (writer.writes, writer.skipped) == (1, 2)
+    # no temporary files are left behind
+    assert os.listdir(tmp_path) == ["alacritty.yml"]
+
+
+def test_atomic_write_keeps_symlink(tmp_path):
+    target = tmp_path / "real.yml"
+    target.write_text("a: 1\n")
+    os.chmod(target, 0o640)
+    link = tmp_path / "alacritty.yml"
+    link.symlink_to(target)
+    atomic_write(str(link), "a: 2\n")
+    assert link.is_symlink()
+    assert target.read_text() == "a: 2\n"
+    assert os.stat(target).st_mode & 0o777 == 0o640
+
+
+def test_container_skips_identical_dump(tmp_path):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(str(config_fn), str(tmp_path), str(tmp_path))
+    ac.set_opacity(0.6)
+    ac.set_opacity(0.6)
+    assert ac.config_writer.writes == 1
+    assert ac.config_writer.skipped == 1
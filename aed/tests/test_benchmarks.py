@@ -0,0 +1,19 @@
+from aed.benchmarks.suite import bench_size, compare, make_library
+import os
+
+
+def test_make_library(tmp_path):
+    paths = make_library(str(tmp_path), 3)
+    assert len(os.listdir(paths["colors"])) == 3
+    assert len(os.listdir(paths["fonts"])) == 3
+
+
+def test_bench_size_and_compare():
+    results = bench_size(3, repeat=2)
+    assert results["bytes_set_colors"] > 0
+    assert results["tui_construct"]["median"] > 0
+    assert results["fuzzy_filter"]["median"] > 0
+    baseline = {"results": {"3": results}}
+    slower = {"results": {"3": dict(results, construct={"median": 1e3, "min": 1e3})}}
+    rows = compare(baseline, slower)
+    assert [row[1] for row in rows if row[-1]] == ["construct"]
@@ -0,0 +1,60 @@
+import pytest
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.history import History
+from aed.container.bundle import ThemeBundle, pack_library
+
+
+def _library(tmp_path):
+    for name in ["colors", "fonts"]:
+        (tmp_path / name).mkdir()
+    (tmp_path / "colors" / "dark.yml").write_text(
+        "colors:\n  primary:\n    background: '#000000'\n"
+    )
+    (tmp_path / "colors" / "bad.yml").write_text("colors:\n  nope: 1\n")
+    (tmp_path / "colors" / "broken.yml").write_text("colors: [\n")
+    (tmp_path / "fonts" / "mono.yml").write_text("font:\n  size: 11.0\n")
+    bundle_fn = str(tmp_path / "themes.aedpack")
+    skipped = pack_library(str(tmp_path / "colors"), str(tmp_path / "fonts"), bundle_fn)
+    assert [fn for fn, _ in skipped] == [str(tmp_path / "colors" / "broken.yml")]
+    return ThemeBundle(bundle_fn)
+
+
+def test_bundle(tmp_path):
+    bundle = _library(tmp_path)
+    assert bundle.names("colors") == ["bad", "dark"]
+    assert bundle.names("font") == ["mono"]
+    data, exception = bundle.load("dark", "colors")
+    assert exception == None
+    assert data["colors"]["primary"]["background"] == "#000000"
+    _, exception = bundle.load("bad", "colors")
+    assert isinstance(exception, KeyError)
+    assert bundle.load_fn(bundle.theme_fn("mono", "font"))[0]["font"]["size"] == 11.0
+    with pytest.raises(FileNotFoundError):
+        bundle.load("missing", "colors")
+    bundle.close()
+
+    (tmp_path / "other.aedpack").write_bytes(b"not a bundle")
+    with pytest.raises(ValueError):
+        ThemeBundle(str(tmp_path / "other.aedpack"))
+
+
+def test_container_bundle(tmp_path):
+    bundle = _library(tmp_path)
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "missing"),
+        str(tmp_path / "missing"),
+        write_interval=0,
+        history=History(
+            str(tmp_path / "alacritty.yml"), str(tmp_path / "history.json")
+        ),
+        bundle=bundle,
+    )
+    assert sorted(ac.colors.keys()) == ["bad", "dark"]
+    assert isinstance(ac.set_colors(ac.colors["bad"]), KeyError)
+    ac.set_named_colors("dark")
+    ac.flush()
+    config = AlacrittyContainer.load_yaml(str(tmp_path / "alacritty.yml"))
+    assert config["colors"]["primary"]["background"] == "#000000"
+    assert config["window"]["opacity"] == 0.5
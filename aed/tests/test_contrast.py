@@ -0,0 +1,110 @@
+import pytest
+import threading
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.similar import PaletteIndex
+from aed.container.contrast import (
+    ContrastScore,
+    contrast_scores,
+    luminances,
+    relative_luminance,
+)
+
+THEMES = {
+    "readable": "colors:\n  primary:\n    background: '#ffffff'\n    foreground: '#000000'\n  normal:\n    red: '#777777'\n    black: '#ffffff'\n",
+    "faded": "colors:\n  primary:\n    background: '#000000'\n    foreground: '#222222'\n",
+    "named": "colors:\n  primary:\n    background: CellForeground\n",
+}
+
+
+def _container(tmp_path):
+    (tmp_path / "colors").mkdir()
+    for name, text in THEMES.items():
+        (tmp_path / "colors" / "{}.yml".format(name)).write_text(text)
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    return AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        palette_index=PaletteIndex(str(tmp_path / "palettes.json"), use_numpy=False),
+    )
+
+
+def test_contrast_ratio():
+    assert relative_luminance("#ffffff") == pytest.approx(1.0)
+    assert relative_luminance("CellBackground") == None
+    rows = [luminances({"primary": {}})]
+    rows.append(
+        luminances(
+            {
+                "primary": {"background": "#ffffff", "foreground": "#000000"},
+                "normal": {"red": "#777777", "black": "#ffffff"},
+            }
+        )
+    )
+    assert contrast_scores(rows) == [
+        ContrastScore(None, None),
+        ContrastScore(pytest.approx(21.0), pytest.approx(4.48, abs=0.01)),
+    ]
+
+
+def test_contrast_scores(tmp_path):
+    ac = _container(tmp_path)
+    scores = ac.contrast_scores()
+    assert scores["readable"] == (pytest.approx(21.0), pytest.approx(4.48, abs=0.01))
+    assert scores["faded"].primary < 1.5 and scores["faded"].ansi == None
+    assert scores["named"] == (None, None)
+    # scores are cached per file
+    assert ac.contrast_score("faded") == scores["faded"]
+    index = PaletteIndex(str(tmp_path / "palettes.json"), use_numpy=False)
+    index.update(ac.colors, lambda fn: pytest.fail("scores not cached"))
+    assert index.contrasts() == scores
+
+
+def test_numpy_contrast(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    rows = [
+        luminances(AlacrittyContainer.load_yaml(str(fn))["colors"])
+        for fn in sorted(_container(tmp_path).colors.values())
+    ]
+    for vectorized, score in zip(contrast_scores(rows, numpy), contrast_scores(rows)):
+        for a, b in zip(vectorized, score):
+            assert (a == None and b == None) or a == pytest.approx(b)
+
+
+def test_tui_shows_scores(tmp_path, monkeypatch):
+    from aed.tui.alacritty_tui import Tui
+    import urwid
+
+    ac = _container(tmp_path)
+    threads = set()
+    contrast_score = ac.contrast_score
+    monkeypatch.setattr(
+        ac,
+        "contrast_score",
+        lambda name: threads.add(threading.current_thread()) or contrast_score(name),
+    )
+    tuis = []
+    setup = Tui._setup
+    monkeypatch.setattr(Tui, "_setup", lambda tui: tuis.append(tui) or setup(tui))
+
+    def labels() -> dict:
+        texts = {}
+        for i, name in enumerate(tuis[0].color_walker.names):
+            columns = tuis[0].color_walker._widget(i).original_widget
+            texts[name] = columns.contents[1][0].text
+        return texts
+
+    def run(loop):
+        # scores are computed in the background, off the event loop, and are not
+        # shown as pending writes
+        assert "\N{HORIZONTAL ELLIPSIS}" in labels().values()
+        assert "pending" not in tuis[0].status.text
+        tuis[0].scores.drain()
+        assert labels() == {"faded": "1.3!", "named": "-", "readable": "21.0 "}
+
+    monkeypatch.setattr(urwid.MainLoop, "run", run)
+    Tui(ac)
+    assert threading.current_thread() not in threads
+    assert tuis[0].io.in_flight == tuis[0].scores.in_flight == 0
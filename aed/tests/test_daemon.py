@@ -0,0 +1,77 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History
+from aed.daemon import request, response_error
+from aed.daemon.server import AedDaemon
+import os
+import sys
+import json
+import threading
+import subprocess
+import pytest
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    (tmp_path / "dark.yml").write_text("colors:\n  primary:\n    background: '#000'\n")
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        history=History(str(tmp_path / "alacritty.yml"), None),
+    )
+    daemon = AedDaemon(ac, str(tmp_path / "aed.sock"))
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(daemon.socket_fn):
+            break
+        thread.join(0.01)
+    yield daemon
+    request({"op": "shutdown"}, daemon.socket_fn)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not os.path.exists(daemon.socket_fn)
+
+
+def test_daemon_requests(daemon, tmp_path):
+    socket_fn = daemon.socket_fn
+    assert request({"op": "ping"}, socket_fn)["pid"] == os.getpid()
+    response = request(
+        {"op": "apply", "colors": str(tmp_path / "dark.yml"), "opacity": 0.8},
+        socket_fn,
+    )
+    assert response_error(response) == None
+    config = AlacrittyContainer.load_yaml(str(tmp_path / "alacritty.yml"))
+    assert config["window"]["opacity"] == 0.8
+    assert config["colors"]["primary"]["background"] == "#000"
+
+    exception = response_error(request({"op": "apply", "opacity": 2}, socket_fn))
+    assert isinstance(exception, ValueError)
+    assert isinstance(response_error(request({"op": "nope"}, socket_fn)), ValueError)
+
+    assert response_error(request({"op": "undo"}, socket_fn)) == None
+    config = AlacrittyContainer.load_yaml(str(tmp_path / "alacritty.yml"))
+    assert config["window"]["opacity"] == 0.5
+
+
+def test_no_daemon(tmp_path):
+    assert request({"op": "ping"}, str(tmp_path / "missing.sock")) == None
+
+
+def test_client_imports_are_light():
+    # the CLI only imports the container when it edits the configuration itself
+    script = "import sys, json; import aed.bin.__main__; print(json.dumps(sorted(sys.modules)))"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = json.loads(out.stdout)
+    for module in ["aed.container.alacritty_container", "yaml", "ruamel", "urwid"]:
+        assert module not in modules
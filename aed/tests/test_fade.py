@@ -0,0 +1,109 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History
+from aed.container.fade import interpolate_palettes, play_frames
+import pytest
+
+CONFIG = """# mine
+window:
+  opacity: 0.5   # keep me
+colors:
+  primary:
+    background: '#000000'
+    foreground: CellForeground
+"""
+
+
+def test_interpolate_palettes():
+    start = {"primary": {"background": "#000000", "foreground": "#ffffff"}}
+    end = {
+        "primary": {"background": "#ffffff", "foreground": "CellBackground"},
+        "normal": {"red": "#ff0000"},
+    }
+    palettes = interpolate_palettes(start, end, 4)
+    assert [palette["primary"]["background"] for palette in palettes] == [
+        "#404040",
+        "#808080",
+        "#bfbfbf",
+        "#ffffff",
+    ]
+    # values that cannot be interpolated switch on the first frame
+    assert palettes[0]["primary"]["foreground"] == "CellBackground"
+    assert palettes[0]["normal"]["red"] == "#ff0000"
+    assert palettes[-1] == end
+    assert start["primary"]["background"] == "#000000"
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_play_frames_drops_late_frames():
+    clock = FakeClock()
+    written = []
+
+    def slow_write(palette):
+        written.append(palette)
+        # every write takes two and a half frames
+        clock.now += 0.25
+
+    count = play_frames(slow_write, list(range(10)), 10, clock, clock.sleep)
+    assert count == len(written) == 4
+    assert written == [0, 2, 5, 7]
+    assert clock.now == 1.0
+
+    clock = FakeClock()
+    count = play_frames(lambda palette: None, list(range(5)), 10, clock, clock.sleep)
+    assert count == 5 and clock.now == 0.5
+
+
+def test_fade_colors(tmp_path):
+    (tmp_path / "alacritty.yml").write_text(CONFIG)
+    (tmp_path / "white.yml").write_text(
+        "colors:\n  primary:\n    background: '#ffffff'\n"
+    )
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        history=History(str(tmp_path / "alacritty.yml"), str(tmp_path / "h.json")),
+    )
+    texts = []
+    write = ac.config_writer.write
+    ac.config_writer.write = lambda text: texts.append(text) or write(text)
+    clock = FakeClock()
+    white_fn = str(tmp_path / "white.yml")
+    assert ac.fade_colors(white_fn, 3, 10, clock, clock.sleep) == None
+    assert len(texts) == 3
+    # the two intermediate frames are written a frame apart
+    assert clock.sleeps == [pytest.approx(0.1)] * 2
+    for text in texts:
+        # only the colors block is rewritten
+        assert text.startswith("# mine\nwindow:\n  opacity: 0.5   # keep me\n")
+    assert "#555555" in texts[0] and "#aaaaaa" in texts[1]
+    assert ac.alacritty_config["colors"] == {"primary": {"background": "#ffffff"}}
+
+    # the fade is undone as a single change
+    assert ac.undo() == None
+    assert ac.alacritty_config["colors"]["primary"]["background"] == "#000000"
+    assert isinstance(ac.undo(), IndexError)
+
+
+def test_fade_needs_colors(monkeypatch, capsys):
+    from aed.bin.__main__ import main
+
+    monkeypatch.setattr("sys.argv", ["aed", "--fade", "2"])
+    with pytest.raises(SystemExit) as exit:
+        main()
+    assert exit.value.code == 2
+    assert "--fade needs --colors" in capsys.readouterr().err
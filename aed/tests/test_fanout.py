@@ -0,0 +1,73 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.fanout import apply_to_targets, expand_targets
+
+
+def _targets(tmp_path, count, bindings=0):
+    for i in range(count):
+        (tmp_path / "host{}".format(i)).mkdir()
+        (tmp_path / "host{}".format(i) / "alacritty.yml").write_text(
+            "# host {}\nwindow:\n  opacity: 0.5\n".format(i)
+            + "key_bindings:\n" * (bindings > 0)
+            + "".join(
+                "  - {{ key: K{0}, mods: Control|Shift, action: A{0} }}\n".format(k)
+                for k in range(bindings)
+            )
+        )
+    (tmp_path / "dark.yml").write_text("colors:\n  primary:\n    background: '#000'\n")
+    return expand_targets(
+        [str(tmp_path / "host*" / "alacritty.yml"), str(tmp_path / "host0/*.yml")]
+    )
+
+
+def test_fan_out(tmp_path):
+    targets = _targets(tmp_path, 4)
+    assert len(targets) == 4
+    cache = ThemeCache(str(tmp_path / "cache.json"))
+    results = apply_to_targets(
+        targets + [str(tmp_path / "missing.yml")],
+        colors=str(tmp_path / "dark.yml"),
+        opacity=0.8,
+        theme_cache=cache,
+    )
+    # the theme is parsed once for all targets
+    assert cache.misses == 1
+    assert [result.error == None for result in results] == [True] * 4 + [False]
+    assert all(result.written for result in results[:4])
+    for i, fn in enumerate(targets):
+        text = open(fn).read()
+        assert text.startswith("# host {}\n".format(i))
+        config = AlacrittyContainer.load_yaml(fn)
+        assert config["window"]["opacity"] == 0.8
+        assert config["colors"]["primary"]["background"] == "#000"
+
+    # unchanged targets are not rewritten
+    results = apply_to_targets(targets, opacity=0.8, theme_cache=cache)
+    assert not any(result.written for result in results)
+
+
+def test_fan_out_validates_first(tmp_path):
+    targets = _targets(tmp_path, 2)
+    (tmp_path / "bad.yml").write_text("colors:\n  nope: 1\n")
+    cache = ThemeCache(str(tmp_path / "cache.json"))
+    exception = apply_to_targets(
+        targets, colors=str(tmp_path / "bad.yml"), theme_cache=cache
+    )
+    assert isinstance(exception, KeyError)
+    assert isinstance(apply_to_targets(targets, opacity=3), ValueError)
+    for fn in targets:
+        assert AlacrittyContainer.load_yaml(fn)["window"]["opacity"] == 0.5
+
+
+def test_fan_out_many_targets(tmp_path):
+    # large enough that the targets parse and dump at the same time
+    targets = _targets(tmp_path, 24, bindings=60)
+    results = apply_to_targets(
+        targets, colors=str(tmp_path / "dark.yml"), opacity=0.8, workers=24
+    )
+    assert [result.error for result in results] == [None] * 24
+    for fn in targets:
+        config = AlacrittyContainer.load_yaml(fn)
+        assert config["window"]["opacity"] == 0.8
+        assert config["colors"]["primary"]["background"] == "#000"
+        assert len(config["key_bindings"]) == 60
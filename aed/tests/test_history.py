@@ -0,0 +1,106 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History, diff, apply_ops
+import copy
+import json
+
+
+def _container(tmp_path, history=None):
+    for name in ["dark", "light"]:
+        (tmp_path / "{}.yml".format(name)).write_text(
+            "colors:\n  primary:\n    background: '{}'\n    foreground: '#808080'\n".format(
+                "#000000" if name == "dark" else "#ffffff"
+            )
+        )
+    return AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        history=history
+        or History(str(tmp_path / "alacritty.yml"), str(tmp_path / "history.json")),
+    )
+
+
+def test_diff_roundtrip():
+    old = {"a": {"b": 1, "c": [1, 2], "d": "x"}, "e": 2}
+    new = {"a": {"b": 1, "c": [1, 3], "f": "y"}, "g": 3}
+    ops = diff(old, new)
+    # unchanged values are not recorded
+    assert sorted(op["p"] for op in ops) == [
+        ["a", "c"],
+        ["a", "d"],
+        ["a", "f"],
+        ["e"],
+        ["g"],
+    ]
+    config = copy.deepcopy(old)
+    assert apply_ops(config, ops) and config == new
+    assert apply_ops(config, ops, reverse=True) and config == old
+    # ops only apply to the values they were recorded from
+    assert not apply_ops(config, ops, reverse=True)
+
+
+def test_undo_redo(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = _container(tmp_path)
+    ac.set_named_colors("dark")
+    ac.set_named_colors("light")
+    for step in range(5):
+        ac.set_opacity(0.6 + step / 100, deferred=True)
+    ac.flush()
+
+    # the colors change only records the changed background
+    assert ac.history._undo[1] == [
+        {"p": ["colors", "primary", "background"], "o": "#000000", "n": "#ffffff"}
+    ]
+    # consecutive deferred opacity steps are undone at once
+    assert ac.undo() == None
+    assert ac.load_yaml(ac.config_fn)["window"]["opacity"] == 0.5
+    assert ac.undo() == None
+    assert ac.alacritty_config["colors"]["primary"]["background"] == "#000000"
+    assert ac.redo() == None
+    assert ac.alacritty_config["colors"]["primary"]["background"] == "#ffffff"
+
+    # the history is persisted
+    journal = json.loads((tmp_path / "history.json").read_text())
+    assert len(journal[str(tmp_path / "alacritty.yml")]["redo"]) == 1
+    ac = _container(tmp_path)
+    assert ac.redo() == None
+    assert ac.alacritty_config["window"]["opacity"] == 0.64
+    assert isinstance(ac.redo(), IndexError)
+
+
+def test_undo_after_external_edit(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = _container(tmp_path)
+    ac.set_opacity(0.8)
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.3\n")
+    ac = _container(tmp_path)
+    assert isinstance(ac.undo(), ValueError)
+    assert not ac.history.can_undo
+    assert ac.alacritty_config["window"]["opacity"] == 0.3
+
+
+def test_history_capacity(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = _container(
+        tmp_path, History(str(tmp_path / "alacritty.yml"), None, capacity=3)
+    )
+    for step in range(10):
+        ac.set_opacity(step / 10)
+    assert len(ac.history._undo) == 3
+
+
+def test_default_history_is_in_memory(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+    assert ac.history.journal_fn == None
+    ac.set_opacity(0.8)
+    assert ac.undo() == None
+    assert ac.alacritty_config["window"]["opacity"] == 0.5
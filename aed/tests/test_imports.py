@@ -0,0 +1,88 @@
+import os
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History
+
+CONFIG = """# hand-tuned config
+window:
+  opacity: 0.5
+
+colors:
+  primary:
+    background: '#123456'
+"""
+
+
+def _container(tmp_path):
+    for name in ["colors", "fonts"]:
+        (tmp_path / name).mkdir()
+    for name, background in [("dark", "#000000"), ("light", "#ffffff")]:
+        (tmp_path / "colors" / "{}.yml".format(name)).write_text(
+            "colors:\n  primary:\n    background: '{}'\n".format(background)
+        )
+    (tmp_path / "colors" / "bad.yml").write_text("colors:\n  nope: 1\n")
+    (tmp_path / "fonts" / "mono.yml").write_text("font:\n  size: 11.0\n")
+    (tmp_path / "alacritty.yml").write_text(CONFIG)
+    return AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path / "fonts"),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        history=History(
+            str(tmp_path / "alacritty.yml"), str(tmp_path / "history.json")
+        ),
+        imports=True,
+    )
+
+
+def test_enable_imports(tmp_path):
+    ac = _container(tmp_path)
+    assert ac.enable_imports() == None
+    text = (tmp_path / "alacritty.yml").read_text()
+    assert text.startswith("# hand-tuned config\nwindow:\n  opacity: 0.5\n")
+    config = AlacrittyContainer.load_yaml(str(tmp_path / "alacritty.yml"))
+    assert "colors" not in config
+    assert config["import"] == [
+        str(tmp_path / "aed-colors.yml"),
+        str(tmp_path / "aed-font.yml"),
+    ]
+    # the colors block was moved into the imported file
+    colors = AlacrittyContainer.load_yaml(str(tmp_path / "aed-colors.yml"))
+    assert colors["colors"]["primary"]["background"] == "#123456"
+
+    # set up only once
+    stat = os.stat(str(tmp_path / "alacritty.yml"))
+    assert ac.enable_imports() == None
+    assert os.stat(str(tmp_path / "alacritty.yml")).st_mtime_ns == stat.st_mtime_ns
+
+
+def test_symlink_swap(tmp_path):
+    ac = _container(tmp_path)
+    assert ac.set_named_colors("dark") == None
+    text = (tmp_path / "alacritty.yml").read_text()
+    assert ac.set_named_colors("light") == None
+    assert ac.set_named_font("mono") == None
+    # the configuration is not touched by swaps
+    assert (tmp_path / "alacritty.yml").read_text() == text
+    assert os.readlink(str(tmp_path / "aed-colors.yml")) == ac.colors["light"]
+    assert os.readlink(str(tmp_path / "aed-font.yml")) == ac.fonts["mono"]
+
+    assert isinstance(ac.set_named_colors("bad"), KeyError)
+    assert os.readlink(str(tmp_path / "aed-colors.yml")) == ac.colors["light"]
+
+
+def test_imports_preview(tmp_path):
+    ac = _container(tmp_path)
+    assert ac.enable_imports() == None
+    ac.begin_preview()
+    ac.set_named_colors("dark")
+    ac.set_named_colors("light")
+    ac.revert_preview()
+    assert not os.path.islink(str(tmp_path / "aed-colors.yml"))
+    colors = AlacrittyContainer.load_yaml(str(tmp_path / "aed-colors.yml"))
+    assert colors["colors"]["primary"]["background"] == "#123456"
+
+    ac.begin_preview()
+    ac.set_named_colors("dark")
+    ac.commit_preview()
+    assert os.readlink(str(tmp_path / "aed-colors.yml")) == ac.colors["dark"]
@@ -0,0 +1,130 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.similar import PaletteIndex
+from aed.tui.io_queue import IOQueue
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import urwid
+import pytest
+
+
+def _blocked(queue: IOQueue) -> threading.Event:
+    """Occupies the queue until the returned event is set"""
+    release = threading.Event()
+    queue.submit(lambda: release.wait(5))
+    return release
+
+
+def test_superseded_jobs_are_skipped():
+    queue = IOQueue(lambda callback: None)
+    release = _blocked(queue)
+    ran, delivered = [], []
+    for i in range(5):
+        queue.submit(lambda i=i: ran.append(i) or i, delivered.append, key="opacity")
+    assert queue.in_flight == 6
+    release.set()
+    queue.drain()
+    assert ran == [4]
+    assert delivered == [4]
+    assert queue.in_flight == 0
+
+
+def test_jobs_without_key_are_barriers():
+    queue = IOQueue(lambda callback: None)
+    release = _blocked(queue)
+    ran = []
+    queue.submit(lambda: ran.append("a"), key="colors")
+    queue.submit(lambda: ran.append("undo"))
+    queue.submit(lambda: ran.append("b"), key="colors")
+    queue.submit(lambda: ran.append("c"), key="colors")
+    release.set()
+    queue.drain()
+    assert ran == ["a", "undo", "c"]
+
+
+def test_stale_results_never_win():
+    # with several workers, the newer job waits for the older one to finish
+    queue = IOQueue(lambda callback: None, ThreadPoolExecutor(max_workers=2))
+    state, delivered = [], []
+    started, release = threading.Event(), threading.Event()
+
+    def old():
+        started.set()
+        release.wait(5)
+        state.append("old")
+        return "old"
+
+    queue.submit(old, delivered.append, key="colors")
+    started.wait(5)
+    queue.submit(lambda: state.append("new") or "new", delivered.append, key="colors")
+    release.set()
+    queue.drain()
+    assert state == ["old", "new"]
+    assert delivered == ["new"]
+
+
+def test_errors():
+    changes = []
+    queue = IOQueue(lambda callback: None, on_change=lambda: changes.append(1))
+
+    def fail():
+        raise OSError("disk full")
+
+    queue.submit(fail, key="opacity")
+    queue.drain()
+    assert str(queue.errors["opacity"]) == "disk full"
+    queue.submit(lambda: None, key="opacity")
+    queue.drain()
+    assert queue.errors == {}
+    assert len(changes) == 2
+
+
+def test_cancel_drops_queued_jobs():
+    queue = IOQueue(lambda callback: None)
+    release = _blocked(queue)
+    ran, delivered = [], []
+    for i in range(3):
+        queue.submit(lambda i=i: ran.append(i), delivered.append)
+    # the running job is waited for, and ends after the others are dropped
+    threading.Timer(0.1, release.set).start()
+    queue.cancel()
+    assert queue.in_flight == 0
+    assert ran == delivered == []
+    queue.submit(lambda: ran.append("after"))
+    queue.drain()
+    assert ran[-1] == "after"
+
+
+def test_tui_writes_in_background(tmp_path, monkeypatch):
+    from aed.tui.alacritty_tui import Tui
+
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    monkeypatch.setattr(urwid.MainLoop, "run", lambda loop: None)
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        palette_index=PaletteIndex(str(tmp_path / "palettes.json")),
+        write_interval=0,
+    )
+    tui = Tui(ac)
+    release = _blocked(tui.io)
+    for _ in range(10):
+        tui._handle_input("-")
+    assert tui.opacity == pytest.approx(0.4)
+    assert "[11 pending]" in tui.status.text
+    release.set()
+    tui.io.drain()
+    assert "pending" not in tui.status.text
+    assert ac.config_writer.writes == 1
+    written = AlacrittyContainer.load_yaml(ac.config_fn)
+    assert written["window"]["opacity"] == pytest.approx(0.4)
+
+    def fail(opacity, deferred=False):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ac, "set_opacity", fail)
+    tui._handle_input("+")
+    tui.io.drain()
+    assert "[failed: disk full]" in tui.status.text
@@ -0,0 +1,93 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.prefetch import ThemePrefetcher
+import os
+import threading
+import pytest
+
+
+def test_prefetcher_lru():
+    loaded = []
+    release = threading.Event()
+
+    def loader(theme_fn, kind):
+        release.wait(1)
+        loaded.append(theme_fn)
+        return {kind: {"name": theme_fn}}, None
+
+    prefetcher = ThemePrefetcher(loader, max_workers=1, capacity=2)
+    prefetcher.prefetch(["a", "b", "c"], "colors")
+    release.set()
+    # "a" was evicted, "b" and "c" are served from memory
+    assert prefetcher.get("c", "colors")[0] == {"colors": {"name": "c"}}
+    assert prefetcher.get("b", "colors")[0] == {"colors": {"name": "b"}}
+    assert (prefetcher.hits, prefetcher.misses) == (2, 0)
+    data, exception = prefetcher.get("a", "colors")
+    assert exception == None
+    assert prefetcher.misses == 1
+    assert sorted(set(loaded)) == ["a", "b", "c"]
+
+    # results are copies
+    data["colors"]["name"] = "changed"
+    assert prefetcher.get("a", "colors")[0] == {"colors": {"name": "a"}}
+    prefetcher.shutdown()
+
+
+def test_container_prefetch(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    for name in ["dark", "light"]:
+        (tmp_path / "{}.yml".format(name)).write_text(
+            "colors:\n  primary:\n    background: '#000000'\n"
+        )
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+    ac.enable_prefetch()
+    ac.prefetch_named("colors", ["dark", "light", "missing"])
+    ac.set_named_colors("light")
+    assert (ac.prefetcher.hits, ac.prefetcher.misses) == (1, 0)
+    with pytest.raises(FileNotFoundError):
+        ac.prefetcher.get(str(tmp_path / "missing.yml"), "colors")
+    ac.prefetcher.shutdown()
+
+
+def test_failed_prefetch_is_retried():
+    attempts = []
+
+    def loader(theme_fn, kind):
+        attempts.append(theme_fn)
+        if len(attempts) == 1:
+            raise ValueError("truncated file")
+        return {kind: {"name": theme_fn}}, None
+
+    prefetcher = ThemePrefetcher(loader, max_workers=1)
+    prefetcher.prefetch(["a"], "colors")
+    assert prefetcher.get("a", "colors")[0] == {"colors": {"name": "a"}}
+    assert (prefetcher.hits, prefetcher.misses) == (0, 1)
+    assert prefetcher.get("a", "colors")[0] == {"colors": {"name": "a"}}
+    assert prefetcher.hits == 1
+    assert len(attempts) == 2
+    prefetcher.shutdown()
+
+
+def test_prefetch_saves_cache_once(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    names = ["theme{}".format(i) for i in range(8)]
+    for name in names:
+        (tmp_path / "{}.yml".format(name)).write_text(
+            "colors:\n  primary:\n    background: '#000000'\n"
+        )
+    cache = ThemeCache(str(tmp_path / "cache"))
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"), str(tmp_path), str(tmp_path), theme_cache=cache
+    )
+    ac.enable_prefetch()
+    ac.prefetch_named("colors", names)
+    for name in names:
+        ac.prefetcher.get(ac.colors[name], "colors")
+    assert not (tmp_path / "cache").exists()
+    ac.disable_prefetch()
+    assert len(os.listdir(cache.cache_dir)) == len(names)
@@ -0,0 +1,76 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.similar import PaletteIndex
+from aed.tui.quantize import parse_hex, nearest_xterm, urwid_color
+import urwid
+import pytest
+
+
+def _xterm_rgb(i):
+    levels = [0, 95, 135, 175, 215, 255]
+    if i >= 232:
+        return (8 + 10 * (i - 232),) * 3
+    i -= 16
+    return (levels[i // 36], levels[(i // 6) % 6], levels[i % 6])
+
+
+@pytest.mark.parametrize(
+    "value, rgb",
+    [
+        ("#1d1f21", (29, 31, 33)),
+        ("0xC5C8C6", (197, 200, 198)),
+        ("#fff", (255, 255, 255)),
+        ("CellBackground", None),
+        (None, None),
+    ],
+)
+def test_parse_hex(value, rgb):
+    assert parse_hex(value) == rgb
+
+
+def test_nearest_xterm_is_exact():
+    # the lookup tables agree with a brute-force search over the palette
+    for rgb in [
+        (0, 0, 0),
+        (29, 31, 33),
+        (204, 102, 102),
+        (18, 200, 77),
+        (250, 250, 249),
+    ]:
+        best = min(
+            range(16, 256),
+            key=lambda i: sum((a - b) ** 2 for a, b in zip(_xterm_rgb(i), rgb)),
+        )
+        assert sum(
+            (a - b) ** 2 for a, b in zip(_xterm_rgb(nearest_xterm(rgb)), rgb)
+        ) == sum((a - b) ** 2 for a, b in zip(_xterm_rgb(best), rgb))
+    assert urwid_color("#cc6666", 2**24) == "#cc6666"
+    assert urwid_color("#ff0000", 256) == "h196"
+
+
+def test_tui_previews_focused_theme(tmp_path, monkeypatch):
+    from aed.tui.alacritty_tui import Tui
+
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    (tmp_path / "red.yml").write_text(
+        "colors:\n  primary:\n    background: '#000000'\n  normal:\n    red: '#ff0000'\n"
+    )
+    monkeypatch.setenv("COLORTERM", "truecolor")
+    monkeypatch.setattr(urwid.MainLoop, "run", lambda loop: None)
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        palette_index=PaletteIndex(str(tmp_path / "palettes.json")),
+    )
+    tui = Tui(ac)
+    tui.preview_theme("red")
+    tui.io.drain()
+    tui.preview_theme("red")
+    # each theme is parsed once, for its contrast score in the menu
+    assert ac.theme_cache.misses == len(ac.colors)
+    red = tui.color_display.swatches[1].get_attr_map()[None]
+    assert red == urwid.AttrSpec("#ff0000", "#ff0000", 2**24)
+    black = tui.color_display.swatches[0].get_attr_map()[None]
+    assert black == "_black"
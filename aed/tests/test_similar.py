@@ -0,0 +1,118 @@
+import pytest
+import urwid
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.similar import PaletteIndex, to_lab, palette
+
+THEME = """colors:
+  primary:
+    background: '{}'
+    foreground: '#c5c8c6'
+  normal:
+    red: '#cc6666'
+"""
+
+
+def _container(tmp_path):
+    (tmp_path / "colors").mkdir()
+    for name, background in [
+        ("black", "#000000"),
+        ("near-black", "#0a0a0a"),
+        ("grey", "#808080"),
+        ("white", "#ffffff"),
+    ]:
+        (tmp_path / "colors" / "{}.yml".format(name)).write_text(
+            THEME.format(background)
+        )
+    (tmp_path / "colors" / "named.yml").write_text(
+        "colors:\n  primary:\n    background: CellForeground\n"
+    )
+    (tmp_path / "alacritty.yml").write_text(
+        "window:\n  opacity: 0.5\n" + THEME.format("#050505")
+    )
+    return AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        write_interval=0,
+        palette_index=PaletteIndex(str(tmp_path / "palettes.json"), use_numpy=False),
+    )
+
+
+def test_to_lab():
+    assert to_lab("#000000") == pytest.approx((0.0, 0.0, 0.0), abs=1e-6)
+    assert to_lab("#fff") == pytest.approx((100.0, 0.0, 0.0), abs=1e-2)
+    assert to_lab("CellBackground") == None
+    lab = palette({"primary": {"background": "#ff0000"}})
+    assert len(lab) == 18 and lab[0][1] > 50 and lab[1] == None
+
+
+def test_similar_colors(tmp_path):
+    ac = _container(tmp_path)
+    ranking = ac.similar_colors()
+    # themes sharing no hex color with the current ones are not ranked
+    assert [name for name, _ in ranking] == ["black", "near-black", "grey", "white"]
+    assert ranking[0][1] < ranking[2][1] < ranking[3][1]
+    assert [name for name, _ in ac.similar_colors(2)] == ["black", "near-black"]
+    white = ac.palette_index.nearest({"primary": {"background": "#fefefe"}}, 1)
+    assert white[0][0] == "white"
+
+    # palettes are converted once and cached on disk
+    index = PaletteIndex(str(tmp_path / "palettes.json"), use_numpy=False)
+    index.update(ac.colors, lambda fn: pytest.fail("palette not cached"))
+    assert index.nearest(ac.current_colors()) == ranking
+
+
+def test_numpy_ranking(tmp_path):
+    pytest.importorskip("numpy")
+    ac = _container(tmp_path)
+    ranking = ac.similar_colors()
+    ac.palette_index = PaletteIndex(str(tmp_path / "palettes.json"))
+    assert ac.palette_index.numpy != None
+    assert ac.similar_colors() == pytest.approx(ranking)
+
+
+def test_tui_similar_sort(tmp_path, monkeypatch):
+    from aed.tui.alacritty_tui import Tui
+
+    monkeypatch.setattr(urwid.MainLoop, "run", lambda loop: None)
+    tui = Tui(_container(tmp_path))
+    assert tui.color_walker.names[0] == "black"
+    tui._handle_input("s")
+    # ranked in the background, the list is reordered once the ranking is done
+    assert tui.status.text.startswith("ranking")
+    tui.io.drain()
+    assert tui.status.text == "sorted by similarity"
+    assert tui.color_walker.names == [
+        "black",
+        "near-black",
+        "grey",
+        "white",
+        "named",
+    ]
+    tui._handle_input("s")
+    assert tui.color_walker.names == sorted(tui.color_walker.names)
+
+
+def test_invalidate(tmp_path):
+    ac = _container(tmp_path)
+    index = ac.palette_index
+    loader = lambda fn: ac._read_theme(fn, "colors")
+    index.update(ac.colors, loader)
+    query = {"primary": {"background": "#ffffff"}}
+    (tmp_path / "colors" / "black.yml").write_text(THEME.format("#fffffe"))
+    # unverified changes are only picked up once invalidated
+    index.update(ac.colors, loader, verify=False)
+    assert index.nearest(query, 1)[0][0] == "white"
+    index.invalidate(ac.colors["black"])
+    index.update(ac.colors, loader, verify=False)
+    assert [name for name, _ in index.nearest(query, 2)] == ["white", "black"]
+
+
+def test_default_index_is_in_memory(tmp_path):
+    ac = _container(tmp_path)
+    ac.palette_index = None
+    assert ac.similar_colors(1)[0][0] == "black"
+    assert ac.palette_index.cache_fn == None
+    ac.save_caches()
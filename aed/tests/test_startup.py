@@ -0,0 +1,71 @@
+from aed.container.alacritty_container import AlacrittyContainer
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+# Start-up budget (in seconds) for importing the CLI and applying an opacity-only
+# change, excluding interpreter start-up. See the "Start-up time" README section.
+STARTUP_BUDGET = 0.25
+
+_script = """
+import sys, time, json
+t0 = time.perf_counter()
+import aed.bin.__main__ as cli
+sys.argv = ["aed", "--opacity", "0.9"]
+cli.main()
+elapsed = time.perf_counter() - t0
+print(json.dumps({"elapsed": elapsed, "urwid": "urwid" in sys.modules}))
+"""
+
+
+@pytest.fixture
+def home(tmp_path):
+    config_dir = tmp_path / ".config" / "alacritty"
+    config_dir.mkdir(parents=True)
+    (config_dir / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    return tmp_path
+
+
+def test_cli_startup_budget(home):
+    # the user's caches, undo journal and running daemon (if any) are left alone
+    env = dict(
+        os.environ,
+        HOME=str(home),
+        XDG_CACHE_HOME=str(home / ".cache"),
+        XDG_STATE_HOME=str(home / ".local" / "state"),
+        AED_SOCKET=str(home / "aed.sock"),
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join([root, env.get("PYTHONPATH", "")])
+    # best of a few runs, to be robust against a cold file system cache
+    results = []
+    for _ in range(3):
+        out = subprocess.run(
+            [sys.executable, "-c", _script],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    assert not any(result["urwid"] for result in results)
+    assert min(result["elapsed"] for result in results) < STARTUP_BUDGET
+    assert "opacity: 0.9" in (home / ".config/alacritty/alacritty.yml").read_text()
+
+
+def test_lazy_theme_indexes(home, monkeypatch):
+    config_fn = str(home / ".config/alacritty/alacritty.yml")
+    globbed = []
+    monkeypatch.setattr(
+        AlacrittyContainer,
+        "get_colors",
+        staticmethod(lambda d: globbed.append(d) or {}),
+    )
+    ac = AlacrittyContainer(config_fn, str(home), str(home))
+    ac.set_opacity(0.7)
+    assert globbed == []
+    assert ac.colors == {}
+    assert ac.colors == {}
+    assert globbed == [str(home)]
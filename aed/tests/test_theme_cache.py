@@ -0,0 +1,138 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+import os
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+
+@pytest.fixture
+def library(tmp_path):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text("window:\n  opacity: 0.5\n")
+    color_dir = tmp_path / "colors"
+    color_dir.mkdir()
+    (color_dir / "dark.yml").write_text(
+        "colors:\n  primary:\n    background: '#000000'\n"
+    )
+    (color_dir / "broken.yml").write_text("colors:\n  weird_key: 1\n")
+    return tmp_path
+
+
+def test_theme_cache_persists(library):
+    cache_dir = str(library / "cache")
+    color_fn = str(library / "colors" / "dark.yml")
+    ac = AlacrittyContainer(
+        str(library / "alacritty.yml"),
+        str(library / "colors"),
+        str(library),
+        theme_cache=ThemeCache(cache_dir),
+    )
+    ac.set_named_colors("dark")
+    ac.set_named_colors("dark")
+    assert (ac.theme_cache.hits, ac.theme_cache.misses) == (1, 1)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # a new cache instance reads the entries back from disk without parsing
+    cache = ThemeCache(cache_dir)
+    loader = lambda fn: pytest.fail("theme was re-parsed")
+    data, exception = cache.get(color_fn, "colors", loader, lambda data: None)
+    assert data["colors"]["primary"]["background"] == "#000000"
+    assert exception == None
+
+
+def test_theme_cache_invalidation(library):
+    cache = ThemeCache(str(library / "themes"))
+    color_fn = library / "colors" / "broken.yml"
+    validator = AlacrittyContainer._validate_colors
+    _, exception = cache.get(
+        str(color_fn), "colors", AlacrittyContainer.load_yaml, validator
+    )
+    assert isinstance(exception, KeyError)
+    _, exception = cache.get(
+        str(color_fn), "colors", AlacrittyContainer.load_yaml, validator
+    )
+    assert isinstance(exception, KeyError)
+    assert cache.misses == 1
+
+    color_fn.write_text("colors:\n  primary:\n    background: '#ffffff'\n")
+    data, exception = cache.get(
+        str(color_fn), "colors", AlacrittyContainer.load_yaml, validator
+    )
+    assert exception == None
+    assert data["colors"]["primary"]["background"] == "#ffffff"
+    assert cache.misses == 2
+
+
+def test_theme_cache_in_memory(library):
+    cache = ThemeCache()
+    color_fn = str(library / "colors" / "broken.yml")
+    for _ in range(2):
+        cache.get(
+            color_fn,
+            "colors",
+            AlacrittyContainer.load_yaml,
+            AlacrittyContainer._validate_colors,
+        )
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.save()
+    assert cache.cache_dir == None
+
+
+def test_theme_cache_parses_concurrently(library):
+    cache = ThemeCache()
+    # both parses have to be in progress at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def loader(theme_fn):
+        barrier.wait()
+        return AlacrittyContainer.load_yaml(theme_fn)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [
+            pool.submit(
+                cache.get,
+                str(library / "colors" / name),
+                "colors",
+                loader,
+                AlacrittyContainer._validate_colors,
+            )
+            for name in ("dark.yml", "broken.yml")
+        ]
+        results = [future.result() for future in futures]
+    assert results[0][1] == None
+    assert isinstance(results[1][1], KeyError)
+    assert cache.misses == 2
+
+
+def test_theme_cache_reads_single_entries(library):
+    cache_dir = str(library / "cache")
+    cache = ThemeCache(cache_dir)
+    validator = AlacrittyContainer._validate_colors
+    for name in ("dark.yml", "broken.yml"):
+        cache.get(
+            str(library / "colors" / name),
+            "colors",
+            AlacrittyContainer.load_yaml,
+            validator,
+        )
+    cache.save()
+    assert len(os.listdir(cache_dir)) == 2
+
+    # only the entry of the requested theme is read
+    cache = ThemeCache(cache_dir)
+    dark_fn = str(library / "colors" / "dark.yml")
+    cache.get(dark_fn, "colors", AlacrittyContainer.load_yaml, validator)
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert list(cache.entries.keys()) == ["colors:" + dark_fn]
+
+    # unreadable entries are parsed again and replaced
+    for fn in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, fn), "w") as stream:
+            stream.write("{")
+    cache = ThemeCache(cache_dir)
+    _, exception = cache.get(dark_fn, "colors", AlacrittyContainer.load_yaml, validator)
+    assert exception == None and cache.misses == 1
+    cache.save()
+    loader = lambda fn: pytest.fail("theme was re-parsed")
+    ThemeCache(cache_dir).get(dark_fn, "colors", loader, validator)
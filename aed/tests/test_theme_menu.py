@@ -0,0 +1,51 @@
+from aed.tui.fuzzy import FuzzyIndex
+from aed.tui.theme_menu import make_theme_menu
+import re
+
+names = ["gruvbox-dark", "gruvbox-light", "tomorrow", "tomorrow-night", "nord"]
+
+
+def test_fuzzy_index():
+    index = FuzzyIndex(names)
+    assert index.filter("") == [0, 1, 2, 3, 4]
+    assert index.filter("t") == [1, 2, 3]
+    assert index.filter("tmn") == [3]
+    assert index.filter("tmnx") == []
+    assert index.filter("GRV") == [0, 1]
+    assert index.filter("oo") == [2, 3]
+    assert index.filter("nd") == [4]
+
+
+def test_fuzzy_index_large():
+    library = [
+        "{}-{}-{}".format(names[i % 5], i, names[(i * 7) % 5]) for i in range(10000)
+    ]
+    index = FuzzyIndex(library)
+    for query in ["n", "no", "nor", "nord"]:
+        matches = index.filter(query)
+    # extending the query only searches the previous matches, see
+    # `aed.benchmarks.suite` for timings
+    index._all = set()
+    for query in ["nord-", "nord-1"]:
+        matches = index.filter(query)
+    expected = [
+        i for i, name in enumerate(library) if re.search("n.*o.*r.*d.*-.*1", name)
+    ]
+    assert len(matches) > 0
+    assert matches == expected
+
+
+def test_theme_menu_is_lazy():
+    clicked = []
+    library = ["theme-{}".format(i) for i in range(10000)]
+    menu = make_theme_menu(library, lambda name, button: clicked.append(name), "T", {})
+    menu.render((30, 12), focus=True)
+    assert len(menu.walker._widgets) < 20
+
+    focused = []
+    menu.walker.focus_callbacks.append(focused.append)
+    menu.walker.set_filter("9999")
+    assert menu.walker.focused_name == "theme-9999"
+    assert focused == ["theme-9999"]
+    menu.keypress((30, 12), "enter")
+    assert clicked == ["theme-9999"]
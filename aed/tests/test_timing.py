@@ -0,0 +1,41 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.history import History
+from aed.container import timing
+import json
+
+
+def test_disabled_spans_are_shared():
+    assert not timing.enabled()
+    assert timing.span("a") is timing.span("b")
+
+
+def test_container_spans(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    (tmp_path / "dark.yml").write_text("colors:\n  primary:\n    background: '#000'\n")
+    profiler = timing.enable()
+    try:
+        ac = AlacrittyContainer(
+            str(tmp_path / "alacritty.yml"),
+            str(tmp_path),
+            str(tmp_path),
+            theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+            history=History(str(tmp_path / "alacritty.yml"), None),
+        )
+        ac.set_named_colors("dark")
+    finally:
+        assert timing.disable() is profiler
+    names = [row[0] for row in profiler.summary()]
+    for name in ["load_config", "get_colors", "load_yaml", "validate_colors"]:
+        assert name in names
+    assert "write_config" in profiler.format_summary()
+
+    # spans recorded after disabling are dropped
+    count = len(profiler.spans)
+    ac.set_opacity(0.7)
+    assert len(profiler.spans) == count
+
+    profiler.write_chrome_trace(str(tmp_path / "trace.json"))
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == count
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
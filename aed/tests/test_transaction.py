@@ -0,0 +1,76 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.profiles import load_profiles, save_profile
+import pytest
+
+config = "window:\n  opacity: 0.5\ncolors:\n  primary:\n    background: '#000000'\n"
+
+
+@pytest.fixture
+def container(tmp_path):
+    (tmp_path / "alacritty.yml").write_text(config)
+    (tmp_path / "colors").mkdir()
+    (tmp_path / "fonts").mkdir()
+    (tmp_path / "colors" / "light.yml").write_text(
+        "colors:\n  primary:\n    background: '#ffffff'\n"
+    )
+    (tmp_path / "fonts" / "big.yml").write_text(
+        "font:\n  size: 14.0\ndraw_bold_text_with_bright_colors: true\n"
+    )
+    (tmp_path / "fonts" / "broken.yml").write_text("font:\n  weird_key: 1\n")
+    return AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path / "fonts"),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+
+
+def test_transaction_single_write(container):
+    with container.transaction() as tx:
+        tx.set_named_colors("light").set_named_font("big").set_opacity(0.9)
+    assert container.config_writer.writes == 1
+    config = AlacrittyContainer.load_yaml(container.config_fn)
+    assert config["colors"]["primary"]["background"] == "#ffffff"
+    assert config["font"]["size"] == 14.0
+    assert config["draw_bold_text_with_bright_colors"]
+    assert config["window"]["opacity"] == 0.9
+
+
+@pytest.mark.parametrize(
+    "stage, expected_exception",
+    [
+        (lambda tx: tx.set_named_font("broken"), KeyError),
+        (lambda tx: tx.set_named_font("missing"), KeyError),
+        (lambda tx: tx.set_opacity(2), ValueError),
+        (lambda tx: tx.set_colors("/missing.yml"), FileNotFoundError),
+    ],
+)
+def test_transaction_validates_up_front(container, stage, expected_exception):
+    tx = container.transaction().set_named_colors("light").set_opacity(0.9)
+    stage(tx)
+    assert isinstance(tx.commit(), expected_exception)
+    assert container.config_writer.writes == 0
+    assert container.alacritty_config["window"]["opacity"] == 0.5
+    assert container.alacritty_config["colors"]["primary"]["background"] == "#000000"
+
+
+def test_transaction_discarded_on_error(container):
+    with pytest.raises(RuntimeError):
+        with container.transaction() as tx:
+            tx.set_opacity(0.9)
+            raise RuntimeError()
+    assert container.alacritty_config["window"]["opacity"] == 0.5
+
+
+def test_profiles(container, tmp_path):
+    profile_fn = str(tmp_path / "profiles.yml")
+    assert (
+        save_profile("night", {"colors": "light", "opacity": 0.8}, profile_fn) == None
+    )
+    assert isinstance(save_profile("bad", {"size": 1}, profile_fn), KeyError)
+    assert load_profiles(profile_fn) == {"night": {"colors": "light", "opacity": 0.8}}
+    assert isinstance(container.apply_profile("day", profile_fn), KeyError)
+    assert container.apply_profile("night", profile_fn) == None
+    assert container.config_writer.writes == 1
+    assert container.alacritty_config["window"]["opacity"] == 0.8
@@ -0,0 +1,94 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.similar import PaletteIndex
+import urwid
+import pytest
+
+config = (
+    "# mine\nwindow:\n  opacity: 0.5\ncolors:\n  primary:\n    background: '#000000'\n"
+)
+
+
+class FakeAlarms(object):
+    """Replaces urwid alarms, so that pending alarms can be fired on demand"""
+
+    def __init__(self):
+        self.alarms = {}
+
+    def set_alarm_in(self, delay, callback):
+        handle = object()
+        self.alarms[handle] = callback
+        return handle
+
+    def remove_alarm(self, handle):
+        return self.alarms.pop(handle, None) != None
+
+    def fire(self, loop):
+        alarms, self.alarms = self.alarms, {}
+        for callback in alarms.values():
+            callback(loop, None)
+
+
+@pytest.fixture
+def tui(tmp_path, monkeypatch):
+    from aed.tui.alacritty_tui import Tui
+
+    (tmp_path / "alacritty.yml").write_text(config)
+    (tmp_path / "colors").mkdir()
+    for i in range(50):
+        (tmp_path / "colors" / "theme{:02d}.yml".format(i)).write_text(
+            "colors:\n  primary:\n    background: '#0000{:02d}'\n".format(i)
+        )
+    monkeypatch.setattr(urwid.MainLoop, "run", lambda loop: None)
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+        write_interval=0,
+        palette_index=PaletteIndex(str(tmp_path / "palettes.json")),
+    )
+    tui = Tui(ac)
+    alarms = FakeAlarms()
+    tui.loop.set_alarm_in = alarms.set_alarm_in
+    tui.loop.remove_alarm = alarms.remove_alarm
+    tui.alarms = alarms
+    return tui
+
+
+def test_hover_preview_is_debounced(tui):
+    tui._handle_input("p")
+    for i in range(50):
+        tui.color_walker.set_focus(i)
+    assert len(tui.alarms.alarms) == 1
+    tui.alarms.fire(tui.loop)
+    tui.io.drain()
+    tui.container.flush()
+    assert tui.container.config_writer.writes == 1
+    assert "'#000049'" in open(tui.container.config_fn).read()
+
+    tui._handle_input("esc")
+    tui.io.drain()
+    assert not tui.hover_preview
+    assert open(tui.container.config_fn).read() == config
+
+
+def test_hover_preview_enter_commits(tui):
+    tui._handle_input("p")
+    tui.color_walker.set_focus(3)
+    tui._select_colors("theme03")
+    assert tui.alarms.alarms == {}
+    tui._handle_input("esc")
+    tui.io.drain()
+    assert "'#000003'" in open(tui.container.config_fn).read()
+    assert (
+        tui.container.alacritty_config["colors"]["primary"]["background"] == "#000003"
+    )
+
+
+def test_failed_apply_is_shown(tui, tmp_path):
+    (tmp_path / "colors" / "theme07.yml").write_text("colors:\n  weird_key: 1\n")
+    tui._apply_named("colors", "theme07")
+    tui.io.drain()
+    assert "weird_key" in tui.status.text
+    assert open(tui.container.config_fn).read() == config
@@ -0,0 +1,56 @@
+from aed.container.validate import validate_library
+import pytest
+
+
+@pytest.fixture
+def library(tmp_path):
+    color_dir = tmp_path / "colors"
+    font_dir = tmp_path / "fonts"
+    color_dir.mkdir()
+    font_dir.mkdir()
+    for i in range(4):
+        (color_dir / "theme{}.yml".format(i)).write_text(
+            "colors:\n  primary:\n    background: '#00000{}'\n".format(i)
+        )
+    (color_dir / "broken.yml").write_text("colors:\n  weird: 1\n  odd: 2\n")
+    (color_dir / "invalid.yml").write_text("colors: [\n")
+    (font_dir / "dina.yml").write_text("font:\n  size: 12.0\n")
+    (font_dir / "empty.yml").write_text("")
+    return tmp_path
+
+
+def test_validate_library(library):
+    cache_fn = str(library / "cache" / "validate.json")
+    results = validate_library(
+        str(library / "colors"), str(library / "fonts"), workers=2, cache_fn=cache_fn
+    )
+    errors = {result.fn.split("/")[-1]: result.errors for result in results}
+    assert len(errors) == 8
+    assert errors["broken.yml"] == [
+        "weird: not acceptable Alacritty color option.",
+        "odd: not acceptable Alacritty color option.",
+    ]
+    assert errors["invalid.yml"][0].startswith("unable to parse")
+    assert errors["empty.yml"] == ["missing 'font' options"]
+    assert errors["dina.yml"] == errors["theme0.yml"] == []
+
+
+def test_validate_library_cache(library, monkeypatch):
+    cache_fn = str(library / "validate.json")
+    validate_library(str(library / "colors"), str(library / "fonts"), cache_fn=cache_fn)
+
+    (library / "colors" / "theme0.yml").write_text("colors:\n  bad_key: 1\n")
+    validated = []
+    import aed.container.validate as validate
+
+    original = validate.validate_theme
+    monkeypatch.setattr(
+        validate,
+        "validate_theme",
+        lambda fn, kind: validated.append(fn) or original(fn, kind),
+    )
+    results = validate_library(
+        str(library / "colors"), str(library / "fonts"), cache_fn=cache_fn
+    )
+    assert validated == [str(library / "colors" / "theme0.yml")]
+    assert sum(len(result.errors) > 0 for result in results) == 4
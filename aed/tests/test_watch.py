@@ -0,0 +1,93 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.watch import InotifyWatcher, PollingWatcher, make_watcher
+import os
+import time
+import pytest
+
+COLORS = "colors:\n  primary:\n    background: '#000000'\n"
+
+
+def _container(tmp_path, polling):
+    for name in ["colors", "fonts"]:
+        (tmp_path / name).mkdir()
+    (tmp_path / "colors" / "dark.yml").write_text(COLORS)
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path / "colors"),
+        str(tmp_path / "fonts"),
+        write_interval=60,
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+    assert list(ac.colors.keys()) == ["dark"]
+    ac.watch(polling=polling)
+    return ac
+
+
+def _events(ac):
+    # inotify events are delivered asynchronously
+    for _ in range(50):
+        changed = ac.process_watch_events()
+        if len(changed) > 0:
+            return changed
+        time.sleep(0.01)
+    return set()
+
+
+@pytest.mark.parametrize("polling", [False, True])
+def test_theme_index_updates(tmp_path, polling):
+    ac = _container(tmp_path, polling)
+    if not polling:
+        assert isinstance(ac.watcher, InotifyWatcher)
+    (tmp_path / "colors" / "aqua.yml").write_text(COLORS)
+    assert _events(ac) == set(["colors"])
+    assert list(ac.colors.keys()) == ["aqua", "dark"]
+    os.unlink(str(tmp_path / "colors" / "dark.yml"))
+    assert _events(ac) == set(["colors"])
+    assert list(ac.colors.keys()) == ["aqua"]
+    ac.unwatch()
+
+
+@pytest.mark.parametrize("polling", [False, True])
+def test_external_config_edit(tmp_path, polling):
+    ac = _container(tmp_path, polling)
+    # aed's own writes are not reported
+    ac.set_opacity(0.6)
+    assert _events(ac) == set()
+
+    # external edits are reloaded and pending changes are merged on top of them
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.6\n# mine\n")
+    ac.set_opacity(0.7, deferred=True)
+    assert _events(ac) == set(["config"])
+    assert ac.alacritty_config["window"]["opacity"] == 0.7
+    ac.flush()
+    assert (
+        tmp_path / "alacritty.yml"
+    ).read_text() == "window:\n  opacity: 0.7\n# mine\n"
+    ac.unwatch()
+
+
+def test_write_keeps_unwatched_edits(tmp_path):
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(
+        str(tmp_path / "alacritty.yml"),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+    (tmp_path / "alacritty.yml").write_text("window:\n  opacity: 0.5\n  padding: 2\n")
+    ac.set_opacity(0.9)
+    assert ac.load_yaml(str(tmp_path / "alacritty.yml")) == {
+        "window": {"opacity": 0.9, "padding": 2}
+    }
+
+
+def test_polling_watcher(tmp_path):
+    watcher = make_watcher([str(tmp_path), str(tmp_path / "missing")], polling=True)
+    assert isinstance(watcher, PollingWatcher) and watcher.fileno() == None
+    (tmp_path / "a.yml").write_text("a")
+    assert [event.kind for event in watcher.read_events()] == ["created"]
+    (tmp_path / "a.yml").write_text("ab")
+    assert [event.kind for event in watcher.read_events()] == ["modified"]
+    assert watcher.read_events() == []
@@ -0,0 +1,43 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.write_behind import WriteBehind
+import time
+
+
+def test_write_behind_coalesces():
+    flushes = []
+    writer = WriteBehind(lambda: flushes.append(time.monotonic()), interval=10.0)
+    for _ in range(50):
+        writer.schedule()
+    # first change is written immediately, the rest are merged into one pending flush
+    assert len(flushes) == 1
+    assert writer.pending
+    writer.flush()
+    assert len(flushes) == 2
+    assert not writer.pending
+    writer.flush()
+    assert len(flushes) == 2
+
+
+def test_write_behind_timer_flushes():
+    flushes = []
+    writer = WriteBehind(lambda: flushes.append(1), interval=0.05)
+    writer.schedule()
+    writer.schedule()
+    writer.schedule()
+    time.sleep(0.2)
+    assert len(flushes) == 2
+    assert not writer.pending
+
+
+def test_deferred_opacity(tmp_path):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text("window:\n  opacity: 0.5\n")
+    ac = AlacrittyContainer(
+        str(config_fn), str(tmp_path), str(tmp_path), write_interval=10.0
+    )
+    ac.set_opacity(0.6, deferred=True)
+    ac.set_opacity(0.7, deferred=True)
+    assert ac.alacritty_config["window"]["opacity"] == 0.7
+    assert AlacrittyContainer.load_yaml(str(config_fn))["window"]["opacity"] == 0.6
+    ac.flush()
+    assert AlacrittyContainer.load_yaml(str(config_fn))["window"]["opacity"] == 0.7
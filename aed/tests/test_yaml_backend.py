@@ -0,0 +1,104 @@
+from aed.container.yaml_backend import available_backends, get_backend
+from concurrent.futures import ThreadPoolExecutor
+import io
+import pytest
+
+config = """
+window:
+  opacity: 0.85
+  padding:
+    x: 4
+    y: 4
+  decorations: none
+font:
+  normal:
+    family: monospace
+    style: Regular
+  size: 11.0
+  offset:
+    x: 0
+    y: 0
+  builtin_box_drawing: true
+draw_bold_text_with_bright_colors: false
+colors:
+  primary:
+    background: '#1d1f21'
+    foreground: '0xc5c8c6'
+  cursor:
+    text: CellBackground
+    cursor: CellForeground
+  line_indicator:
+    foreground: None
+    background: None
+  normal:
+    black:   '#1d1f21'
+    red:     '#cc6666'
+  indexed_colors: []
+  transparent_background_colors: false
+hints:
+  enabled: on
+  persist: yes
+  mouse: no
+  mode: 012
+  octal: 0o14
+  time: 1:30
+  quoted: 'on'
+key_bindings:
+  - { key: V, mods: Control|Shift, action: Paste }
+  - { key: Return, mods: Alt, chars: "\\x1b\\r" }
+"""
+
+# PyYAML follows YAML 1.1 and is only used on request
+backends = [name for name in available_backends() if name != "pyyaml"]
+
+
+def test_backends_available():
+    assert "ruamel" in backends
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+@pytest.mark.parametrize("name", backends)
+def test_backend_conformance(name):
+    reference = get_backend("ruamel").load(config)
+    data = get_backend(name).load(config)
+    assert data == reference
+    assert reference["hints"] == {
+        "enabled": "on",
+        "persist": "yes",
+        "mouse": "no",
+        "mode": 12,
+        "octal": 12,
+        "time": "1:30",
+        "quoted": "on",
+    }
+
+    stream = io.StringIO()
+    get_backend(name).dump(data, stream)
+    for other in backends:
+        assert get_backend(other).load(stream.getvalue()) == reference
+
+
+def test_libyaml_matches_pure_python():
+    if "libyaml" not in backends:
+        pytest.skip("ruamel.yaml.clib is not installed")
+    assert get_backend("libyaml").load(config) == get_backend("ruamel").load(config)
+    assert get_backend("ruamel").yaml.Parser is not get_backend("libyaml").yaml.Parser
+
+
+def test_auto_never_selects_pyyaml():
+    assert get_backend("auto").name in ("libyaml", "ruamel")
+
+
+def test_pyyaml_is_yaml_1_1():
+    if "pyyaml" not in available_backends():
+        pytest.skip("PyYAML with libyaml is not installed")
+    data = get_backend("pyyaml").load("a: on\nb: 012\nc: 1:30\n")
+    assert data == {"a": True, "b": 10, "c": 90}
+
+
+def test_backend_per_thread():
+    assert get_backend("ruamel") is get_backend("ruamel")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        other = pool.submit(get_backend, "ruamel").result()
+    assert other is not get_backend("ruamel")
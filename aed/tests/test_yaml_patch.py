@@ -0,0 +1,93 @@
+from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.theme_cache import ThemeCache
+from aed.container.yaml_patch import (
+    find_block,
+    patch_block,
+    patch_scalar,
+    remove_block,
+)
+import pytest
+
+render = AlacrittyContainer.render_yaml
+
+config = """# hand-tuned config
+window:
+  # translucent
+  opacity: 0.5   # keep me
+  padding:
+    x: 4
+
+colors: # old colors
+  primary:
+    background: '#000000'
+
+# font comes last
+font:
+  size: 11.0
+"""
+
+
+def test_find_block():
+    start, end = find_block(config, "colors")
+    assert config[start:end] == (
+        "colors: # old colors\n  primary:\n    background: '#000000'\n"
+    )
+    assert find_block(config, "missing") == None
+    assert find_block(config + "colors: {}\n", "colors") == None
+
+
+def test_patch_scalar():
+    patched = patch_scalar(config, "window", "opacity", 0.75, render)
+    assert patched == config.replace("opacity: 0.5 ", "opacity: 0.75 ")
+    patched = patch_scalar(config, "font", "builtin_box_drawing", True, render)
+    assert "font:\n  builtin_box_drawing: true\n  size: 11.0\n" in patched
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "window: {opacity: 0.5}\n",
+        "window: none\n",
+        "base: &base 0.5\nwindow:\n  opacity: *base\n",
+    ],
+)
+def test_patch_scalar_refuses(text):
+    assert patch_scalar(text, "window", "opacity", 0.75, render) == None
+
+
+def test_patch_block():
+    colors = {"primary": {"background": "#ffffff"}}
+    patched = patch_block(config, "colors", colors, render)
+    head, tail = config.split("colors:")
+    assert patched.startswith(head)
+    assert patched.endswith("\n# font comes last\nfont:\n  size: 11.0\n")
+    assert AlacrittyContainer.render_yaml({"colors": colors}) in patched
+    assert patch_block("{window: {}}\n", "colors", colors, render) == None
+
+
+def test_remove_block():
+    removed = remove_block(config, "colors")
+    head, tail = config.split("colors:")
+    assert removed == head + "\n# font comes last\nfont:\n  size: 11.0\n"
+    assert remove_block(config, "missing") == config
+    assert remove_block("colors:\n  x: &c 1\n", "colors") == None
+
+
+def test_container_patch_mode(tmp_path):
+    config_fn = tmp_path / "alacritty.yml"
+    config_fn.write_text(config)
+    (tmp_path / "light.yml").write_text(
+        "colors:\n  primary:\n    background: '#ffffff'\n"
+    )
+    ac = AlacrittyContainer(
+        str(config_fn),
+        str(tmp_path),
+        str(tmp_path),
+        theme_cache=ThemeCache(str(tmp_path / "cache.json")),
+    )
+    ac.set_opacity(0.8)
+    ac.set_colors(str(tmp_path / "light.yml"))
+    text = config_fn.read_text()
+    assert text.startswith("# hand-tuned config\nwindow:\n  # translucent\n")
+    assert "opacity: 0.8   # keep me\n" in text
+    assert AlacrittyContainer.load_yaml(str(config_fn)) == ac.alacritty_config
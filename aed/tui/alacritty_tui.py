@@ -1,11 +1,21 @@
 import urwid
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union, List, Callable
 from aed.container.alacritty_container import AlacrittyContainer
+from aed.container.timing import timed
+from aed.container.contrast import WCAG_AA
+from .theme_menu import make_theme_menu
+from .quantize import urwid_color
+from .io_queue import IOQueue
 
 
 class Tui(object):
-    """Urwid text user interface for manipulating Alacritty color, font, and opacity options
+    """Urwid text user interface for manipulating Alacritty color, font, and opacity options.
+    The interface runs on urwid's asyncio event loop, and configuration writes and
+    theme loads are run in the background (see `IOQueue`), so that slow disks never
+    hold up keystrokes.
 
     Parameters
     ----------
@@ -70,54 +80,455 @@ class Tui(object):
         "tlcorner": "\N{BOX DRAWINGS DOWN SINGLE AND RIGHT DOUBLE}",
     }
 
+    # number of themes above and below the cursor that are prefetched
+    _prefetch_radius = 2
+    # seconds the cursor has to rest on a theme before it is previewed
+    _preview_delay = 0.15
+    # seconds between two checks for changes when inotify is not available
+    _watch_interval = 1.0
+
+    _ansi_names = [
+        "black",
+        "red",
+        "green",
+        "yellow",
+        "blue",
+        "magenta",
+        "cyan",
+        "white",
+    ]
+
     def __init__(self, container: AlacrittyContainer):
         self.container = container
+        self._setup()
+        try:
+            self.loop.run()
+        finally:
+            # pending writes are finished before the final flush, and scores
+            # that did not start are dropped
+            self.scores.cancel()
+            self.io.drain()
+            self.asyncio_loop.close()
+            self.container.flush()
+            self.container.disable_prefetch()
+            self.container.unwatch()
+            self.container.save_caches()
+
+    @timed("tui.setup")
+    def _setup(self):
+        """Builds the widgets and the main loop"""
+        self.colors_mode = Tui._detect_colors()
+        self._theme_attrs = {}
+        # contrast labels of the color themes, and those being computed
+        self._contrast_labels = {}
+        self._contrast_pending = set()
+        # changes are previewed from the start when the container is (e.g., --live)
+        self.live = self.container.previewing
+        self.hover_preview = False
+        self._preview_alarm = None
+        self._watch_handle = None
+        self._message = ""
+        self.asyncio_loop = asyncio.new_event_loop()
+        self.io = IOQueue(
+            self.asyncio_loop.call_soon_threadsafe, on_change=self._io_changed
+        )
+        # contrast scores are CPU-bound and never hold up the writes of `io`, nor
+        # show as pending in the status line
+        self.scores = IOQueue(
+            self.asyncio_loop.call_soon_threadsafe,
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="aed-score"),
+            on_change=self._redraw,
+        )
+        # color themes are listed by similarity to the current colors if True
+        self.sort_similar = False
 
         if "opacity" not in list(self.container.alacritty_config["window"].keys()):
             base_opacity = 1.0
         else:
             base_opacity = self.container.alacritty_config["window"]["opacity"]
+        # opacity shown and last requested, which the configuration catches up with
+        self.opacity = base_opacity
 
         menu1 = Tui._make_select_menu(
             list(self.container.colors.keys()),
-            self.container.set_named_colors,
+            self._select_colors,
             "[ COLORS ]",
+            annotate=self._contrast_label,
         )
         menu2 = Tui._make_select_menu(
             list(self.container.fonts.keys()),
-            self.container.set_named_font,
+            self._select_font,
             "[ FONTS ]",
         )
         menu3 = Tui._make_opacity_box(base_opacity)
         menu4 = Tui._make_font_display()
         menu5 = Tui._make_color_display()
 
-        color_display = Tui._make_color_display()
+        self.font_display = menu4
+        self.color_display = menu5
+        self.color_walker = menu1.original_widget.walker
+        self.font_walker = menu2.original_widget.walker
+        self.container.enable_prefetch()
+        self.color_walker.focus_callbacks.append(
+            lambda name: self.container.prefetch_named(
+                "colors", self.color_walker.neighbours(Tui._prefetch_radius)
+            )
+        )
+        self.font_walker.focus_callbacks.append(
+            lambda name: self.container.prefetch_named(
+                "font", self.font_walker.neighbours(Tui._prefetch_radius)
+            )
+        )
+        self.color_walker.focus_callbacks.append(self.preview_theme)
+        self.color_walker.focus_callbacks.append(
+            lambda name: self._schedule_preview("colors", name)
+        )
+        self.font_walker.focus_callbacks.append(
+            lambda name: self._schedule_preview("font", name)
+        )
         self.top = Tui._make_top(menu1, menu2, menu3, menu4, menu5)
+        self.status = urwid.Text("")
+        self.top.footer = urwid.AttrMap(self.status, "header")
+        self._update_status()
         self.loop = urwid.MainLoop(
             self.top,
             palette=Tui._palette,
             unhandled_input=self._handle_input,
             handle_mouse=False,
+            event_loop=urwid.AsyncioEventLoop(loop=self.asyncio_loop),
         )
-        self.loop.run()
+        if self.colors_mode >= 256:
+            self.loop.screen.set_terminal_properties(colors=self.colors_mode)
+            self._show_palette(
+                Tui._quantize_palette(
+                    self.container.alacritty_config.get("colors") or {},
+                    self.colors_mode,
+                )
+            )
+        self._watch()
 
     def _urwid_quit(*args):
         """Deconstructs the TUI and quits the program"""
         raise urwid.ExitMainLoop()
 
+    @timed("tui.handle_input")
     def _handle_input(self, key: str):
         """Handles general keyboard input during the TUI loop"""
         if key in ("Q", "q"):
+            # uncommitted previews are dropped, before the final flush
+            self.io.submit(self.container.revert_preview)
             self._urwid_quit()
+        if key in ("W", "w") and self.container.previewing:
+            # persists the previewed changes and keeps previewing
+            self._commit_preview()
+        if key in ("P", "p"):
+            self.toggle_hover_preview()
+        if key == "esc" and self.container.previewing:
+            self._revert_preview()
+        if key in ("S", "s"):
+            self.toggle_similar_sort()
+        if key in ("u", "ctrl r"):
+            self._step_history(key == "u")
+        if key == "/":
+            # jumps to the filter field of the focused theme menu
+            self.top.body.top_w.focus_position = 0
+            columns = self.top.body.top_w.contents[0][0]
+            columns.focus.original_widget.pile.focus_position = 0
         if key in ("-"):
-            new_opacity = self.container.alacritty_config["window"]["opacity"] - 0.01
-            if self.container.set_opacity(new_opacity) == None:
-                self.update_opacity_bar(new_opacity)
+            self._set_opacity(self.opacity - 0.01)
         if key in ("+"):
-            new_opacity = self.container.alacritty_config["window"]["opacity"] + 0.01
-            if self.container.set_opacity(new_opacity) == None:
-                self.update_opacity_bar(new_opacity)
+            self._set_opacity(self.opacity + 0.01)
+
+    def _submit(self, fn: Callable, done: Callable = None, key: str = None):
+        """Runs `fn` in the background (see `IOQueue.submit`) and shows it as
+        pending in the status line
+        """
+        self.io.submit(fn, done, key)
+        self._show_status()
+
+    def _io_changed(self):
+        """Shows the pending and failed background jobs once results come in"""
+        self._show_status()
+        self._redraw()
+
+    def _redraw(self):
+        """Redraws the screen by hand, since background results are not urwid
+        events
+        """
+        if self.loop.screen.started:
+            self.loop.draw_screen()
+
+    def _set_opacity(self, opacity: float):
+        """Shows the new opacity right away and writes it in the background. Rapid
+        changes supersede each other, so only the last one is written.
+        """
+        if AlacrittyContainer._validate_opacity(opacity) != None:
+            return
+        self.opacity = opacity
+        self.update_opacity_bar(opacity)
+        self._submit(
+            lambda: self.container.set_opacity(opacity, deferred=True),
+            lambda exception: self.update_opacity_bar(opacity),
+            key="opacity",
+        )
+
+    def _watch(self):
+        """Refreshes the menus and displays when themes or the configuration file are
+        changed outside of aed. The inotify descriptor is watched by the main loop;
+        the polling fallback is checked every `_watch_interval` seconds.
+        """
+        self.container.watch()
+        self._watch_again()
+
+    def _watch_again(self):
+        fd = self.container.watcher.fileno()
+        if fd != None:
+            self._watch_handle = self.loop.watch_file(fd, self._refresh)
+        else:
+            self.loop.set_alarm_in(
+                Tui._watch_interval, lambda loop, data: self._refresh()
+            )
+
+    def _refresh(self):
+        """Applies pending watcher events to the container in the background. The
+        watcher is left alone until they are applied, so that unread events do not
+        wake the main loop again.
+        """
+        if self._watch_handle != None:
+            self.loop.remove_watch_file(self._watch_handle)
+            self._watch_handle = None
+        self._submit(self.container.process_watch_events, self._refreshed)
+
+    def _refreshed(self, changed: set):
+        """Refreshes the TUI after watcher events were applied"""
+        self._watch_again()
+        if "colors" in changed:
+            self._theme_attrs = {}
+            self._contrast_labels = {}
+            self._sort_colors()
+        if "font" in changed:
+            self.font_walker.set_names(list(self.container.fonts.keys()))
+        if "config" in changed:
+            self._show_config()
+            self._update_status("reloaded")
+
+    def _contrast_label(self, name: str) -> str:
+        """Contrast ratio of the foreground of a color theme against its background,
+        shown next to its name. Ratios below the WCAG AA level are marked with '!'.
+        Scores are computed in the background, with '…' shown until the row is
+        rebuilt with the score.
+        """
+        label = self._contrast_labels.get(name)
+        if label != None:
+            return label
+        if name not in self._contrast_pending:
+            self._contrast_pending.add(name)
+            # the status line is left alone, since rows are built while rendering
+            self.scores.submit(
+                lambda: self.container.contrast_score(name),
+                lambda score: self._show_contrast(name, score),
+                key="contrast:{}".format(name),
+            )
+        return "\N{HORIZONTAL ELLIPSIS}"
+
+    def _show_contrast(self, name: str, score):
+        """Shows the contrast score of a color theme next to its name"""
+        self._contrast_pending.discard(name)
+        if score == None or score.primary == None:
+            label = "-"
+        else:
+            label = "{:.1f}{}".format(
+                score.primary, "!" if score.primary < WCAG_AA else " "
+            )
+        self._contrast_labels[name] = label
+        self.color_walker.refresh(name)
+
+    def _color_names(self) -> List[str]:
+        """Names of the color themes, in the current sort order"""
+        names = list(self.container.colors.keys())
+        if not self.sort_similar:
+            return names
+        ranked = [name for name, _ in self.container.similar_colors()]
+        listed = set(ranked)
+        # themes without comparable colors come last
+        return ranked + [name for name in names if name not in listed]
+
+    def toggle_similar_sort(self):
+        """Toggles between listing the color themes by name and by similarity to
+        the current colors. The ranking is computed when the mode is entered.
+        """
+        self.sort_similar = not self.sort_similar
+        self._sort_colors(
+            "sorted by similarity" if self.sort_similar else "sorted by name"
+        )
+
+    def _sort_colors(self, message: str = None):
+        """Lists the color themes in the current sort order. Rankings by similarity
+        are computed in the background (indexing the palettes of new themes first),
+        and the list is only reordered once they are done.
+
+        Parameters
+        ----------
+        message:
+            Status message shown once the themes are listed, if any
+        """
+
+        def done(names: List[str]):
+            # the mode may have been left while ranking
+            if self.sort_similar:
+                self.color_walker.set_names(names)
+            if message != None:
+                self._update_status(message)
+
+        if not self.sort_similar:
+            self.color_walker.set_names(list(self.container.colors.keys()))
+            if message != None:
+                self._update_status(message)
+            return
+        if message != None:
+            self._update_status("ranking\N{HORIZONTAL ELLIPSIS}")
+        self._submit(self._color_names, done, key="color-order")
+
+    def _step_history(self, undo: bool):
+        """Undoes (or redoes) the last change and refreshes the displays"""
+
+        def done(exception: Union[None, BaseException]):
+            if exception != None:
+                self._update_status(str(exception).strip("'"))
+                return
+            self._show_config()
+            self._update_status("undone" if undo else "redone")
+
+        self._submit(self.container.undo if undo else self.container.redo, done)
+
+    def _show_config(self):
+        """Shows the opacity and the colors of the current configuration"""
+        window = self.container.alacritty_config.get("window") or {}
+        self.opacity = window.get("opacity", 1.0)
+        self.update_opacity_bar(self.opacity)
+        if self.colors_mode >= 256:
+            self._show_palette(
+                Tui._quantize_palette(
+                    self.container.alacritty_config.get("colors") or {},
+                    self.colors_mode,
+                )
+            )
+
+    def _update_status(self, message: str = ""):
+        """Shows the preview mode and an optional message in the status line"""
+        self._message = message
+        self._show_status()
+
+    def _show_status(self):
+        """Shows the preview mode, the last message, and the pending and failed
+        background jobs in the status line
+        """
+        modes = []
+        if self.hover_preview:
+            modes.append("HOVER PREVIEW (enter: keep, esc: revert)")
+        elif self.container.previewing:
+            modes.append("PREVIEW (w: keep, esc: revert)")
+        jobs = []
+        if self.io.in_flight > 0:
+            jobs.append("[{} pending]".format(self.io.in_flight))
+        for exception in self.io.errors.values():
+            jobs.append("[failed: {}]".format(str(exception).strip("'")))
+        self.status.set_text(" ".join(modes + [self._message] + jobs).strip())
+
+    def toggle_hover_preview(self):
+        """Toggles hover-to-preview mode, in which the color or font theme under the
+        cursor is applied (debounced) as the cursor moves. Leaving the mode reverts
+        the changes that were not kept with enter.
+        """
+        if self.hover_preview:
+            self.hover_preview = False
+            self._revert_preview()
+            return
+        self.hover_preview = True
+        self._submit(self.container.begin_preview)
+        self._update_status()
+
+    def _schedule_preview(self, kind: str, name: str):
+        """Debounces previews: the theme under the cursor is only applied once the
+        cursor has rested on it for `_preview_delay` seconds, so that scrolling past
+        many themes results in a single change
+        """
+        if not self.hover_preview:
+            return
+        self._cancel_preview()
+        self._preview_alarm = self.loop.set_alarm_in(
+            Tui._preview_delay, lambda loop, data: self._apply_named(kind, name)
+        )
+
+    def _cancel_preview(self):
+        if self._preview_alarm != None:
+            self.loop.remove_alarm(self._preview_alarm)
+            self._preview_alarm = None
+
+    def _apply_named(self, kind: str, name: str):
+        """Applies the named color ("colors") or font ("font") theme in the
+        background. A theme that is still queued is superseded by the next one.
+        """
+        self._preview_alarm = None
+
+        def apply() -> Union[None, BaseException]:
+            try:
+                if kind == "colors":
+                    return self.container.set_named_colors(name)
+                return self.container.set_named_font(name)
+            except KeyError as error:
+                return error
+
+        self._submit(
+            apply,
+            lambda exception: self._update_status(
+                "" if exception == None else str(exception)
+            ),
+            key=kind,
+        )
+
+    def _commit_preview(self):
+        """Keeps the previewed changes, and keeps previewing"""
+
+        def commit():
+            self.container.commit_preview()
+            self.container.begin_preview()
+
+        self._submit(commit, lambda _: self._update_status("kept"))
+
+    def _revert_preview(self):
+        """Restores the configuration from before the preview"""
+        self._cancel_preview()
+        self.hover_preview = False
+
+        def revert():
+            self.container.revert_preview()
+            if self.live:
+                self.container.begin_preview()
+
+        def done(_):
+            window = self.container.alacritty_config.get("window") or {}
+            self.opacity = window.get("opacity", 1.0)
+            self.update_opacity_bar(self.opacity)
+            self._update_status("reverted")
+
+        self._submit(revert, done)
+
+    @timed("tui.select_colors")
+    def _select_colors(self, name: str, *args):
+        """Applies the selected color theme, keeping it if previewing"""
+        self._cancel_preview()
+        self._apply_named("colors", name)
+        if self.hover_preview:
+            self._commit_preview()
+
+    @timed("tui.select_font")
+    def _select_font(self, name: str, *args):
+        """Applies the selected font theme, keeping it if previewing"""
+        self._cancel_preview()
+        self._apply_named("font", name)
+        if self.hover_preview:
+            self._commit_preview()
 
     @staticmethod
     def _make_top(
@@ -205,6 +616,7 @@ class Tui(object):
             urwid.LineBox(text, **Tui._menu_style_kwargs),
             "menu",
         )
+        font_display.samples = [filler.original_widget for filler, _ in text.contents]
         return font_display
 
     @staticmethod
@@ -226,6 +638,9 @@ class Tui(object):
             ),
             "menu",
         )
+        color_display.swatches = [
+            filler.original_widget for filler in colors + bright_colors
+        ]
         return color_display
 
     @staticmethod
@@ -243,9 +658,11 @@ class Tui(object):
 
     @staticmethod
     def _make_select_menu(
-        choices: List[str], action: Callable, title="Title"
+        choices: List[str], action: Callable, title="Title", annotate: Callable = None
     ) -> urwid.AttrMap:
-        """Generates a simple list of buttons that are signal connected to a supplied action
+        """Generates a fuzzy-searchable list of buttons that are signal connected to a
+        supplied action. Button widgets are only built for visible rows, so that large
+        theme libraries do not slow down start-up.
 
         Parameters
         ----------
@@ -256,26 +673,116 @@ class Tui(object):
             Funcion/method to which the `click` signal of each button will be connected
         title:
             Title of the urwid.LineBox that wraps the button list
+        annotate:
+            Optional function returning a short text shown next to each choice
 
         Returns
         -------
         menu:
-            urwid.AttrMap(urwid.Linebox) that contains the list of buttons, one for each choice
+            urwid.AttrMap(urwid.Linebox) that contains a filter field and the list of
+            buttons, one for each choice
         """
 
-        buttons = []
-        for c in choices:
-            button = urwid.Button(c)
-            urwid.connect_signal(button, "click", action, user_args=[c])
-            buttons.append(button)
-        body = [urwid.AttrMap(button, None, focus_map="reversed") for button in buttons]
-        walker = urwid.SimpleFocusListWalker(body)
-        menu = urwid.LineBox(
-            urwid.ListBox(walker), title=title, **Tui._menu_style_kwargs
-        )
+        menu = make_theme_menu(choices, action, title, Tui._menu_style_kwargs, annotate)
         menu = urwid.AttrMap(menu, "menu")
         return menu
 
+    @staticmethod
+    def _detect_colors() -> int:
+        """Number of colors supported by the terminal: 2**24 if it advertises true
+        color through $COLORTERM, 256 for 256-color terminals and 16 otherwise
+        """
+        if os.environ.get("COLORTERM", "").lower() in ("truecolor", "24bit"):
+            return 2**24
+        if "256" in os.environ.get("TERM", ""):
+            return 256
+        return 16
+
+    @staticmethod
+    def _quantize_palette(colors: dict, colors_mode: int) -> dict:
+        """Converts the primary and normal/bright colors of an Alacritty color map into
+        urwid attributes for a terminal with `colors_mode` colors. Colors that are
+        not hex values (or missing) are mapped to None.
+
+        Returns
+        -------
+        attrs:
+            Dictionary with a "primary" urwid.AttrSpec (theme foreground on theme
+            background), as well as "normal" and "bright" lists of 8 urwid.AttrSpecs
+            (swatches of each ANSI color) and "text", a list of 8 urwid.AttrSpecs
+            (each normal color on the theme background)
+        """
+        primary = colors.get("primary") or {}
+        foreground = urwid_color(primary.get("foreground"), colors_mode)
+        background = urwid_color(primary.get("background"), colors_mode)
+        attrs = {"normal": [], "bright": [], "text": []}
+        for group in ("normal", "bright"):
+            group_colors = colors.get(group) or {}
+            for name in Tui._ansi_names:
+                color = urwid_color(group_colors.get(name), colors_mode)
+                spec = None
+                if color != None:
+                    spec = urwid.AttrSpec(color, color, colors_mode)
+                attrs[group].append(spec)
+                if group == "normal":
+                    text = None
+                    if color != None:
+                        text = urwid.AttrSpec(
+                            color, background or "default", colors_mode
+                        )
+                    attrs["text"].append(text)
+        attrs["primary"] = None
+        if foreground != None or background != None:
+            attrs["primary"] = urwid.AttrSpec(
+                foreground or "default", background or "default", colors_mode
+            )
+        return attrs
+
+    def _show_palette(self, attrs: dict):
+        """Renders the quantized palette of a theme in the color and font displays"""
+        for i, swatch in enumerate(self.color_display.swatches):
+            spec = (attrs["normal"] + attrs["bright"])[i]
+            default = (Tui._color_keys + Tui._bright_color_keys)[i]
+            swatch.set_attr_map({None: spec or default})
+        sample_attrs = ["red_", "green_", "yellow_", "blue_", "magenta_"]
+        for i, sample in enumerate(self.font_display.samples):
+            spec = attrs["text"][i + 1]
+            sample.set_attr_map({None: spec or sample_attrs[i]})
+        self.font_display.set_attr_map({None: attrs["primary"] or "menu"})
+
+    @timed("tui.preview_theme")
+    def preview_theme(self, name: str):
+        """Shows the real colors of the color theme `name` (e.g., the one under the
+        cursor). Quantized palettes are cached per theme, and theme files are read
+        through the container's theme cache, so nothing is parsed or quantized twice.
+        Themes that are not cached are loaded in the background, and only the last
+        requested one is shown.
+        """
+        if self.colors_mode < 256:
+            return
+        attrs = self._theme_attrs.get(name)
+        if attrs != None:
+            self._show_palette(attrs)
+            return
+
+        def load() -> dict:
+            colors = {}
+            try:
+                color_map, exception = self.container._load_theme(
+                    self.container.colors[name], "colors"
+                )
+                if exception == None:
+                    colors = color_map["colors"]
+            except (OSError, KeyError):
+                pass
+            return Tui._quantize_palette(colors, self.colors_mode)
+
+        def done(attrs: dict):
+            self._theme_attrs[name] = attrs
+            self._show_palette(attrs)
+
+        self._submit(load, done, key="palette")
+
     def update_opacity_bar(self, opacity: float):
         """Updates the opacity gauge to the input opacity"""
         percent = opacity * 100.0
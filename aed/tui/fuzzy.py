@@ -0,0 +1,66 @@
+import re
+from typing import List
+
+
+class FuzzyIndex(object):
+    """Precomputed index for incremental, case-insensitive fuzzy (subsequence)
+    filtering of theme names. Every name is indexed by the characters it contains,
+    so that each query is first narrowed down with set intersections and only the
+    remaining candidates are checked for the full subsequence. Queries that extend
+    the previous query only search the previous matches.
+
+    Parameters
+    ----------
+    names:
+        List of names to be filtered
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self._lower = [name.lower() for name in self.names]
+        self._chars = {}
+        for i, name in enumerate(self._lower):
+            for char in set(name):
+                self._chars.setdefault(char, set()).add(i)
+        self._all = set(range(len(self.names)))
+        self._query = ""
+        self._matches = self._all
+
+    def filter(self, query: str) -> List[int]:
+        """Returns the sorted indices of the names that contain the characters of
+        `query` in order (e.g., "tmn" matches "tomorrow-night")
+
+        Parameters
+        ----------
+        query:
+            Filter string. An empty query matches all names.
+
+        Returns
+        -------
+        matches:
+            Indices into `names`, in their original order
+        """
+
+        query = query.lower()
+        if len(query) == 0:
+            self._query = query
+            self._matches = self._all
+            return list(range(len(self.names)))
+        if len(self._query) > 0 and query.startswith(self._query):
+            candidates = self._matches
+            new_chars = query[len(self._query) :]
+        else:
+            candidates = self._all
+            new_chars = query
+        for char in set(new_chars):
+            candidates = candidates & self._chars.get(char, set())
+            if len(candidates) == 0:
+                break
+        if len(query) > 1:
+            # the order (and repetition) of characters is only checked for the
+            # remaining candidates
+            pattern = re.compile(".*?".join(re.escape(char) for char in query))
+            candidates = set(i for i in candidates if pattern.search(self._lower[i]))
+        self._query = query
+        self._matches = candidates
+        return sorted(candidates)
@@ -0,0 +1,165 @@
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Callable
+
+# result of the jobs that were superseded before they started
+_SKIPPED = object()
+
+
+class IOQueue(object):
+    """Runs the blocking work of the TUI (configuration writes and theme loads) in
+    an executor, and hands the results back to the event loop, so that a slow disk
+    never holds up keystrokes.
+
+    Every job gets a sequence number. A job submitted with a `key` (e.g., "opacity")
+    is superseded by the later jobs with the same key, unless a job without a key
+    (e.g., an undo, which must apply to the state the earlier job left) was submitted
+    in between. Superseded jobs are skipped if they have not started yet, and their
+    results (or failures) are never delivered. Jobs run one at a time, so whatever
+    the order in which they complete, an older state never overwrites a newer one.
+
+    Parameters
+    ----------
+    post:
+        Thread-safe function scheduling a callback on the event loop, e.g.
+        `asyncio_loop.call_soon_threadsafe`
+    executor:
+        Executor running the jobs. Defaults to a single worker thread.
+    on_change:
+        Called on the event loop once results are delivered, e.g. to update a status
+        line with `in_flight` and `errors`
+    """
+
+    def __init__(
+        self, post: Callable, executor: Executor = None, on_change: Callable = None
+    ):
+        self.post = post
+        self.executor = (
+            executor
+            if executor != None
+            else ThreadPoolExecutor(max_workers=1, thread_name_prefix="aed-io")
+        )
+        self.on_change = on_change
+        self.lock = threading.Lock()
+        # held while a job runs, so that jobs never overlap
+        self._run_lock = threading.Lock()
+        self.errors = {}
+        self._sequence = 0
+        self._generation = 0
+        self._latest = {}
+        self._futures = {}
+        self._completed = []
+
+    @property
+    def in_flight(self) -> int:
+        """Number of submitted jobs whose results were not delivered yet"""
+        with self.lock:
+            return len(self._futures)
+
+    def submit(self, fn: Callable, done: Callable = None, key: str = None) -> int:
+        """Schedules `fn` to run in the executor
+
+        Parameters
+        ----------
+        fn:
+            Function taking no arguments, e.g. a bound container method
+        done:
+            Function called on the event loop with the return value of `fn`, unless
+            the job was superseded. Exceptions raised by `fn` are kept in `errors`
+            instead, until a later job with the same key succeeds.
+        key:
+            Kind of state set by `fn`. If None, the job is never superseded.
+
+        Returns
+        -------
+        sequence:
+            Sequence number of the job
+        """
+        with self.lock:
+            self._sequence += 1
+            sequence = self._sequence
+            if key == None:
+                self._generation += 1
+            else:
+                self._latest[key] = (sequence, self._generation)
+            job = (sequence, key, self._generation, done)
+            self._futures[sequence] = self.executor.submit(self._run, job, fn)
+        return sequence
+
+    def superseded(self, sequence: int, key: str, generation: int) -> bool:
+        """True if a later job with the same key was submitted since `sequence`,
+        without a job without a key in between
+        """
+        with self.lock:
+            if key == None:
+                return False
+            latest, latest_generation = self._latest[key]
+            return latest != sequence and latest_generation == generation
+
+    def _run(self, job: tuple, fn: Callable):
+        sequence, key, generation, _ = job
+        with self._run_lock:
+            if self.superseded(sequence, key, generation):
+                outcome = (_SKIPPED, None)
+            else:
+                try:
+                    outcome = (fn(), None)
+                except Exception as exception:
+                    outcome = (None, exception)
+        # queued before the future completes, so that `drain` finds it
+        with self.lock:
+            self._completed.append((job, outcome))
+        try:
+            self.post(self.deliver)
+        except RuntimeError:
+            # the event loop is closed, results are delivered by `drain`
+            pass
+
+    def deliver(self):
+        """Hands the results of the completed jobs to their `done` callbacks, in
+        completion order. Called on the event loop.
+        """
+        with self.lock:
+            completed, self._completed = self._completed, []
+            for (sequence, _, _, _), _ in completed:
+                self._futures.pop(sequence, None)
+        if len(completed) == 0:
+            return
+        for (sequence, key, generation, done), (result, exception) in completed:
+            if result is _SKIPPED or self.superseded(sequence, key, generation):
+                continue
+            if exception != None:
+                self.errors[key] = exception
+                continue
+            self.errors.pop(key, None)
+            if done != None:
+                done(result)
+        if self.on_change != None:
+            self.on_change()
+
+    def drain(self):
+        """Waits for all submitted jobs, including those submitted by `done`
+        callbacks, and delivers their results
+        """
+        while True:
+            with self.lock:
+                futures = list(self._futures.values())
+            if len(futures) == 0:
+                return
+            wait(futures)
+            self.deliver()
+
+    def cancel(self):
+        """Drops the submitted jobs that did not start yet, without delivering
+        anything for them, and waits for the running one
+        """
+        with self.lock:
+            for sequence, future in list(self._futures.items()):
+                if future.cancel():
+                    del self._futures[sequence]
+        self.drain()
+
+    def shutdown(self):
+        """Waits for all submitted jobs and stops the executor"""
+        self.drain()
+        self.executor.shutdown(wait=True)
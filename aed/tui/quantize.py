@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Union, Tuple
+from aed.container.similar import parse_hex
+
+# Levels of the 6x6x6 color cube (indices 16-231) and of the grey ramp (232-255)
+# of the xterm 256-color palette. Indices 0-15 are left out, since terminals (and
+# the themes previewed with them) redefine them.
+_cube_levels = [0, 95, 135, 175, 215, 255]
+_grey_levels = [8 + 10 * i for i in range(24)]
+
+
+def _nearest(levels: list, value: int) -> int:
+    return min(range(len(levels)), key=lambda i: abs(levels[i] - value))
+
+
+# lookup tables from a channel value (0-255) to the nearest cube/grey level
+_cube_index = [_nearest(_cube_levels, value) for value in range(256)]
+_grey_index = [_nearest(_grey_levels, value) for value in range(256)]
+
+
+def _distance(a: tuple, b: tuple) -> int:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def nearest_xterm(rgb: Tuple[int, int, int]) -> int:
+    """Returns the index (16-255) of the xterm 256-color palette entry closest to
+    `rgb`. The nearest cube and grey ramp entries are found with per-channel lookup
+    tables, so only two candidates are compared.
+    """
+    r, g, b = rgb
+    ri, gi, bi = _cube_index[r], _cube_index[g], _cube_index[b]
+    cube = (_cube_levels[ri], _cube_levels[gi], _cube_levels[bi])
+    grey_i = _grey_index[(r + g + b) // 3]
+    grey = (_grey_levels[grey_i],) * 3
+    if _distance(grey, rgb) < _distance(cube, rgb):
+        return 232 + grey_i
+    return 16 + 36 * ri + 6 * gi + bi
+
+
+@lru_cache(maxsize=4096)
+def urwid_color(value: str, colors: int) -> Union[None, str]:
+    """Converts an Alacritty color value into an urwid color for a terminal with
+    `colors` colors: '#rrggbb' for true color (2**24) and 'hN' for 256 colors
+
+    Returns
+    -------
+    None, str:
+        urwid color string, or None if `value` is not a hex color
+    """
+    rgb = parse_hex(value)
+    if rgb == None:
+        return None
+    if colors >= 2**24:
+        return "#{:02x}{:02x}{:02x}".format(*rgb)
+    return "h{}".format(nearest_xterm(rgb))
@@ -0,0 +1,178 @@
+import urwid
+from typing import List, Callable
+from .fuzzy import FuzzyIndex
+
+
+class ThemeWalker(urwid.ListWalker):
+    """Lazy list walker over theme names. Button widgets are only built for the rows
+    that the enclosing `urwid.ListBox` actually renders, and the list can be narrowed
+    with an incremental fuzzy filter.
+
+    Parameters
+    ----------
+    names:
+        List of theme names
+    action:
+        Function/method to which the `click` signal of each button is connected. The
+        theme name is passed as its first argument.
+    cache_size:
+        Maximum number of row widgets kept alive
+    annotate:
+        Optional function returning a short text (e.g., a score) shown at the right
+        of the row of a theme name. It is only called for rows that are built.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        action: Callable,
+        cache_size: int = 256,
+        annotate: Callable = None,
+    ):
+        self.names = list(names)
+        self.action = action
+        self.cache_size = cache_size
+        self.annotate = annotate
+        self.index = FuzzyIndex(self.names)
+        self.positions = list(range(len(self.names)))
+        self.query = ""
+        self.focus = 0
+        self.focus_callbacks = []
+        self._widgets = {}
+
+    def _widget(self, i: int) -> urwid.Widget:
+        """Returns (and caches) the row widget for `names[i]`"""
+        widget = self._widgets.get(i)
+        if widget == None:
+            if len(self._widgets) >= self.cache_size:
+                self._widgets.clear()
+            button = urwid.Button(self.names[i])
+            urwid.connect_signal(
+                button, "click", self.action, user_args=[self.names[i]]
+            )
+            widget = button
+            if self.annotate != None:
+                annotation = urwid.Text(self.annotate(self.names[i]), align="right")
+                widget = urwid.Columns([button, ("pack", annotation)], dividechars=1)
+            widget = urwid.AttrMap(widget, None, focus_map="reversed")
+            self._widgets[i] = widget
+        return widget
+
+    def refresh(self, name: str):
+        """Rebuilds the row of `name` if it is built, e.g. once its annotation
+        changed
+        """
+        for i in list(self._widgets.keys()):
+            if self.names[i] == name:
+                del self._widgets[i]
+                self._modified()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def get_focus(self):
+        if len(self.positions) == 0:
+            return None, None
+        return self._widget(self.positions[self.focus]), self.focus
+
+    def set_focus(self, position: int):
+        self.focus = position
+        self._modified()
+        name = self.focused_name
+        if name != None:
+            for callback in self.focus_callbacks:
+                callback(name)
+
+    def get_next(self, position: int):
+        if position + 1 >= len(self.positions):
+            return None, None
+        return self._widget(self.positions[position + 1]), position + 1
+
+    def get_prev(self, position: int):
+        if position <= 0 or len(self.positions) == 0:
+            return None, None
+        return self._widget(self.positions[position - 1]), position - 1
+
+    @property
+    def focused_name(self) -> str:
+        """Name of the theme under the cursor, or None if no theme is shown"""
+        if len(self.positions) == 0:
+            return None
+        return self.names[self.positions[self.focus]]
+
+    def neighbours(self, radius: int) -> List[str]:
+        """Names of the focused theme and of up to `radius` themes above and below it,
+        nearest first
+        """
+        names = []
+        for offset in range(radius + 1):
+            for position in sorted(set([self.focus + offset, self.focus - offset])):
+                if 0 <= position < len(self.positions):
+                    names.append(self.names[self.positions[position]])
+        return names
+
+    def set_filter(self, query: str):
+        """Only shows the names that fuzzy-match `query`"""
+        self.query = query
+        self.positions = self.index.filter(query)
+        self.set_focus(0)
+
+    def set_names(self, names: List[str]):
+        """Replaces the list of theme names (e.g., after themes were added or removed
+        on disk), keeping the current filter and, if it is still listed, the focused
+        theme
+        """
+        focused = self.focused_name
+        self.names = list(names)
+        self.index = FuzzyIndex(self.names)
+        self.positions = self.index.filter(self.query)
+        self._widgets = {}
+        self.focus = 0
+        if focused in self.names:
+            i = self.names.index(focused)
+            if i in self.positions:
+                self.focus = self.positions.index(i)
+        self._modified()
+
+
+def make_theme_menu(
+    names: List[str],
+    action: Callable,
+    title: str,
+    style_kwargs: dict,
+    annotate: Callable = None,
+) -> urwid.LineBox:
+    """Generates a lazily rendered, fuzzy-searchable list of theme buttons
+
+    Parameters
+    ----------
+    names:
+        List of theme names, one for each button
+    action:
+        Function/method to which the `click` signal of each button is connected
+    title:
+        Title of the urwid.LineBox that wraps the list
+    style_kwargs:
+        Keyword arguments passed to urwid.LineBox
+    annotate:
+        Optional function returning a short text shown next to a theme name, see
+        `ThemeWalker`
+
+    Returns
+    -------
+    menu:
+        urwid.LineBox that contains a filter field above the list of buttons. The
+        `ThemeWalker` and the `urwid.Pile` holding the filter field and the list are
+        accessible as its `walker` and `pile` attributes.
+    """
+
+    walker = ThemeWalker(names, action, annotate=annotate)
+    search = urwid.Edit("/ ")
+    urwid.connect_signal(
+        search, "postchange", lambda edit, old: walker.set_filter(edit.edit_text)
+    )
+    body = urwid.Pile([("pack", search), urwid.ListBox(walker)], focus_item=1)
+    menu = urwid.LineBox(body, title=title, **style_kwargs)
+    menu.walker = walker
+    menu.pile = body
+    return menu